@@ -4,6 +4,7 @@ from .keys import router as keys_router
 from .logs import router as logs_router
 from .pages import router as pages_router
 from .records import router as records_router
+from .system import router as system_router
 from .trade import router as trade_router
 
 __all__ = [
@@ -12,5 +13,6 @@ __all__ = [
     "records_router",
     "logs_router",
     "keys_router",
-    "trade_router"
+    "trade_router",
+    "system_router"
 ]
@@ -58,7 +58,7 @@ async def refresh_configs():
     try:
         count = ConfigManager.refresh_all_services()
         return ApiResponse.success(
-            data={"count": count},
+            data={"count": count, "version": ConfigManager.get_version()},
             message="配置刷新成功"
         )
     except Exception as e:
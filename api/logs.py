@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from fastapi import APIRouter
 
 from services.monitor_service import MonitorService
@@ -7,10 +9,12 @@ from utils.response import ApiResponse
 router = APIRouter(prefix="/api", tags=["日志管理"])
 
 @router.get("/logs")
-async def get_logs(page: int = 1, per_page: int = 20, monitor_record_id: int = None, type: str = None, action_types: str = None):
+async def get_logs(page: int = 1, per_page: int = 20, monitor_record_id: int = None, type: str = None,
+                   action_types: str = None, before_ts: datetime = None, before_id: int = None):
     """
     获取监控日志，支持 type=normal/swing
     action_types: 动作类型，逗号分割的字符串，如果为空则不过滤
+    before_ts/before_id: 游标分页，取上一页返回的next_cursor，传入后忽略page
     """
     try:
         # 将逗号分割的字符串转换为数组
@@ -18,7 +22,17 @@ async def get_logs(page: int = 1, per_page: int = 20, monitor_record_id: int = N
         if action_types:
             action_types_list = [t.strip() for t in action_types.split(',') if t.strip()]
 
-        data = MonitorService.get_logs(page, per_page, monitor_record_id, type, action_types_list)
+        data = MonitorService.get_logs(page, per_page, monitor_record_id, type, action_types_list,
+                                      before_ts, before_id)
+        return ApiResponse.success(data=data)
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+@router.get("/candles")
+async def get_candles(token_address: str, start: datetime = None, end: datetime = None, limit: int = 1440):
+    """获取代币的分钟K线，start/end为UTC时间"""
+    try:
+        data = MonitorService.get_candles(token_address, start, end, limit)
         return ApiResponse.success(data=data)
     except Exception as e:
         return ApiResponse.error(message=str(e))
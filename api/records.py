@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Form
+from datetime import datetime
 
+from fastapi import APIRouter, File, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from core.backtest import backtest_record
+from core.trader import SOL_MINT
+from services import TokenAPI
 from services.monitor_service import MonitorService
+from utils import normalize_sol_address
 from utils.response import ApiResponse
 
 # 创建路由器
@@ -44,7 +51,11 @@ async def create_monitor_record(
     minimum_hold_value: float = Form(50.0),
     pre_sniper_mode: bool = Form(False),
     type: str = Form("sell"),
-    max_buy_amount: float = Form(0.0)
+    max_buy_amount: float = Form(0.0),
+    sell_slice_mode: str = Form("none"),
+    sell_slice_count: int = Form(5),
+    sell_slice_window: int = Form(300),
+    max_price_impact: float = Form(2.0)
 ):
     """创建监控记录"""
     try:
@@ -52,7 +63,8 @@ async def create_monitor_record(
             name, private_key_id, token_address, threshold,
             sell_percentage, webhook_url, check_interval,
             execution_mode, minimum_hold_value, pre_sniper_mode,
-            type, max_buy_amount
+            type, max_buy_amount, sell_slice_mode,
+            sell_slice_count, sell_slice_window, max_price_impact
         )
         if success:
             return ApiResponse.success(
@@ -78,22 +90,26 @@ async def update_monitor_record(
     minimum_hold_value: float = Form(50.0),
     pre_sniper_mode: bool = Form(False),
     type: str = Form("sell"),
-    max_buy_amount: float = Form(0.0)
+    max_buy_amount: float = Form(0.0),
+    sell_slice_mode: str = Form("none"),
+    sell_slice_count: int = Form(5),
+    sell_slice_window: int = Form(300),
+    max_price_impact: float = Form(2.0)
 ):
     """更新监控记录"""
     try:
-        # 如果监控正在运行，不允许修改
-        if _monitor and _monitor.is_monitor_running(record_id):
-            return ApiResponse.error(message="请先停止监控再修改")
+        # 运行中的监控通过配置快照热更新，下一次价格tick起生效
         success, message = MonitorService.update_record(
             record_id, name, private_key_id, token_address,
             threshold, sell_percentage, webhook_url, check_interval,
             execution_mode, minimum_hold_value, pre_sniper_mode,
-            type, max_buy_amount
+            type, max_buy_amount, sell_slice_mode,
+            sell_slice_count, sell_slice_window, max_price_impact
         )
         if success:
-            # 自动修复状态为stopped
-            MonitorService.update_record_status(record_id, "stopped")
+            # 未运行的监控自动修复状态为stopped
+            if not (_monitor and _monitor.is_monitor_running(record_id)):
+                MonitorService.update_record_status(record_id, "stopped")
             return ApiResponse.success(message=message)
         else:
             return ApiResponse.error(message=message)
@@ -142,3 +158,41 @@ async def delete_monitor_record(record_id: int):
             return ApiResponse.error(message=message)
     except Exception as e:
         return ApiResponse.error(message=str(e))
+
+
+@router.post("/{record_id}/backtest")
+async def backtest_monitor_record(
+    record_id: int,
+    threshold: float = Form(None),
+    sell_percentage: float = Form(None),
+    execution_mode: str = Form(None),
+    minimum_hold_value: float = Form(None),
+    pre_sniper_mode: bool = Form(None),
+    max_buy_amount: float = Form(None),
+    start: datetime = Form(None),
+    end: datetime = Form(None),
+    token_balance: float = Form(0.0),
+    sol_balance: float = Form(0.0),
+    sol_usd_price: float = Form(None),
+    slippage_bps: float = Form(50),
+    csv_file: UploadFile = File(None)
+):
+    """用监控记录的配置回测，表单中的参数覆盖记录配置；未上传CSV时回放该记录的K线与tick日志，SOL价格默认取当前价格"""
+    try:
+        if token_balance <= 0 and sol_balance <= 0:
+            return ApiResponse.error(message="初始代币和SOL数量不能都为0")
+        if sol_usd_price is None:
+            sol_info = await run_in_threadpool(TokenAPI().get_market_data, normalize_sol_address(SOL_MINT))
+            if not sol_info or not sol_info.get('price'):
+                return ApiResponse.error(message="无法获取SOL价格，请手动填写")
+            sol_usd_price = sol_info['price']
+        csv_text = (await csv_file.read()).decode('utf-8-sig') if csv_file else None
+        overrides = dict(threshold=threshold, sell_percentage=sell_percentage, execution_mode=execution_mode,
+                         minimum_hold_value=minimum_hold_value, pre_sniper_mode=pre_sniper_mode,
+                         max_buy_amount=max_buy_amount)
+        result = await run_in_threadpool(
+            backtest_record, record_id, 'normal', overrides, csv_text, start, end,
+            token_balance, sol_balance, sol_usd_price, slippage_bps)
+        return ApiResponse.success(data=result)
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Form
+from datetime import datetime
 
+from fastapi import APIRouter, File, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from core.backtest import backtest_record
 from core.price_monitor import PriceMonitor
 from services.swing_monitor_service import SwingMonitorService
 from utils.response import ApiResponse
@@ -92,8 +96,9 @@ async def update_swing_record(
         )
 
         if success:
-            # 自动修复状态为stopped
-            SwingMonitorService.update_record_status(record_id, "stopped")
+            # 运行中的波段监控通过配置快照热更新，未运行的自动修复状态为stopped
+            if not PriceMonitor().is_swing_monitor_running(record_id):
+                SwingMonitorService.update_record_status(record_id, "stopped")
             return ApiResponse.success(message=message)
         else:
             return ApiResponse.error(message=message)
@@ -129,6 +134,41 @@ async def get_swing_record(record_id: int):
         return ApiResponse.error(message=str(e))
 
 
+@router.post("/records/{record_id}/backtest")
+async def backtest_swing_record(
+    record_id: int,
+    price_type: str = Form(None),
+    sell_threshold: float = Form(None),
+    buy_threshold: float = Form(None),
+    sell_percentage: float = Form(None),
+    buy_percentage: float = Form(None),
+    all_in_threshold: float = Form(None),
+    start: datetime = Form(None),
+    end: datetime = Form(None),
+    watch_token_balance: float = Form(0.0),
+    trade_token_balance: float = Form(0.0),
+    trade_token_usd_price: float = Form(1.0),
+    slippage_bps: float = Form(50),
+    csv_file: UploadFile = File(None)
+):
+    """用波段监控记录的配置回测，表单中的参数覆盖记录配置；交易代币价格在回放期间视为不变"""
+    try:
+        if watch_token_balance <= 0 and trade_token_balance <= 0:
+            return ApiResponse.error(message="初始监听代币和交易代币数量不能都为0")
+        if price_type is not None and price_type not in ["market_cap", "price"]:
+            return ApiResponse.error(message="价格类型必须是 'market_cap' 或 'price'")
+        csv_text = (await csv_file.read()).decode('utf-8-sig') if csv_file else None
+        overrides = dict(price_type=price_type, sell_threshold=sell_threshold, buy_threshold=buy_threshold,
+                         sell_percentage=sell_percentage, buy_percentage=buy_percentage,
+                         all_in_threshold=all_in_threshold)
+        result = await run_in_threadpool(
+            backtest_record, record_id, 'swing', overrides, csv_text, start, end,
+            watch_token_balance, trade_token_balance, trade_token_usd_price, slippage_bps)
+        return ApiResponse.success(data=result)
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
 @router.post("/start")
 async def start_swing_monitor(record_id: int = Form(...)):
     """启动波段监控"""
@@ -0,0 +1,176 @@
+from fastapi import APIRouter
+
+from core.balance_cache import BalanceCache
+from core.blockhash_cache import BlockhashCache
+from core.confirmation_tracker import ConfirmationTracker
+from core.fee_estimator import PriorityFeeEstimator
+from core.price_monitor import PriceMonitor
+from core.quote_prewarmer import QuotePrewarmer
+from core.sliced_seller import SlicedSeller
+from core.trader_registry import TraderRegistry
+from core.tx_broadcaster import TransactionBroadcaster
+from core.wallet_queue import WalletTradeQueue
+from services.http_client import HttpClient
+from services.log_compactor import LogCompactor
+from services.log_writer import MonitorLogWriter
+from services.mint_cache import MintInfoCache
+from services.monitor_state import MonitorStateStore
+from services.notification_queue import NotificationQueue
+from services.threshold_index import ThresholdIndex
+from utils.response import ApiResponse
+
+# 创建路由器
+router = APIRouter(prefix="/api/system", tags=["系统状态"])
+
+
+@router.get("/http-pool")
+async def get_http_pool_stats():
+    """获取各host的HTTP连接池命中统计"""
+    try:
+        return ApiResponse.success(data=HttpClient().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/threshold-index")
+async def get_threshold_index_stats():
+    """获取各代币已索引的监控阈值数量"""
+    try:
+        return ApiResponse.success(data=ThresholdIndex().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/log-writer")
+async def get_log_writer_stats():
+    """获取监控日志批量写入队列统计"""
+    try:
+        return ApiResponse.success(data=MonitorLogWriter().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/monitor-state")
+async def get_monitor_state_stats():
+    """获取运行中监控的配置快照数量与最新状态批量落库统计"""
+    try:
+        return ApiResponse.success(data=MonitorStateStore().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/log-compactor")
+async def get_log_compactor_stats():
+    """获取tick日志压缩任务统计"""
+    try:
+        return ApiResponse.success(data=LogCompactor().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/traders")
+async def get_trader_registry_stats():
+    """获取交易器注册表大小与命中统计"""
+    try:
+        return ApiResponse.success(data=TraderRegistry().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/blockhash")
+async def get_blockhash_cache_stats():
+    """获取各RPC节点的区块哈希缓存状态"""
+    try:
+        return ApiResponse.success(data=BlockhashCache().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/balances")
+async def get_balance_cache_stats():
+    """获取钱包余额快照命中统计"""
+    try:
+        return ApiResponse.success(data=BalanceCache().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/mint-cache")
+async def get_mint_cache_stats():
+    """获取代币mint信息与ATA地址缓存统计"""
+    try:
+        return ApiResponse.success(data=MintInfoCache().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/quote-prewarm")
+async def get_quote_prewarm_stats():
+    """获取临近阈值的报价预热状态"""
+    try:
+        return ApiResponse.success(data=QuotePrewarmer().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/rpc-endpoints")
+async def get_rpc_endpoint_stats():
+    """按上链耗时排序获取各RPC节点的广播统计"""
+    try:
+        return ApiResponse.success(data=TransactionBroadcaster().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/confirmations")
+async def get_confirmation_stats():
+    """获取待确认交易数量与确认统计"""
+    try:
+        return ApiResponse.success(data=ConfirmationTracker().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/priority-fees")
+async def get_priority_fee_stats():
+    """获取优先费采样窗口与各交易类型的百分位数和上限"""
+    try:
+        return ApiResponse.success(data=PriorityFeeEstimator().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/sliced-sells")
+async def get_sliced_sell_stats():
+    """获取进行中与最近完成的分片出售，包括每个子订单的预期与实际到账SOL"""
+    try:
+        return ApiResponse.success(data=SlicedSeller().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/wallet-queues")
+async def get_wallet_queue_stats():
+    """获取各钱包交易队列的深度、等待确认的交易数量和排队耗时"""
+    try:
+        return ApiResponse.success(data=WalletTradeQueue().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/notifications")
+async def get_notification_stats():
+    """获取各webhook的通知队列深度与发送、重试、合并统计"""
+    try:
+        return ApiResponse.success(data=NotificationQueue().get_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
+
+
+@router.get("/recovery")
+async def get_recovery_stats():
+    """获取启动恢复进度与全部进入监控的耗时"""
+    try:
+        return ApiResponse.success(data=PriceMonitor().get_recovery_stats())
+    except Exception as e:
+        return ApiResponse.error(message=str(e))
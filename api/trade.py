@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Query, Body, Form
 
-from core.trader import SolanaTrader
+from core.trader_registry import TraderRegistry
 from services import TokenAPI
 from services.monitor_service import MonitorService
 from utils import normalize_sol_address
@@ -40,7 +40,7 @@ async def quote(
         key = MonitorService.get_private_key_by_id(key_id)
         if not key:
             return ApiResponse.error(message="私钥不存在")
-        trader = SolanaTrader(key["private_key"])
+        trader = TraderRegistry().get(key_id, key["private_key"])
         from_decimals = trader.get_token_decimals(from_)
 
         # 新增：支持按USD金额输入
@@ -88,7 +88,7 @@ async def swap(data: dict = Body(...)):
         key = MonitorService.get_private_key_by_id(key_id)
         if not key:
             return ApiResponse.error(message="私钥不存在")
-        trader = SolanaTrader(key["private_key"])
+        trader = TraderRegistry().get(key_id, key["private_key"])
         # 直接用quote数据执行
         txid = trader.execute_swap(quote)
         if isinstance(txid, str) and txid:
@@ -114,7 +114,7 @@ async def transfer_preview(
         key = MonitorService.get_private_key_by_id(key_id)
         if not key:
             return ApiResponse.error(message="私钥不存在")
-        trader = SolanaTrader(key["private_key"])
+        trader = TraderRegistry().get(key_id, key["private_key"])
         preview = trader.transfer_preview(normalize_sol_address(token_address), normalize_sol_address(to_address),
                                           amount)
         if isinstance(preview, dict) and preview.get("err"):
@@ -137,7 +137,7 @@ async def transfer(
         key = MonitorService.get_private_key_by_id(key_id)
         if not key:
             return ApiResponse.error(message="私钥不存在")
-        trader = SolanaTrader(key["private_key"])
+        trader = TraderRegistry().get(key_id, key["private_key"])
         result = trader.transfer(normalize_sol_address(token_address), normalize_sol_address(to_address), amount)
         if isinstance(result, dict) and result.get("err"):
             return ApiResponse.error(message=result.get("err"), data=result.get("program_logs"))
@@ -1,7 +1,9 @@
 import json
 import logging
+import threading
+import weakref
 from datetime import datetime
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
 from database.models import Config, SessionLocal
 
@@ -13,24 +15,98 @@ class ConfigManager:
         'API_KEY': {'value': 'xxx', 'description': 'Birdeye API密钥', 'config_type': 'string'},
         'CHAIN_HEADER': {'value': 'solana', 'description': '区块链类型', 'config_type': 'string'},
         'RPC_URL': {'value': 'https://api.mainnet-beta.solana.com', 'description': 'Solana RPC节点地址', 'config_type': 'string'},
+        'RPC_URLS': {'value': '', 'description': '交易额外广播的RPC节点地址，多个用逗号分隔', 'config_type': 'string'},
         'JUPITER_API_URL': {'value': 'https://quote-api.jup.ag/v6', 'description': 'Jupiter API地址', 'config_type': 'string'},
-        'SLIPPAGE_BPS': {'value': '100', 'description': '滑点设置（100 = 1%）', 'config_type': 'number'}
+        'SLIPPAGE_BPS': {'value': '100', 'description': '滑点设置（100 = 1%）', 'config_type': 'number'},
+        'DEX_BATCH_WINDOW_MS': {'value': '50', 'description': 'DexScreener批量查询合并窗口（毫秒）', 'config_type': 'number'},
+        'HTTP_POOL_MAXSIZE': {'value': '20', 'description': '每个host的HTTP连接池大小', 'config_type': 'number'},
+        'HTTP_TIMEOUT': {'value': '10', 'description': 'HTTP请求默认超时（秒）', 'config_type': 'number'},
+        'MONITOR_WORKER_THREADS': {'value': '32', 'description': '监控引擎阻塞任务工作线程数',
+                                   'config_type': 'number'},
+        'WALLET_QUEUE_WORKERS': {'value': '8', 'description': '钱包交易队列工作线程数，不同钱包的交易并行执行',
+                                 'config_type': 'number'},
+        'LOG_BATCH_SIZE': {'value': '200', 'description': '监控日志批量写入条数', 'config_type': 'number'},
+        'LOG_FLUSH_INTERVAL_MS': {'value': '1000', 'description': '监控日志批量写入间隔（毫秒）', 'config_type': 'number'},
+        'LOG_QUEUE_MAXSIZE': {'value': '10000', 'description': '监控日志队列容量（重启生效）', 'config_type': 'number'},
+        'LOG_QUEUE_BLOCK_MS': {'value': '100', 'description': '监控日志队列满时最长等待（毫秒），超时丢弃tick日志',
+                               'config_type': 'number'},
+        'MONITOR_STATE_FLUSH_SECONDS': {'value': '5', 'description': '监控最新价格、市值与检查时间批量落库的间隔（秒）',
+                                        'config_type': 'number'},
+        'LOG_COMPACT_AGE_HOURS': {'value': '24', 'description': '超过该时长（小时）的tick日志压缩为分钟K线',
+                                  'config_type': 'number'},
+        'LOG_COMPACT_INTERVAL_SECONDS': {'value': '300', 'description': 'tick日志压缩任务运行间隔（秒）',
+                                         'config_type': 'number'},
+        'LOG_COMPACT_CHUNK_SIZE': {'value': '2000', 'description': 'tick日志压缩每批删除条数', 'config_type': 'number'},
+        'TRADER_REGISTRY_SIZE': {'value': '64', 'description': '按钱包缓存的交易器数量上限', 'config_type': 'number'},
+        'BLOCKHASH_REFRESH_MS': {'value': '1000', 'description': '区块哈希后台预取间隔（毫秒，400-2000）',
+                                 'config_type': 'number'},
+        'BLOCKHASH_MAX_AGE_SECONDS': {'value': '20', 'description': '区块哈希缓存最长使用时间（秒），超过则同步获取',
+                                      'config_type': 'number'},
+        'BLOCKHASH_IDLE_SECONDS': {'value': '600', 'description': 'RPC节点无交易超过该时间（秒）后暂停预取区块哈希',
+                                   'config_type': 'number'},
+        'BALANCE_CACHE_TTL_MS': {'value': '2000', 'description': '钱包余额快照有效期（毫秒），交易确认后立即失效',
+                                 'config_type': 'number'},
+        'QUOTE_PREWARM_BAND_PERCENT': {'value': '3', 'description': '市值距离阈值在该百分比以内时预热报价和交易，0表示关闭',
+                                       'config_type': 'number'},
+        'QUOTE_PREWARM_REFRESH_SECONDS': {'value': '3', 'description': '预热区间内重新获取报价的间隔（秒）',
+                                          'config_type': 'number'},
+        'QUOTE_PREWARM_MAX_AGE_SECONDS': {'value': '10', 'description': '预热的报价和交易最长使用时间（秒），超过则重新报价',
+                                          'config_type': 'number'},
+        'TX_REBROADCAST_MS': {'value': '2000', 'description': '交易确认前重新广播到全部RPC节点的间隔（毫秒）',
+                              'config_type': 'number'},
+        'TX_STATUS_POLL_MS': {'value': '400', 'description': '批量查询待确认交易状态的间隔（毫秒）',
+                              'config_type': 'number'},
+        'TX_CONFIRM_TIMEOUT_SECONDS': {'value': '60', 'description': '没有区块高度信息时等待交易确认的最长时间（秒）',
+                                       'config_type': 'number'},
+        'PRIORITY_FEE_WINDOW_SLOTS': {'value': '300', 'description': '优先费滚动窗口保留的slot数量',
+                                      'config_type': 'number'},
+        'PRIORITY_FEE_SAMPLE_SECONDS': {'value': '10', 'description': '同一代币的优先费窗口在后台重新采样的间隔（秒）',
+                                        'config_type': 'number'},
+        'PRIORITY_FEE_PERCENTILE_NORMAL': {'value': '75', 'description': '普通监控交易使用的优先费百分位数',
+                                           'config_type': 'number'},
+        'PRIORITY_FEE_PERCENTILE_SWING': {'value': '75', 'description': '波段监控交易使用的优先费百分位数',
+                                          'config_type': 'number'},
+        'PRIORITY_FEE_PERCENTILE_MANUAL': {'value': '50', 'description': '手动交易和转账使用的优先费百分位数',
+                                           'config_type': 'number'},
+        'PRIORITY_FEE_CAP_LAMPORTS_NORMAL': {'value': '2000000', 'description': '普通监控单笔交易优先费上限（lamports）',
+                                             'config_type': 'number'},
+        'PRIORITY_FEE_CAP_LAMPORTS_SWING': {'value': '1000000', 'description': '波段监控单笔交易优先费上限（lamports）',
+                                            'config_type': 'number'},
+        'PRIORITY_FEE_CAP_LAMPORTS_MANUAL': {'value': '500000', 'description': '手动交易和转账单笔优先费上限（lamports）',
+                                             'config_type': 'number'},
+        'NOTIFY_RATE_PER_MINUTE': {'value': '100', 'description': '每个飞书webhook每分钟最多发送的通知数',
+                                   'config_type': 'number'},
+        'NOTIFY_BURST': {'value': '5', 'description': '每个飞书webhook允许的突发通知数（令牌桶容量）',
+                         'config_type': 'number'},
+        'NOTIFY_MAX_RETRIES': {'value': '5', 'description': '通知发送失败或被限流时的最多重试次数',
+                               'config_type': 'number'},
+        'NOTIFY_RETRY_BASE_SECONDS': {'value': '1', 'description': '通知重试的初始退避时间（秒），每次翻倍',
+                                      'config_type': 'number'},
+        'NOTIFY_QUEUE_MAX': {'value': '200', 'description': '每个webhook最多排队的通知数，超出时丢弃最早的通知',
+                             'config_type': 'number'},
+        'RECOVERY_JITTER_SECONDS': {'value': '10', 'description': '启动恢复监控时的错峰窗口（秒），各监控在窗口内随机延迟后开始',
+                                    'config_type': 'number'}
     }
 
-    # 存储需要刷新配置的服务实例
-    _service_instances = []
+    # 存储需要刷新配置的服务实例，弱引用避免短生命周期的服务无法被回收
+    _service_instances = weakref.WeakSet()
+
+    # 进程内配置快照：(版本号, {key: 已解析的值})，整体替换保证读到的快照一致
+    _snapshot: Optional[Tuple[int, Dict[str, Any]]] = None
+    _version = 0
+    _snapshot_lock = threading.Lock()
 
     @classmethod
     def register_service(cls, service_instance):
         """注册需要配置刷新的服务实例"""
-        if service_instance not in cls._service_instances:
-            cls._service_instances.append(service_instance)
+        cls._service_instances.add(service_instance)
 
     @classmethod
     def refresh_all_services(cls):
         """刷新所有已注册服务的配置"""
+        cls.invalidate()
         refreshed_count = 0
-        for service in cls._service_instances:
+        for service in list(cls._service_instances):
             if hasattr(service, 'refresh_config'):
                 try:
                     service.refresh_config()
@@ -65,34 +141,95 @@ class ConfigManager:
                     )
                     db.add(config)
             db.commit()
+            ConfigManager.invalidate()
         finally:
             db.close()
 
+    @classmethod
+    def invalidate(cls):
+        """使配置快照失效，下次读取时重新加载"""
+        with cls._snapshot_lock:
+            cls._version += 1
+            cls._snapshot = None
+
+    @classmethod
+    def get_version(cls) -> int:
+        """当前配置版本号，每次配置变更单调递增"""
+        return cls._version
+
+    @classmethod
+    def _get_snapshot(cls) -> Dict[str, Any]:
+        snapshot = cls._snapshot
+        if snapshot is not None:
+            return snapshot[1]
+        version = cls._version
+        values = cls._load_configs()
+        with cls._snapshot_lock:
+            # 加载期间配置又被修改时不安装旧数据，本次读取仍返回刚加载的值
+            if cls._version == version:
+                cls._snapshot = (version, values)
+        return values
+
     @staticmethod
-    def get_config(key: str, default: Any = None) -> Any:
-        """获取配置值"""
+    def _load_configs() -> Dict[str, Any]:
+        """从数据库加载全部配置并按类型解析"""
         db = SessionLocal()
         try:
-            config = db.query(Config).filter(Config.key == key).first()
-            if not config:
-                return default
-
-            value = config.value
-            config_type = config.config_type
-
-            if config_type == 'number':
-                return float(value) if '.' in value else int(value)
-            elif config_type == 'boolean':
-                return value.lower() in ('true', '1', 'yes', 'on')
-            elif config_type == 'json':
-                return json.loads(value)
-            else:
-                return value
-        except Exception:
-            return default
+            values = {}
+            for config in db.query(Config).all():
+                try:
+                    values[config.key] = ConfigManager._parse_value(config.value, config.config_type)
+                except Exception:
+                    logging.warning(f"配置 {config.key} 的值无法按 {config.config_type} 解析，已忽略")
+            return values
         finally:
             db.close()
 
+    @staticmethod
+    def _parse_value(value: str, config_type: str) -> Any:
+        if config_type == 'number':
+            return float(value) if '.' in value else int(value)
+        elif config_type == 'boolean':
+            return value.lower() in ('true', '1', 'yes', 'on')
+        elif config_type == 'json':
+            return json.loads(value)
+        else:
+            return value
+
+    @classmethod
+    def get_config(cls, key: str, default: Any = None) -> Any:
+        """获取配置值，从内存快照读取"""
+        try:
+            return cls._get_snapshot().get(key, default)
+        except Exception:
+            return default
+
+    @classmethod
+    def get_int(cls, key: str, default: int = 0) -> int:
+        try:
+            return int(cls.get_config(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    @classmethod
+    def get_float(cls, key: str, default: float = 0.0) -> float:
+        try:
+            return float(cls.get_config(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    @classmethod
+    def get_bool(cls, key: str, default: bool = False) -> bool:
+        value = cls.get_config(key, default)
+        if isinstance(value, str):
+            return value.lower() in ('true', '1', 'yes', 'on')
+        return bool(value)
+
+    @classmethod
+    def get_str(cls, key: str, default: str = "") -> str:
+        value = cls.get_config(key, default)
+        return default if value is None else str(value)
+
     @staticmethod
     def set_config(key: str, value: str, description: str = "", config_type: str = "string") -> bool:
         """设置配置值"""
@@ -109,6 +246,7 @@ class ConfigManager:
                 db.add(config)
 
             db.commit()
+            ConfigManager.invalidate()
             return True
         except Exception:
             return False
@@ -144,6 +282,7 @@ class ConfigManager:
             if config:
                 db.delete(config)
                 db.commit()
+                ConfigManager.invalidate()
                 return True
             return False
         except Exception:
@@ -1,8 +1,10 @@
 # 核心业务逻辑模块包
 from .price_monitor import PriceMonitor
 from .trader import SolanaTrader
+from .trader_registry import TraderRegistry
 
 __all__ = [
     "PriceMonitor",
-    "SolanaTrader"
+    "SolanaTrader",
+    "TraderRegistry"
 ] 
\ No newline at end of file
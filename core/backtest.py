@@ -0,0 +1,344 @@
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from core.price_monitor import PriceMonitor, TRADE_COOLDOWN_SECONDS
+from database.models import MonitorLog, MonitorRecord, PriceCandle, SessionLocal, SwingMonitorRecord
+from services.monitor_state import MonitorSnapshot, SwingMonitorSnapshot
+from services.threshold_index import TokenThresholds
+
+# 回测中监控所处的状态
+BACKTEST_STATES = ('monitoring', 'cooldown', 'completed')
+# 分钟K线展开成tick时相邻价格点的间隔（秒）
+CANDLE_POINT_SECONDS = 15
+
+
+class PricePoint:
+    """回放用的一条价格tick"""
+
+    __slots__ = ('timestamp', 'price', 'market_cap')
+
+    def __init__(self, timestamp: datetime, price: float, market_cap: Optional[float]):
+        self.timestamp = timestamp
+        self.price = price
+        self.market_cap = market_cap
+
+
+def load_monitor_logs(record_id: int, monitor_type: str = 'normal', start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> List[PricePoint]:
+    """读取监控记录的tick日志（action_type为monitoring），按时间正序返回"""
+    db = SessionLocal()
+    try:
+        query = db.query(MonitorLog.timestamp, MonitorLog.price, MonitorLog.market_cap).filter(
+            MonitorLog.monitor_type == monitor_type,
+            MonitorLog.monitor_record_id == record_id,
+            MonitorLog.action_type == 'monitoring'
+        )
+        if start:
+            query = query.filter(MonitorLog.timestamp >= start)
+        if end:
+            query = query.filter(MonitorLog.timestamp < end)
+        return [PricePoint(timestamp, price, market_cap)
+                for timestamp, price, market_cap in query.order_by(MonitorLog.timestamp)
+                if timestamp is not None and price]
+    finally:
+        db.close()
+
+
+def load_candles(token_address: str, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> List[PricePoint]:
+    """读取代币的分钟K线并展开成tick：阳线按开-低-高-收，阴线按开-高-低-收的顺序经过极值"""
+    db = SessionLocal()
+    try:
+        query = db.query(PriceCandle).filter(PriceCandle.token_address == token_address)
+        if start:
+            query = query.filter(PriceCandle.minute >= start)
+        if end:
+            query = query.filter(PriceCandle.minute < end)
+        points = []
+        for candle in query.order_by(PriceCandle.minute):
+            path = [(candle.open_price, candle.open_market_cap)]
+            if (candle.close_price or 0) >= (candle.open_price or 0):
+                path += [(candle.low_price, candle.low_market_cap), (candle.high_price, candle.high_market_cap)]
+            else:
+                path += [(candle.high_price, candle.high_market_cap), (candle.low_price, candle.low_market_cap)]
+            path.append((candle.close_price, candle.close_market_cap))
+            for index, (price, market_cap) in enumerate(path):
+                if price:
+                    points.append(PricePoint(candle.minute + timedelta(seconds=index * CANDLE_POINT_SECONDS),
+                                             price, market_cap))
+        return points
+    finally:
+        db.close()
+
+
+def load_history(record_id: int, monitor_type: str, token_address: str, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> List[PricePoint]:
+    """读取监控记录的完整历史：已压缩的时间段用分钟K线，其后用tick日志"""
+    ticks = load_monitor_logs(record_id, monitor_type, start, end)
+    candles = load_candles(token_address, start, ticks[0].timestamp if ticks else end)
+    return candles + ticks
+
+
+def load_csv(text: str) -> List[PricePoint]:
+    """读取导入的CSV价格序列，需要timestamp和price列，market_cap列可选；timestamp为ISO时间或秒级时间戳"""
+    points = []
+    for row in csv.DictReader(io.StringIO(text)):
+        raw_timestamp = (row.get('timestamp') or '').strip()
+        price = float(row.get('price') or 0)
+        if not raw_timestamp or price <= 0:
+            continue
+        try:
+            timestamp = datetime.utcfromtimestamp(float(raw_timestamp))
+        except ValueError:
+            timestamp = datetime.fromisoformat(raw_timestamp)
+        market_cap = row.get('market_cap')
+        points.append(PricePoint(timestamp, price, float(market_cap) if market_cap else None))
+    points.sort(key=lambda point: point.timestamp)
+    return points
+
+
+def backtest_settings(record, monitor_type: str, overrides: Optional[Dict] = None) -> SimpleNamespace:
+    """复制监控记录中回测需要的字段，overrides中不为None的值覆盖待测试的参数"""
+    snapshot_class = MonitorSnapshot if monitor_type == 'normal' else SwingMonitorSnapshot
+    settings = SimpleNamespace(**{field: getattr(record, field, None)
+                                  for field in snapshot_class.__slots__ if field != 'private_key'})
+    for field, value in (overrides or {}).items():
+        if value is not None:
+            setattr(settings, field, value)
+    return settings
+
+
+class SimulatedTrader:
+    """模拟交易器：按当前tick价格成交并扣除滑点，持仓分为代币(token)和计价资产(quote)"""
+
+    def __init__(self, token_balance: float, quote_balance: float, slippage_bps: float = 50):
+        self.balances = {'token': token_balance, 'quote': quote_balance}
+        self.slippage = max(slippage_bps, 0) / 10000
+        self.trades: List[Dict] = []
+
+    def swap(self, timestamp: datetime, action: str, from_asset: str, to_asset: str, amount: float,
+             from_usd_price: float, to_usd_price: float) -> float:
+        """用from_asset换to_asset，返回到账数量"""
+        amount = min(amount, self.balances[from_asset])
+        usd_value = amount * from_usd_price
+        received = usd_value * (1 - self.slippage) / to_usd_price
+        self.balances[from_asset] -= amount
+        self.balances[to_asset] += received
+        self.trades.append({
+            "timestamp": timestamp.isoformat(),
+            "action": action,
+            "amount": amount,
+            "received": received,
+            "price": from_usd_price if action == 'sell' else to_usd_price,
+            "usd_value": usd_value
+        })
+        return received
+
+
+class Backtester:
+    """回测器：把历史价格序列按虚拟时钟逐条回放
+
+    以tick的时间戳作为当前时间，不等待也不访问网络；触发判断使用与ThresholdIndex相同的TokenThresholds，
+    交易比例、最低持仓、累计买入上限、全仓阈值和交易冷却复用PriceMonitor的同一套判断。
+    普通监控的计价资产为SOL，波段监控的计价资产为交易代币，quote_usd_price为其美元价格，回放期间视为不变。
+    交易立即按tick价格成交，不模拟确认延迟、手续费和分片出售的拆单。
+    """
+
+    def __init__(self, settings, monitor_type: str = 'normal', token_balance: float = 0.0,
+                 quote_balance: float = 0.0, quote_usd_price: float = 1.0, slippage_bps: float = 50):
+        if monitor_type not in ('normal', 'swing'):
+            raise ValueError("监控类型必须是 'normal' 或 'swing'")
+        if quote_usd_price <= 0:
+            raise ValueError("计价资产价格必须大于0")
+        self.settings = settings
+        self.monitor_type = monitor_type
+        self.initial_balances = {'token': token_balance, 'quote': quote_balance}
+        self.quote_usd_price = quote_usd_price
+        self.slippage_bps = slippage_bps
+
+    def run(self, points: List[PricePoint]) -> Dict:
+        """回放价格序列，返回交易记录、盈亏和各状态停留的时间"""
+        if not points:
+            raise ValueError("没有可回放的价格数据")
+        started = time.perf_counter()
+        settings = self.settings
+        thresholds = TokenThresholds()
+        if self.monitor_type == 'normal':
+            thresholds.add_monitor(settings.type or 'sell', settings.threshold, settings.id)
+        else:
+            thresholds.add_swing("price" if settings.price_type == "price" else "market_cap",
+                                 settings.sell_threshold, settings.buy_threshold, settings.id)
+        self.trader = SimulatedTrader(self.initial_balances['token'], self.initial_balances['quote'],
+                                      self.slippage_bps)
+        self.cooldown_until = None
+        self.cooldown_action = None
+        self.accumulated_buy_usd = 0.0
+        self.completed_reason = None
+        self.completed_at = None
+        self.skipped_triggers = 0
+        state_seconds = dict.fromkeys(BACKTEST_STATES, 0.0)
+        state = 'monitoring'
+        previous = None
+        for point in points:
+            if previous is not None:
+                state_seconds[state] += (point.timestamp - previous.timestamp).total_seconds()
+            previous = point
+            if self.completed_reason is None:
+                price_info = {'price': point.price, 'market_cap': point.market_cap,
+                              'triggered': thresholds.match(point.price, point.market_cap)}
+                cooldown_action = PriceMonitor._active_cooldown(self.cooldown_until, self.cooldown_action,
+                                                                point.timestamp)
+                if self.monitor_type == 'normal':
+                    self._process_tick(point, price_info, cooldown_action)
+                else:
+                    self._process_swing_tick(point, price_info, cooldown_action)
+            if self.completed_reason is not None:
+                state = 'completed'
+            elif PriceMonitor._active_cooldown(self.cooldown_until, self.cooldown_action, point.timestamp):
+                state = 'cooldown'
+            else:
+                state = 'monitoring'
+
+        first, last = points[0], points[-1]
+        initial_value = self._portfolio_value(self.initial_balances, first.price)
+        final_value = self._portfolio_value(self.trader.balances, last.price)
+        hold_value = self._portfolio_value(self.initial_balances, last.price)
+        return {
+            "monitor_type": self.monitor_type,
+            "ticks": len(points),
+            "start": first.timestamp.isoformat(),
+            "end": last.timestamp.isoformat(),
+            "trades": self.trader.trades,
+            "trade_count": len(self.trader.trades),
+            "initial_balances": dict(self.initial_balances),
+            "final_balances": dict(self.trader.balances),
+            "initial_value_usd": initial_value,
+            "final_value_usd": final_value,
+            "pnl_usd": final_value - initial_value,
+            "pnl_pct": (final_value / initial_value - 1) * 100 if initial_value > 0 else None,
+            "hold_pnl_usd": hold_value - initial_value,
+            "state_seconds": state_seconds,
+            "skipped_triggers": self.skipped_triggers,
+            "completed_reason": self.completed_reason,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    def _portfolio_value(self, balances: Dict[str, float], price: float) -> float:
+        return balances['token'] * price + balances['quote'] * self.quote_usd_price
+
+    def _start_cooldown(self, point: PricePoint, action: str):
+        self.cooldown_until = point.timestamp + timedelta(seconds=TRADE_COOLDOWN_SECONDS)
+        self.cooldown_action = action
+
+    def _complete(self, point: PricePoint, reason: str):
+        self.completed_reason = reason
+        self.completed_at = point.timestamp
+
+    def _process_tick(self, point: PricePoint, price_info: Dict, cooldown_action: Optional[str]):
+        """对应PriceMonitor._process_tick"""
+        side = 'buy' if self.settings.type == 'buy' else 'sell'
+        if not PriceMonitor._is_triggered(price_info, side, self.settings.id):
+            return
+        if cooldown_action == side:
+            self.skipped_triggers += 1
+            return
+        if side == 'buy':
+            self._execute_buy(point)
+        else:
+            self._execute_sell(point)
+
+    def _execute_sell(self, point: PricePoint):
+        """对应PriceMonitor._execute_sell_trigger与_handle_sell_monitor"""
+        settings = self.settings
+        token_balance = self.trader.balances['token']
+        if token_balance <= 0:
+            if not getattr(settings, 'pre_sniper_mode', False):
+                self._complete(point, "代币余额为0")
+            return
+        sell_percentage = PriceMonitor._actual_sell_percentage(
+            settings.execution_mode, settings.sell_percentage, getattr(settings, 'minimum_hold_value', 50.0),
+            token_balance, point.price)
+        self.trader.swap(point.timestamp, 'sell', 'token', 'quote', token_balance * sell_percentage,
+                         point.price, self.quote_usd_price)
+        self._start_cooldown(point, 'sell')
+        if settings.execution_mode == "single":
+            self._complete(point, "单次执行模式完成")
+        elif sell_percentage >= 1.0:
+            self._complete(point, "已100%出售完毕")
+
+    def _execute_buy(self, point: PricePoint):
+        """对应PriceMonitor._execute_buy_trigger与_handle_buy_monitor"""
+        settings = self.settings
+        sol_balance = self.trader.balances['quote']
+        if sol_balance <= 0 or PriceMonitor._buyable_sol(sol_balance, settings.sell_percentage) <= 0:
+            self._complete(point, "SOL余额不足")
+            return
+        buy_percentage = PriceMonitor._actual_buy_percentage(
+            settings.execution_mode, settings.sell_percentage, getattr(settings, 'minimum_hold_value', 0.0),
+            sol_balance, self.quote_usd_price)
+        buy_usd = sol_balance * buy_percentage * self.quote_usd_price
+        if PriceMonitor._exceeds_max_buy(getattr(settings, 'max_buy_amount', 0.0), self.accumulated_buy_usd, buy_usd):
+            self._complete(point, "累计买入金额已达上限")
+            return
+        self.trader.swap(point.timestamp, 'buy', 'quote', 'token',
+                         PriceMonitor._buyable_sol(sol_balance, buy_percentage), self.quote_usd_price, point.price)
+        self.accumulated_buy_usd += buy_usd
+        self._start_cooldown(point, 'buy')
+        if settings.execution_mode == "single" or buy_percentage >= 1.0:
+            self._complete(point, "买入任务完成")
+
+    def _process_swing_tick(self, point: PricePoint, price_info: Dict, cooldown_action: Optional[str]):
+        """对应PriceMonitor._process_swing_tick与波段买卖的执行"""
+        settings = self.settings
+        if PriceMonitor._is_triggered(price_info, 'swing_sell', settings.id):
+            if cooldown_action == 'sell':
+                self.skipped_triggers += 1
+                return
+            watch_balance = self.trader.balances['token']
+            if watch_balance <= 0:
+                return
+            sell_percentage = PriceMonitor._swing_trade_percentage(
+                settings.sell_percentage, settings.all_in_threshold, watch_balance, point.price)
+            self.trader.swap(point.timestamp, 'sell', 'token', 'quote', watch_balance * sell_percentage,
+                             point.price, self.quote_usd_price)
+            self._start_cooldown(point, 'sell')
+        elif PriceMonitor._is_triggered(price_info, 'swing_buy', settings.id):
+            if cooldown_action == 'buy':
+                self.skipped_triggers += 1
+                return
+            trade_balance = self.trader.balances['quote']
+            if trade_balance <= 0:
+                return
+            buy_percentage = PriceMonitor._swing_trade_percentage(
+                settings.buy_percentage, settings.all_in_threshold, trade_balance, self.quote_usd_price)
+            self.trader.swap(point.timestamp, 'buy', 'quote', 'token', trade_balance * buy_percentage,
+                             self.quote_usd_price, point.price)
+            self._start_cooldown(point, 'buy')
+
+
+def backtest_record(record_id: int, monitor_type: str = 'normal', overrides: Optional[Dict] = None,
+                    csv_text: Optional[str] = None, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, token_balance: float = 0.0, quote_balance: float = 0.0,
+                    quote_usd_price: float = 1.0, slippage_bps: float = 50) -> Dict:
+    """用监控记录的配置（可覆盖部分参数）回测，价格序列来自导入的CSV，或该记录的K线与tick日志"""
+    model = MonitorRecord if monitor_type == 'normal' else SwingMonitorRecord
+    db = SessionLocal()
+    try:
+        record = db.query(model).filter(model.id == record_id).first()
+        if not record:
+            raise ValueError("监控记录不存在")
+        settings = backtest_settings(record, monitor_type, overrides)
+    finally:
+        db.close()
+    if csv_text:
+        points = load_csv(csv_text)
+    else:
+        token_address = settings.token_address if monitor_type == 'normal' else settings.watch_token_address
+        points = load_history(record_id, monitor_type, token_address, start, end)
+    backtester = Backtester(settings, monitor_type, token_balance, quote_balance, quote_usd_price, slippage_bps)
+    return backtester.run(points)
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
+from spl.token.instructions import get_associated_token_address
+
+from config.config_manager import ConfigManager
+from services.http_client import HttpClient
+
+
+class WalletBalances:
+    """单个钱包某一时刻的余额快照"""
+
+    def __init__(self, sol_balance: float, token_balances: Dict[str, float]):
+        self.sol_balance = sol_balance
+        self.token_balances = token_balances
+        self.fetched_at = time.time()
+
+    def get_token_balance(self, mint: str) -> float:
+        return self.token_balances.get(mint, 0.0)
+
+
+class BalanceCache:
+    """钱包余额快照缓存 - 单例模式
+
+    一次JSON-RPC批量请求同时取回钱包的SOL余额以及SPL Token、Token-2022下的全部代币账户（jsonParsed），
+    在BALANCE_CACHE_TTL_MS内所有余额读取都直接使用快照；钱包交易确认后立即失效。
+    同一钱包并发读取时只发起一次请求。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._snapshots: Dict[str, WalletBalances] = {}
+            self._wallet_locks: Dict[str, threading.Lock] = {}
+            self._locks_lock = threading.Lock()
+            self.fetch_count = 0
+            self.hit_count = 0
+            self.refresh_config()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新快照有效期配置"""
+        self.ttl = max(ConfigManager.get_float('BALANCE_CACHE_TTL_MS', 2000), 0) / 1000
+        logging.info(f"BalanceCache配置已刷新，快照有效期: {self.ttl * 1000:.0f}ms")
+
+    def get(self, rpc_url: str, owner: Pubkey) -> WalletBalances:
+        """获取钱包余额快照，过期时重新拉取"""
+        key = str(owner)
+        snapshot = self._snapshots.get(key)
+        if snapshot and time.time() - snapshot.fetched_at <= self.ttl:
+            self.hit_count += 1
+            return snapshot
+        with self._wallet_lock(key):
+            # 等锁期间可能已被其他线程刷新
+            snapshot = self._snapshots.get(key)
+            if snapshot and time.time() - snapshot.fetched_at <= self.ttl:
+                self.hit_count += 1
+                return snapshot
+            snapshot = self._fetch(rpc_url, owner)
+            self._snapshots[key] = snapshot
+            return snapshot
+
+    def invalidate(self, owner: Pubkey):
+        """钱包交易确认后调用，下一次读取重新拉取余额"""
+        self._snapshots.pop(str(owner), None)
+
+    def _wallet_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            lock = self._wallet_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._wallet_locks[key] = lock
+            return lock
+
+    def _fetch(self, rpc_url: str, owner: Pubkey) -> WalletBalances:
+        """一次HTTP往返取回SOL余额和两个代币程序下的全部代币账户"""
+        owner_str = str(owner)
+        parsed = {"encoding": "jsonParsed", "commitment": "confirmed"}
+        payload = [
+            {"jsonrpc": "2.0", "id": 0, "method": "getBalance", "params": [owner_str, {"commitment": "confirmed"}]},
+            {"jsonrpc": "2.0", "id": 1, "method": "getTokenAccountsByOwner",
+             "params": [owner_str, {"programId": str(TOKEN_PROGRAM_ID)}, parsed]},
+            {"jsonrpc": "2.0", "id": 2, "method": "getTokenAccountsByOwner",
+             "params": [owner_str, {"programId": str(TOKEN_2022_PROGRAM_ID)}, parsed]},
+        ]
+        response = HttpClient().post(rpc_url, json=payload)
+        response.raise_for_status()
+        results = {item.get("id"): item for item in response.json()}
+        for item in results.values():
+            if "error" in item:
+                raise Exception(f"获取钱包余额失败: {item['error']}")
+        self.fetch_count += 1
+
+        sol_balance = results[0]["result"]["value"] / 1e9
+        token_balances: Dict[str, float] = {}
+        for request_id, program_id in ((1, TOKEN_PROGRAM_ID), (2, TOKEN_2022_PROGRAM_ID)):
+            for account in results[request_id]["result"]["value"]:
+                info = account["account"]["data"]["parsed"]["info"]
+                mint = info["mint"]
+                token_amount = info["tokenAmount"]
+                amount = float(token_amount["amount"]) / (10 ** token_amount["decimals"])
+                if mint not in token_balances:
+                    token_balances[mint] = amount
+                    continue
+                # 同一代币有多个账户时以关联代币账户（ATA）为准，交易使用的也是ATA
+                ata = str(get_associated_token_address(owner, Pubkey.from_string(mint), program_id))
+                if account["pubkey"] == ata:
+                    token_balances[mint] = amount
+        return WalletBalances(sol_balance, token_balances)
+
+    def get_stats(self) -> Dict:
+        """获取快照数量与命中统计"""
+        return {
+            "wallets": len(self._snapshots),
+            "fetches": self.fetch_count,
+            "hits": self.hit_count,
+            "ttl_ms": int(self.ttl * 1000)
+        }
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solders.hash import Hash
+
+from config.config_manager import ConfigManager
+
+
+class BlockhashSnapshot(NamedTuple):
+    """一次获取到的区块哈希及其最后有效区块高度，作为整体替换，读取方不会拿到新旧混合的值"""
+    blockhash: Hash
+    last_valid_block_height: int
+    fetched_at: float
+
+
+class _BlockhashEntry:
+    """单个RPC节点的最新区块哈希"""
+
+    def __init__(self, client: Client):
+        self.client = client
+        self.latest: Optional[BlockhashSnapshot] = None
+        self.last_used = time.time()
+        self.refresh_count = 0
+
+    def refresh(self) -> BlockhashSnapshot:
+        value = self.client.get_latest_blockhash().value
+        latest = BlockhashSnapshot(value.blockhash, value.last_valid_block_height, time.time())
+        self.latest = latest
+        self.refresh_count += 1
+        return latest
+
+
+class BlockhashCache:
+    """区块哈希缓存 - 单例模式
+
+    后台线程按BLOCKHASH_REFRESH_MS为每个使用中的RPC节点预取最新区块哈希，
+    构建交易时直接读取内存，省去交易关键路径上的一次RPC往返。
+    超过BLOCKHASH_MAX_AGE_SECONDS未刷新成功的缓存视为过期，回退为同步获取；
+    超过BLOCKHASH_IDLE_SECONDS没有交易使用的节点暂停预取。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._entries: Dict[str, _BlockhashEntry] = {}
+            self._entries_lock = threading.Lock()
+            self._wakeup = threading.Event()
+            self.refresh_config()
+            self._thread = threading.Thread(target=self._run, name="blockhash-prefetcher", daemon=True)
+            self._thread.start()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新预取配置，刷新间隔限制在400ms到2s之间"""
+        self.refresh_interval = min(max(ConfigManager.get_float('BLOCKHASH_REFRESH_MS', 1000), 400), 2000) / 1000
+        self.max_age = ConfigManager.get_float('BLOCKHASH_MAX_AGE_SECONDS', 20)
+        self.idle_seconds = ConfigManager.get_float('BLOCKHASH_IDLE_SECONDS', 600)
+        logging.info(f"BlockhashCache配置已刷新，预取间隔: {self.refresh_interval * 1000:.0f}ms")
+
+    def get(self, rpc_url: str, client: Client) -> BlockhashSnapshot:
+        """获取RPC节点的最新区块哈希和最后有效区块高度，缓存可用时不发起RPC请求"""
+        with self._entries_lock:
+            entry = self._entries.get(rpc_url)
+            if entry is None:
+                entry = _BlockhashEntry(client)
+                self._entries[rpc_url] = entry
+            entry.last_used = time.time()
+        latest = entry.latest
+        if latest is None or time.time() - latest.fetched_at > self.max_age:
+            # 首次使用或缓存过期时同步获取，并唤醒后台线程开始预取
+            latest = entry.refresh()
+            self._wakeup.set()
+        return latest
+
+    def invalidate(self, rpc_url: str):
+        """交易返回blockhash not found时调用，下次读取会同步获取新的区块哈希"""
+        entry = self._entries.get(rpc_url)
+        if entry:
+            entry.latest = None
+            logging.info(f"区块哈希缓存已失效: {rpc_url}")
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self._entries_lock:
+                active = [entry for entry in self._entries.values() if now - entry.last_used <= self.idle_seconds]
+            if not active:
+                # 没有使用中的节点时等待下一次交易唤醒
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            for entry in active:
+                try:
+                    entry.refresh()
+                except Exception as e:
+                    logging.debug(f"预取区块哈希失败: {e}")
+            time.sleep(self.refresh_interval)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各RPC节点的缓存状态"""
+        now = time.time()
+        with self._entries_lock:
+            entries = dict(self._entries)
+        stats = {}
+        for rpc_url, entry in entries.items():
+            latest = entry.latest
+            stats[rpc_url] = {
+                "blockhash": str(latest.blockhash) if latest else None,
+                "last_valid_block_height": latest.last_valid_block_height if latest else None,
+                "age_ms": int((now - latest.fetched_at) * 1000) if latest else None,
+                "refresh_count": entry.refresh_count,
+                "active": now - entry.last_used <= self.idle_seconds
+            }
+        return stats
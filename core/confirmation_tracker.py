@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config.config_manager import ConfigManager
+from core.tx_broadcaster import TransactionBroadcaster
+
+# getSignatureStatuses单次最多查询的签名数
+MAX_SIGNATURES_PER_REQUEST = 256
+
+
+class PendingTransaction(Future):
+    """已提交、等待确认的交易，确认后结果为交易签名，失败或过期时为异常"""
+
+    def __init__(self, signature: str, endpoints: List[str], last_valid_block_height: int = 0,
+                 encoded: Optional[str] = None):
+        super().__init__()
+        self.signature = signature
+        self.endpoints = endpoints
+        self.last_valid_block_height = last_valid_block_height
+        # 有交易内容时确认前会定期重新广播
+        self.encoded = encoded
+        self.submitted_at = time.monotonic()
+        self.last_broadcast = self.submitted_at
+
+
+class ConfirmationTracker:
+    """交易确认跟踪器 - 单例模式
+
+    调用方提交交易后立即拿到PendingTransaction返回，不再在交易线程里等待确认。
+    后台线程每隔TX_STATUS_POLL_MS用getSignatureStatuses批量查询全部待确认签名（每次最多256个），
+    每隔TX_REBROADCAST_MS重新广播尚未确认的交易，区块高度超过交易的最后有效区块高度后判定过期。
+    确认结果在回调线程池中设置，写交易日志、发通知等回调不会拖慢轮询。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._pending: Dict[str, PendingTransaction] = {}
+            self._pending_lock = threading.Lock()
+            self._wakeup = threading.Event()
+            self._callback_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tx-confirmation-callback")
+            self.confirmed_count = 0
+            self.failed_count = 0
+            self.status_requests = 0
+            self.refresh_config()
+            self._thread = threading.Thread(target=self._run, name="tx-confirmation-tracker", daemon=True)
+            self._thread.start()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新轮询、重新广播与超时配置"""
+        self.status_interval = max(ConfigManager.get_float('TX_STATUS_POLL_MS', 400), 100) / 1000
+        self.rebroadcast_interval = max(ConfigManager.get_float('TX_REBROADCAST_MS', 2000), 200) / 1000
+        self.confirm_timeout = max(ConfigManager.get_float('TX_CONFIRM_TIMEOUT_SECONDS', 60), 5)
+        logging.info(f"ConfirmationTracker配置已刷新，状态轮询间隔: {self.status_interval * 1000:.0f}ms，"
+                     f"重新广播间隔: {self.rebroadcast_interval * 1000:.0f}ms")
+
+    def submit(self, transaction, last_valid_block_height: int = 0,
+               endpoints: Optional[List[str]] = None) -> PendingTransaction:
+        """广播已签名交易并开始跟踪确认，任一节点接受后立即返回；所有节点都拒绝时抛出异常"""
+        signature, encoded, endpoints = TransactionBroadcaster().send(transaction, endpoints)
+        return self._add(PendingTransaction(signature, endpoints, last_valid_block_height, encoded))
+
+    def track(self, signature: str, last_valid_block_height: int = 0) -> PendingTransaction:
+        """跟踪已通过其他方式发送的交易，只查询确认状态不重新广播"""
+        return self._add(PendingTransaction(signature, TransactionBroadcaster().endpoints, last_valid_block_height))
+
+    def _add(self, pending: PendingTransaction) -> PendingTransaction:
+        with self._pending_lock:
+            existing = self._pending.get(pending.signature)
+            if existing is not None:
+                return existing
+            self._pending[pending.signature] = pending
+        self._wakeup.set()
+        return pending
+
+    def _run(self):
+        while True:
+            if not self._pending:
+                # 没有待确认交易时等待下一次提交唤醒
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            time.sleep(self.status_interval)
+            try:
+                self._poll()
+            except Exception as e:
+                logging.error(f"查询交易确认状态失败: {e}")
+
+    def _poll(self):
+        with self._pending_lock:
+            pending = list(self._pending.values())
+        for start in range(0, len(pending), MAX_SIGNATURES_PER_REQUEST):
+            self._check_statuses(pending[start:start + MAX_SIGNATURES_PER_REQUEST])
+
+        now = time.monotonic()
+        due = [item for item in pending
+               if not item.done() and item.signature in self._pending
+               and now - item.last_broadcast >= self.rebroadcast_interval]
+        if not due:
+            return
+        block_height = self._block_height(due) if any(item.last_valid_block_height for item in due) else None
+        broadcaster = TransactionBroadcaster()
+        for item in due:
+            if self._expired(item, block_height, now):
+                self._resolve(item, error=f"交易在区块哈希过期前未确认: {item.signature}")
+            elif item.encoded:
+                broadcaster.rebroadcast(item.encoded, item.endpoints)
+            item.last_broadcast = now
+
+    def _check_statuses(self, chunk: List[PendingTransaction]):
+        """一次请求查询一批签名，多个节点并发查询，最先报告确认的节点记为上链节点"""
+        broadcaster = TransactionBroadcaster()
+        endpoints = list(dict.fromkeys(url for item in chunk for url in item.endpoints))
+        signatures = [item.signature for item in chunk]
+        self.status_requests += 1
+        for url, ok, result in broadcaster.fan_out(endpoints, 'getSignatureStatuses', [signatures]):
+            if not ok:
+                continue
+            for item, status in zip(chunk, result.get('value') or []):
+                if not status or status.get('confirmationStatus') not in ('confirmed', 'finalized'):
+                    continue
+                if item.signature not in self._pending:
+                    continue
+                if status.get('err'):
+                    self._resolve(item, error=f"交易执行失败: {status['err']}")
+                else:
+                    broadcaster.record_landing(url, (time.monotonic() - item.submitted_at) * 1000)
+                    self._resolve(item)
+            if not any(item.signature in self._pending for item in chunk):
+                break
+
+    @staticmethod
+    def _block_height(items: List[PendingTransaction]) -> Optional[int]:
+        endpoints = list(dict.fromkeys(url for item in items for url in item.endpoints))
+        for _, ok, result in TransactionBroadcaster().fan_out(endpoints, 'getBlockHeight',
+                                                              [{"commitment": "confirmed"}]):
+            if ok:
+                return result
+        return None
+
+    def _expired(self, item: PendingTransaction, block_height: Optional[int], now: float) -> bool:
+        """区块高度超过交易的最后有效区块高度，或没有高度信息时超过确认超时"""
+        if item.last_valid_block_height and block_height is not None:
+            return block_height > item.last_valid_block_height
+        return now - item.submitted_at > self.confirm_timeout
+
+    def _resolve(self, item: PendingTransaction, error: Optional[str] = None):
+        with self._pending_lock:
+            if self._pending.pop(item.signature, None) is None:
+                return
+        if error:
+            self.failed_count += 1
+            logging.warning(error)
+            self._callback_executor.submit(item.set_exception, Exception(error))
+        else:
+            self.confirmed_count += 1
+            logging.info(f"交易已确认: {item.signature}，耗时: {time.monotonic() - item.submitted_at:.1f}秒")
+            self._callback_executor.submit(item.set_result, item.signature)
+
+    def get_stats(self) -> Dict:
+        """获取待确认交易数量与确认统计"""
+        now = time.monotonic()
+        with self._pending_lock:
+            pending = list(self._pending.values())
+        return {
+            "pending": len(pending),
+            "oldest_pending_seconds": round(max((now - item.submitted_at for item in pending), default=0), 1),
+            "confirmed": self.confirmed_count,
+            "failed": self.failed_count,
+            "status_requests": self.status_requests
+        }
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from config.config_manager import ConfigManager
+from services.http_client import HttpClient
+
+# 交易类型：普通监控、波段监控、手动交易与转账，及各类型默认的百分位数和整笔优先费上限（lamports）
+FEE_TYPES = ('normal', 'swing', 'manual')
+DEFAULT_PERCENTILES = {'normal': 75, 'swing': 75, 'manual': 50}
+DEFAULT_CAPS = {'normal': 2000000, 'swing': 1000000, 'manual': 500000}
+# 最多保留的采样窗口数量（按代币mint）
+MAX_FEE_WINDOWS = 256
+
+
+class _FeeWindow:
+    """一个代币最近若干slot的优先费样本，按slot去重；accounts为最近一次交易涉及的可写账户，采样时使用"""
+
+    def __init__(self, accounts: List[str]):
+        self.fees: Dict[int, int] = {}
+        self.accounts = accounts
+        self.sampled_at = 0.0
+        self.refreshing = False
+
+    def merge(self, samples: List[Dict], window_slots: int):
+        for sample in samples:
+            self.fees[sample['slot']] = sample['prioritizationFee']
+        if self.fees:
+            newest = max(self.fees)
+            self.fees = {slot: fee for slot, fee in self.fees.items() if slot > newest - window_slots}
+        self.sampled_at = time.time()
+
+    def percentile(self, percentile: float) -> int:
+        """最近邻秩百分位数，没有样本时为0"""
+        if not self.fees:
+            return 0
+        values = sorted(self.fees.values())
+        index = min(max(int(round(percentile / 100 * len(values))) - 1, 0), len(values) - 1)
+        return values[index]
+
+
+class PriorityFeeEstimator:
+    """优先费估算器 - 单例模式
+
+    采样窗口按交易的主账户（代币mint，accounts的第一个）分组，同一代币经过不同池子的路由共用一个窗口；
+    用最近一次交易涉及的可写账户调用getRecentPrioritizationFees采样，每个窗口保留最近PRIORITY_FEE_WINDOW_SLOTS个slot。
+    超过PRIORITY_FEE_SAMPLE_SECONDS的窗口在后台线程重新采样，估算直接使用当前窗口，不在交易路径上等待RPC。
+    按交易类型取配置的百分位数作为每个计算单元的价格（微lamports），并保证整笔交易的优先费不超过该类型的上限。
+    采样失败时沿用旧窗口，没有样本时不加优先费（报价预热会在触发前建立窗口）。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._windows: "OrderedDict[str, _FeeWindow]" = OrderedDict()
+            self._windows_lock = threading.Lock()
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fee-sampler")
+            self.sample_count = 0
+            self.refresh_config()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新采样窗口以及各交易类型的百分位数和上限"""
+        self.rpc_url = ConfigManager.get_str('RPC_URL', 'https://api.mainnet-beta.solana.com')
+        self.window_slots = max(ConfigManager.get_int('PRIORITY_FEE_WINDOW_SLOTS', 300), 1)
+        self.sample_interval = max(ConfigManager.get_float('PRIORITY_FEE_SAMPLE_SECONDS', 10), 1)
+        self.percentiles = {fee_type: min(max(ConfigManager.get_float(
+            f'PRIORITY_FEE_PERCENTILE_{fee_type.upper()}', DEFAULT_PERCENTILES[fee_type]), 0), 100)
+            for fee_type in FEE_TYPES}
+        self.caps = {fee_type: max(ConfigManager.get_int(
+            f'PRIORITY_FEE_CAP_LAMPORTS_{fee_type.upper()}', DEFAULT_CAPS[fee_type]), 0)
+            for fee_type in FEE_TYPES}
+        logging.info(f"PriorityFeeEstimator配置已刷新，百分位数: {self.percentiles}，上限(lamports): {self.caps}")
+
+    def estimate(self, accounts: List[str], compute_units: int, fee_type: str = 'manual') -> int:
+        """估算每个计算单元的价格（微lamports），整笔优先费不超过该类型的上限"""
+        fee_type = fee_type if fee_type in FEE_TYPES else 'manual'
+        window = self._window(accounts)
+        price = window.percentile(self.percentiles[fee_type])
+        if compute_units > 0:
+            price = min(price, self.caps[fee_type] * 1_000_000 // compute_units)
+        return price
+
+    def estimate_total_lamports(self, accounts: List[str], compute_units: int, fee_type: str = 'manual') -> int:
+        """按预估计算单元换算整笔交易的优先费（lamports）"""
+        return self.estimate(accounts, compute_units, fee_type) * compute_units // 1_000_000
+
+    def _window(self, accounts: List[str]) -> _FeeWindow:
+        """取主账户的窗口并记下本次的可写账户，窗口过期时提交后台采样，立即返回当前窗口"""
+        accounts = list(dict.fromkeys(account for account in accounts if account))
+        key = accounts[0] if accounts else ''
+        with self._windows_lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = _FeeWindow(accounts)
+                self._windows[key] = window
+                while len(self._windows) > MAX_FEE_WINDOWS:
+                    self._windows.popitem(last=False)
+            else:
+                window.accounts = accounts
+                self._windows.move_to_end(key)
+            refresh = not window.refreshing and time.time() - window.sampled_at > self.sample_interval
+            if refresh:
+                window.refreshing = True
+        if refresh and accounts:
+            self._executor.submit(self._refresh, window)
+        elif refresh:
+            window.refreshing = False
+        return window
+
+    def _refresh(self, window: _FeeWindow):
+        try:
+            window.merge(self._sample(window.accounts), self.window_slots)
+        except Exception as e:
+            # 采样失败时沿用旧窗口，避免反复请求
+            window.sampled_at = time.time()
+            logging.debug(f"采样优先费失败: {e}")
+        finally:
+            window.refreshing = False
+
+    def _sample(self, accounts: List[str]) -> List[Dict]:
+        # getRecentPrioritizationFees最多接受128个账户
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "getRecentPrioritizationFees", "params": [accounts[:128]]}
+        response = HttpClient().post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        if "error" in result:
+            raise Exception(result["error"])
+        self.sample_count += 1
+        return result.get("result") or []
+
+    def get_stats(self) -> Dict:
+        """获取窗口数量与各类型当前配置"""
+        with self._windows_lock:
+            windows = len(self._windows)
+        return {
+            "windows": windows,
+            "samples": self.sample_count,
+            "window_slots": self.window_slots,
+            "percentiles": self.percentiles,
+            "caps_lamports": self.caps
+        }
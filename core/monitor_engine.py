@@ -0,0 +1,55 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine
+
+from config.config_manager import ConfigManager
+
+
+class MonitorEngine:
+    """监控调度引擎 - 单例模式
+
+    所有普通监控和波段监控都作为轻量级任务运行在同一个事件循环上，
+    价格获取走异步HTTP；数据库、RPC、交易等阻塞操作交给固定大小的工作线程池，
+    监控数量不再受线程数限制。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            worker_threads = ConfigManager.get_int('MONITOR_WORKER_THREADS', 32)
+            self.executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="monitor-worker")
+            self.loop = asyncio.new_event_loop()
+            self.loop.set_default_executor(self.executor)
+            self._thread = threading.Thread(target=self._run_loop, name="monitor-engine", daemon=True)
+            self._thread.start()
+            logging.info(f"监控调度引擎已启动，阻塞任务工作线程数: {worker_threads}")
+            self._initialized = True
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """把协程提交到引擎事件循环运行，可从任意线程调用"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """在工作线程池中执行阻塞函数，避免阻塞事件循环"""
+        return await self.loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
@@ -1,15 +1,33 @@
+import asyncio
+import functools
 import logging
+import random
 import threading
 import time
-from datetime import datetime
-from typing import Dict
-
-from core.trader import SolanaTrader
-from database.models import MonitorRecord, MonitorLog, SwingMonitorRecord, SessionLocal
-from services import TokenAPI
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from core.confirmation_tracker import PendingTransaction
+from core.monitor_engine import MonitorEngine
+from core.quote_prewarmer import QuotePrewarmer
+from core.sliced_seller import SlicedSeller, SlicePlan, SliceExecution
+from core.trader import SolanaTrader, SOL_MINT
+from core.trader_registry import TraderRegistry
+from core.wallet_queue import WalletTradeQueue
+from config.config_manager import ConfigManager
+from database.models import MonitorRecord, SwingMonitorRecord, SessionLocal
+from services import TokenAPI, PriceBus, ThresholdIndex
+from services.log_writer import MonitorLogWriter
+from services.monitor_state import MonitorStateStore, SwingMonitorSnapshot
 from services.notifier import Notifier
 from utils import normalize_sol_address
 
+# 交易提交后的冷却时间（秒），冷却期间跳过同方向的触发
+TRADE_COOLDOWN_SECONDS = 60
+# 全部买入时保留的SOL，用作token账户的租费
+SOL_RENT_RESERVE = 0.0021
+
 
 class PriceMonitor:
     """价格监控器 - 单例模式"""
@@ -28,20 +46,20 @@ class PriceMonitor:
     def __init__(self):
         # 防止重复初始化
         if self._initialized:
-            logging.debug("PriceMonitor 已经初始化，跳过重复初始化")
+            self._retry_recovery()
             return
 
         with self._lock:
             if self._initialized:
-                logging.debug("PriceMonitor 已经初始化，跳过重复初始化")
+                self._retry_recovery()
                 return
 
             # 普通监控状态
-            self.running_monitors: Dict[int, threading.Thread] = {}
+            self.running_monitors: Dict[int, Future] = {}
             self.monitor_states: Dict[int, bool] = {}
 
             # 波段监控状态
-            self.running_swing_monitors: Dict[int, threading.Thread] = {}
+            self.running_swing_monitors: Dict[int, Future] = {}
             self.swing_monitor_states: Dict[int, bool] = {}
 
             # 为每个token地址维护上一次的市值（而不是按record_id）
@@ -51,84 +69,104 @@ class PriceMonitor:
 
             # 防重复执行标志
             self._auto_recovery_done = False
+            self._recovery_attempt_lock = threading.Lock()
+            # 启动恢复进度：等待首个价格tick的监控，全部收到后记录耗时
+            self._recovery_lock = threading.Lock()
+            self._recovery_pending = set()
+            self._recovery_stats = {"total": 0, "ready": 0, "started_at": None, "completed_at": None,
+                                    "seconds_to_monitoring": None}
 
             # 启动时自动恢复监控任务
             self._auto_recover_monitors()
 
             self._initialized = True
 
+    def _retry_recovery(self):
+        """上次自动恢复失败（如数据库暂时不可用）时，再次获取实例会重新恢复"""
+        if self._auto_recovery_done:
+            logging.debug("PriceMonitor 已经初始化，跳过重复初始化")
+            return
+        with self._recovery_attempt_lock:
+            if not self._auto_recovery_done:
+                logging.info("上次自动恢复监控任务失败，重新尝试恢复")
+                self._auto_recover_monitors()
+
     def _auto_recover_monitors(self):
-        """启动时自动恢复所有状态为monitoring的监控任务"""
+        """启动时自动恢复所有状态为monitoring的监控任务
+
+        两类监控各一次查询取出全部记录，启动通知按webhook合并成一条汇总消息，
+        每个监控任务在RECOVERY_JITTER_SECONDS秒内随机延迟后再开始，避免所有监控在同一秒请求价格。
+        """
         # 防重复执行
         if self._auto_recovery_done:
             logging.debug("自动恢复已完成，跳过重复执行")
             return
 
         logging.info("正在自动恢复监控任务...")
+        started_at = time.time()
+        jitter = max(ConfigManager.get_float('RECOVERY_JITTER_SECONDS', 10), 0)
         db = SessionLocal()
         try:
-            # 恢复普通监控任务
-            monitoring_records = db.query(MonitorRecord).filter(
-                MonitorRecord.status == "monitoring"
-            ).all()
-
+            # 重试恢复时跳过上次已经启动的监控
+            monitoring_records = [
+                record for record in db.query(MonitorRecord).filter(MonitorRecord.status == "monitoring")
+                if record.id not in self.running_monitors]
+            swing_monitoring_records = [
+                record for record in db.query(SwingMonitorRecord).filter(SwingMonitorRecord.status == "monitoring")
+                if record.id not in self.running_swing_monitors]
+
+            with self._recovery_lock:
+                self._recovery_pending = {('normal', record.id) for record in monitoring_records} | {
+                    ('swing', record.id) for record in swing_monitoring_records}
+                self._recovery_stats = {"total": len(self._recovery_pending), "ready": 0, "started_at": started_at,
+                                        "completed_at": None, "seconds_to_monitoring": None}
+
+            # 按webhook汇总恢复的监控名称，每个webhook只发一条启动通知
+            digests: Dict[str, list] = {}
+            failed = False
+            engine = MonitorEngine()
             recovered_count = 0
             for record in monitoring_records:
                 try:
-                    # 创建通知器并发送启动通知
-                    notifier = Notifier(webhook_url=record.webhook_url)
-                    notifier.send_startup_notification(record.name)
-
-                    # 启动监控线程
                     self.monitor_states[record.id] = True
-                    thread = threading.Thread(
-                        target=self._monitor_loop,
-                        args=(record.id,),
-                        daemon=True
-                    )
-                    thread.start()
-                    self.running_monitors[record.id] = thread
+                    self.running_monitors[record.id] = engine.submit(
+                        self._monitor_loop(record.id, start_delay=random.uniform(0, jitter)))
+                    digests.setdefault(record.webhook_url, []).append(f"普通监控：{record.name}")
                     recovered_count += 1
-                    logging.info(f"已恢复普通监控任务: {record.name} (ID: {record.id})")
                 except Exception as e:
                     logging.error(f"恢复普通监控任务失败 {record.name} (ID: {record.id}): {e}")
                     # 将失败的任务状态设为stopped
                     record.status = "stopped"
-                    db.commit()
-
-            # 恢复波段监控任务
-            swing_monitoring_records = db.query(SwingMonitorRecord).filter(
-                SwingMonitorRecord.status == "monitoring"
-            ).all()
+                    failed = True
+                    self._recovery_ready('normal', record.id)
 
             swing_recovered_count = 0
             for record in swing_monitoring_records:
                 try:
-                    # 创建通知器并发送启动通知
-                    notifier = Notifier(webhook_url=record.webhook_url)
-                    notifier.send_startup_notification(record.name)
-
-                    # 启动波段监控线程
                     self.swing_monitor_states[record.id] = True
-                    thread = threading.Thread(
-                        target=self._swing_monitor_loop,
-                        args=(record.id,),
-                        daemon=True
-                    )
-                    thread.start()
-                    self.running_swing_monitors[record.id] = thread
+                    self.running_swing_monitors[record.id] = engine.submit(
+                        self._swing_monitor_loop(record.id, start_delay=random.uniform(0, jitter)))
+                    digests.setdefault(record.webhook_url, []).append(f"波段监控：{record.name}")
                     swing_recovered_count += 1
-                    logging.info(f"已恢复波段监控任务: {record.name} (ID: {record.id})")
                 except Exception as e:
                     logging.error(f"恢复波段监控任务失败 {record.name} (ID: {record.id}): {e}")
                     # 将失败的任务状态设为stopped
                     record.status = "stopped"
-                    db.commit()
+                    failed = True
+                    self._recovery_ready('swing', record.id)
+            if failed:
+                db.commit()
+
+            for webhook_url, names in digests.items():
+                Notifier(webhook_url=webhook_url).send_message(
+                    f"🚀 监控系统启动，已恢复 {len(names)} 个监控任务",
+                    "币价监控系统已重启，以下监控任务已恢复，开始监控市值变化...\n" + "\n".join(names))
 
             total_recovered = recovered_count + swing_recovered_count
             if total_recovered > 0:
                 logging.info(
-                    f"成功恢复 {recovered_count} 个普通监控任务，{swing_recovered_count} 个波段监控任务，共 {total_recovered} 个")
+                    f"成功恢复 {recovered_count} 个普通监控任务，{swing_recovered_count} 个波段监控任务，共 {total_recovered} 个，"
+                    f"将在 {jitter:.0f} 秒内错峰开始")
             else:
                 logging.info("没有需要恢复的监控任务")
 
@@ -140,6 +178,26 @@ class PriceMonitor:
         finally:
             db.close()
 
+    def _recovery_ready(self, monitor_type: str, record_id: int):
+        """恢复的监控收到首个价格tick或提前退出，全部就绪时记录从启动到全部进入监控的耗时"""
+        with self._recovery_lock:
+            key = (monitor_type, record_id)
+            if key not in self._recovery_pending:
+                return
+            self._recovery_pending.discard(key)
+            stats = self._recovery_stats
+            stats["ready"] += 1
+            if self._recovery_pending:
+                return
+            stats["completed_at"] = time.time()
+            stats["seconds_to_monitoring"] = round(stats["completed_at"] - stats["started_at"], 2)
+        logging.info(f"✅ {stats['total']} 个恢复的监控任务已全部进入监控，耗时 {stats['seconds_to_monitoring']} 秒")
+
+    def get_recovery_stats(self) -> Dict:
+        """获取启动恢复进度"""
+        with self._recovery_lock:
+            return {**self._recovery_stats, "pending": len(self._recovery_pending)}
+
     def start_monitor(self, record_id: int):
         """启动单个监控任务"""
         if record_id in self.running_monitors and self.monitor_states.get(record_id, False):
@@ -159,11 +217,9 @@ class PriceMonitor:
             notifier = Notifier(webhook_url=record.webhook_url)
             notifier.send_startup_notification(record.name)
 
-            # 启动监控线程
+            # 启动监控任务
             self.monitor_states[record_id] = True
-            thread = threading.Thread(target=self._monitor_loop, args=(record_id,), daemon=True)
-            thread.start()
-            self.running_monitors[record_id] = thread
+            self.running_monitors[record_id] = MonitorEngine().submit(self._monitor_loop(record_id))
 
             return True, "监控启动成功"
         except Exception as e:
@@ -178,6 +234,8 @@ class PriceMonitor:
 
         if record_id in self.running_monitors:
             del self.running_monitors[record_id]
+        ThresholdIndex().remove_monitor(record_id)
+        SlicedSeller().cancel(record_id)
 
         # 注意：不在这里清理last_market_caps，因为其他监控可能还在使用相同的token
 
@@ -212,11 +270,9 @@ class PriceMonitor:
             notifier = Notifier(webhook_url=record.webhook_url)
             notifier.send_startup_notification(record.name)
 
-            # 启动波段监控线程
+            # 启动波段监控任务
             self.swing_monitor_states[record_id] = True
-            thread = threading.Thread(target=self._swing_monitor_loop, args=(record_id,), daemon=True)
-            thread.start()
-            self.running_swing_monitors[record_id] = thread
+            self.running_swing_monitors[record_id] = MonitorEngine().submit(self._swing_monitor_loop(record_id))
 
             return True, "波段监控启动成功"
         except Exception as e:
@@ -231,6 +287,7 @@ class PriceMonitor:
 
         if record_id in self.running_swing_monitors:
             del self.running_swing_monitors[record_id]
+        ThresholdIndex().remove_swing(record_id)
 
         # 更新数据库状态
         db = SessionLocal()
@@ -264,13 +321,12 @@ class PriceMonitor:
                 return True, percent_change
         return False, percent_change
 
-    def _complete_monitor_task(self, record_id: int, record, notifier, db, reason: str, message_title: str,
+    def _complete_monitor_task(self, record_id: int, name: str, notifier, reason: str, message_title: str,
                                message_content: str):
         """完成监控任务的通用方法"""
-        logging.info(f"{reason}: {record.name}")
+        logging.info(f"{reason}: {name}")
         # 更新状态为已完成
-        record.status = "completed"
-        db.commit()
+        self._set_record_status(MonitorRecord, record_id, "completed")
 
         # 发送完成通知
         notifier.send_message(message_title, message_content)
@@ -278,245 +334,376 @@ class PriceMonitor:
         # 停止监控循环
         self.monitor_states[record_id] = False
 
-    def _handle_buy_monitor(self, record, trader, notifier, price_info, db, record_id, sol_balance):
-        """处理买入监听逻辑"""
+    def _handle_buy_monitor(self, record, trader, notifier, price_info, record_id, sol_balance) -> tuple:
+        """处理买入监听逻辑，返回(是否继续监控, 需要进入冷却的秒数)"""
         # 获取SOL的美元价格
         sol_mint = "So11111111111111111111111111111111111111112"
         sol_info = TokenAPI().get_market_data(normalize_sol_address(sol_mint))
         sol_usd_price = sol_info['price'] if sol_info and sol_info['price'] else 0.0
-        actual_buy_percentage = record.sell_percentage
-        if record.execution_mode != "single":
-            min_hold_usd = getattr(record, 'minimum_hold_value', 0.0)
-            min_hold_sol = min_hold_usd / sol_usd_price if sol_usd_price > 0 else 0.0
-            if sol_balance - (sol_balance * actual_buy_percentage) < min_hold_sol:
-                actual_buy_percentage = 1.0  # 全部买入
+        actual_buy_percentage = self._actual_buy_percentage(
+            record.execution_mode, record.sell_percentage, getattr(record, 'minimum_hold_value', 0.0),
+            sol_balance, sol_usd_price)
         buy_amount = sol_balance * actual_buy_percentage
         estimated_usd_value = buy_amount * sol_usd_price
         max_buy = getattr(record, 'max_buy_amount', 0.0)
-        if max_buy > 0 and (getattr(record, '_accumulated_buy_usd', 0.0) + estimated_usd_value) > max_buy:
+        if self._exceeds_max_buy(max_buy, record.accumulated_buy_usd, estimated_usd_value):
             self._complete_monitor_task(
-                record_id, record, notifier, db,
+                record_id, record.name, notifier,
                 reason="累计买入金额已达上限，停止监控任务",
                 message_title=f"🎯 【{record.name}】累计买入上限已达",
                 message_content=f"【{record.name}】累计买入金额已达上限（{max_buy} USD），监控任务自动停止。"
             )
-            return False
-        result = trader.buy_token_for_sol(record.token_address, actual_buy_percentage)
+            return False, 0
+        result = trader.buy_token_for_sol(record.token_address, actual_buy_percentage,
+                                          prepared=QuotePrewarmer().take(record_id))
         if result["success"]:
-            tx_hash = result["tx_hash"]
-            logging.info(f"买入交易成功: {tx_hash}")
-            log = MonitorLog(
-                monitor_record_id=record_id,
-                price=price_info['price'],
-                market_cap=price_info['market_cap'],
-                threshold_reached=True,
-                transaction_usd=estimated_usd_value,
-                action_taken="自动买入",
-                action_type="buy",
-                tx_hash=str(tx_hash)
-            )
-            db.add(log)
-            db.commit()
-            # 买入专用通知
-            notifier.send_trade_notification(
-                tx_hash, buy_amount, estimated_usd_value, record.name, record.token_symbol, action_type='buy'
-            )
-            # 累计金额持久化
-            record.accumulated_buy_usd = (record.accumulated_buy_usd or 0.0) + estimated_usd_value
-            db.commit()
-            if record.execution_mode == "single" or actual_buy_percentage >= 1.0:
-                self._complete_monitor_task(
-                    record_id, record, notifier, db,
-                    reason="买入任务完成，停止监控任务",
-                    message_title=f"🎯 【{record.name}】买入任务完成",
-                    message_content=f"【{record.name}】买入任务已完成，监控任务自动停止。"
-                )
-                return False
-            else:
-                logging.info(f"买入完成，继续监控等待下一次低于阈值...")
-                time.sleep(60)
-                return True
+            logging.info(f"买入交易已提交，等待确认: {result['tx_hash']}")
+            WalletTradeQueue().hold(trader, result["confirmation"])
+            # 确认后的日志、通知和完成判断在回调中执行，回调只带走普通值
+            result["confirmation"].add_done_callback(functools.partial(
+                self._on_buy_resolved, record_id, record.name, record.token_symbol, notifier, dict(price_info),
+                buy_amount, estimated_usd_value,
+                record.execution_mode == "single" or actual_buy_percentage >= 1.0))
+            # 交易确认前进入冷却，避免重复下单
+            return True, TRADE_COOLDOWN_SECONDS
         else:
             error_msg = result["error"]
             logging.error(f"买入交易失败: {error_msg}")
             notifier.send_error_notification(f"买入交易失败: {error_msg}", record.name)
-            return True
+            return True, 0
 
-    def _handle_sell_monitor(self, record, trader, notifier, price_info, db, record_id, token_balance_before):
-        """处理卖出监听逻辑"""
-        actual_sell_percentage = record.sell_percentage
-        if record.execution_mode != "single" and price_info['price'] is not None:
-            total_asset_value = token_balance_before * price_info['price']
-            minimum_hold_value = getattr(record, 'minimum_hold_value', 50.0)
-            if total_asset_value < minimum_hold_value:
-                actual_sell_percentage = 1.0
+    def _handle_sell_monitor(self, record, trader, notifier, price_info, record_id, token_balance_before) -> tuple:
+        """处理卖出监听逻辑，返回(是否继续监控, 需要进入冷却的秒数)"""
+        actual_sell_percentage = self._actual_sell_percentage(
+            record.execution_mode, record.sell_percentage, getattr(record, 'minimum_hold_value', 50.0),
+            token_balance_before, price_info['price'])
         actual_sell_amount = token_balance_before * actual_sell_percentage
         estimated_usd_value = actual_sell_amount * price_info['price']
-        result = trader.sell_token_for_sol(record.token_address, actual_sell_percentage)
+        plan = SlicePlan.from_record(record)
+        if plan is not None:
+            # 分片出售在引擎事件循环上后台执行，执行期间的触发会被跳过；提交时进入冷却，结束时重新开始冷却
+            started = SlicedSeller().start(
+                record_id, record.name, trader, record.token_address, actual_sell_amount, plan,
+                on_child=functools.partial(self._on_slice_filled, record_id, record.name, record.token_symbol,
+                                           notifier, dict(price_info)),
+                on_finished=functools.partial(self._on_sliced_sell_finished, record_id, record.name, notifier,
+                                              record.execution_mode == "single", actual_sell_percentage))
+            return True, TRADE_COOLDOWN_SECONDS if started else 0
+        result = trader.sell_token_for_sol(record.token_address, actual_sell_percentage,
+                                           prepared=QuotePrewarmer().take(record_id))
         if result["success"]:
-            tx_hash = result["tx_hash"]
-            logging.info(f"交易成功: {tx_hash}")
-            log = MonitorLog(
-                monitor_record_id=record_id,
-                price=price_info['price'],
-                market_cap=price_info['market_cap'],
-                threshold_reached=True,
-                action_taken="自动出售",
-                action_type="sell",
-                transaction_usd=estimated_usd_value,
-                tx_hash=str(tx_hash)
-            )
-            db.add(log)
-            db.commit()
-            # 卖出专用通知
-            notifier.send_trade_notification(
-                tx_hash, actual_sell_amount, estimated_usd_value, record.name, record.token_symbol, action_type='sell'
-            )
-            if record.execution_mode == "single":
-                sell_percentage_text = f"{(actual_sell_percentage * 100):.1f}%"
-                self._complete_monitor_task(
-                    record_id, record, notifier, db,
-                    reason="单次执行模式完成，停止监控任务",
-                    message_title=f"🎯 【{record.name}】单次执行完成",
-                    message_content=f"【{record.name}】单次执行模式已完成交易（出售{sell_percentage_text}），监控任务自动停止。"
-                )
-                return False
-            elif actual_sell_percentage >= 1.0:
-                self._complete_monitor_task(
-                    record_id, record, notifier, db,
-                    reason="已100%出售完毕，停止监控任务",
-                    message_title=f"🎯 【{record.name}】监控任务完成",
-                    message_content=f"【{record.name}】已100%出售完毕，监控任务自动停止。"
-                )
-                return False
-            else:
-                logging.info(f"交易完成，继续监控等待下一次达到阈值...")
-                time.sleep(60)
-                return True
+            logging.info(f"卖出交易已提交，等待确认: {result['tx_hash']}")
+            WalletTradeQueue().hold(trader, result["confirmation"])
+            # 确认后的日志、通知和完成判断在回调中执行，回调只带走普通值
+            result["confirmation"].add_done_callback(functools.partial(
+                self._on_sell_resolved, record_id, record.name, record.token_symbol, notifier, dict(price_info),
+                actual_sell_amount, estimated_usd_value, record.execution_mode == "single", actual_sell_percentage))
+            # 交易确认前进入冷却，避免重复下单
+            return True, TRADE_COOLDOWN_SECONDS
         else:
             error_msg = result["error"]
             logging.error(f"交易执行失败: {error_msg}")
             notifier.send_error_notification(f"交易执行失败: {error_msg}", record.name)
-            return True
+            return True, 0
+
+    def _on_buy_resolved(self, record_id: int, name: str, token_symbol: str, notifier, price_info: dict,
+                         buy_amount: float, estimated_usd_value: float, finish: bool, confirmation):
+        """买入交易确认回调：写交易日志、发通知、累计买入金额，需要时完成监控任务"""
+        error = confirmation.exception()
+        if error:
+            logging.error(f"买入交易未能确认: {error}")
+            notifier.send_error_notification(f"买入交易失败: {error}", name)
+            return
+        tx_hash = confirmation.signature
+        logging.info(f"买入交易成功: {tx_hash}")
+        self._write_trade_log(record_id, price_info, "自动买入", "buy", estimated_usd_value, tx_hash)
+        # 买入专用通知
+        notifier.send_trade_notification(
+            tx_hash, buy_amount, estimated_usd_value, name, token_symbol, action_type='buy'
+        )
+        db = SessionLocal()
+        try:
+            record = db.query(MonitorRecord).filter(MonitorRecord.id == record_id).first()
+            if not record:
+                return
+            # 累计金额持久化，并同步到运行中监控的快照
+            record.accumulated_buy_usd = (record.accumulated_buy_usd or 0.0) + estimated_usd_value
+            db.commit()
+            MonitorStateStore().reload('normal', record)
+        finally:
+            db.close()
+        if finish:
+            self._complete_monitor_task(
+                record_id, name, notifier,
+                reason="买入任务完成，停止监控任务",
+                message_title=f"🎯 【{name}】买入任务完成",
+                message_content=f"【{name}】买入任务已完成，监控任务自动停止。"
+            )
+        else:
+            logging.info(f"买入完成，继续监控等待下一次低于阈值...")
+
+    def _on_sell_resolved(self, record_id: int, name: str, token_symbol: str, notifier, price_info: dict,
+                          sell_amount: float, estimated_usd_value: float, single: bool, sell_percentage: float,
+                          confirmation):
+        """卖出交易确认回调：写交易日志、发通知，单次模式或全部卖出后完成监控任务"""
+        error = confirmation.exception()
+        if error:
+            logging.error(f"卖出交易未能确认: {error}")
+            notifier.send_error_notification(f"交易执行失败: {error}", name)
+            return
+        tx_hash = confirmation.signature
+        logging.info(f"交易成功: {tx_hash}")
+        self._write_trade_log(record_id, price_info, "自动出售", "sell", estimated_usd_value, tx_hash)
+        # 卖出专用通知
+        notifier.send_trade_notification(
+            tx_hash, sell_amount, estimated_usd_value, name, token_symbol, action_type='sell'
+        )
+        self._finish_sell(record_id, name, notifier, single, sell_percentage)
+
+    def _on_slice_filled(self, record_id: int, name: str, token_symbol: str, notifier, price_info: dict,
+                         execution: SliceExecution, child: dict):
+        """分片子订单确认回调：每个子订单单独写交易日志并发通知，日志中记录预期与实际到账SOL"""
+        realized_sol = child['realized_sol'] if child['realized_sol'] is not None else child['expected_sol']
+        estimated_usd_value = child['amount'] * price_info['price']
+        self._write_trade_log(
+            record_id, price_info,
+            f"分片出售 {child['index']}/{execution.plan.count}（预期 {child['expected_sol']:.6f} SOL，"
+            f"实际 {realized_sol:.6f} SOL）",
+            "sell", estimated_usd_value, child['tx_hash'])
+        notifier.send_trade_notification(
+            child['tx_hash'], child['amount'], estimated_usd_value, name, token_symbol, action_type='sell'
+        )
+
+    def _on_sliced_sell_finished(self, record_id: int, name: str, notifier, single: bool, sell_percentage: float,
+                                 execution: SliceExecution):
+        """分片出售结束回调：汇总预期与实际到账SOL，全部卖出后按单次/多次模式决定是否完成监控任务"""
+        expected_sol = execution.expected_sol
+        realized_sol = execution.realized_sol
+        slippage_text = f"{(realized_sol / expected_sol - 1) * 100:+.2f}%" if expected_sol > 0 else "--"
+        summary = (f"【{name}】分片出售{'完成' if execution.status == 'completed' else '结束'}："
+                   f"成交 {len(execution.children)} 片，卖出 {execution.sold_amount:.4f}/{execution.total_amount:.4f}，"
+                   f"预期 {expected_sol:.6f} SOL，实际 {realized_sol:.6f} SOL（{slippage_text}）")
+        if execution.error:
+            summary += f"，错误: {execution.error}"
+        logging.info(summary)
+        # 分片可能持续数分钟，提交时开始的冷却可能已经结束，从分片结束时刻重新冷却
+        self._restart_sell_cooldown(record_id)
+        if execution.status == "completed":
+            notifier.send_message(f"✂️ 【{name}】分片出售完成", summary)
+            self._finish_sell(record_id, name, notifier, single, sell_percentage)
+        elif execution.status == "stopped":
+            notifier.send_message(f"✂️ 【{name}】分片出售已停止", summary)
+        else:
+            notifier.send_error_notification(summary, name)
 
-    def _monitor_loop(self, record_id: int):
-        """监控循环"""
+    def _restart_sell_cooldown(self, record_id: int):
+        """在后台回调中开始卖出冷却，并同步到运行中监控的快照，监控循环在下一次tick时采用"""
+        self._start_cooldown(MonitorRecord, record_id, 'sell', TRADE_COOLDOWN_SECONDS)
         db = SessionLocal()
         try:
             record = db.query(MonitorRecord).filter(MonitorRecord.id == record_id).first()
+            if record:
+                MonitorStateStore().reload('normal', record)
+        finally:
+            db.close()
+
+    def _finish_sell(self, record_id: int, name: str, notifier, single: bool, sell_percentage: float):
+        """卖出成交后，单次模式或全部卖出时完成监控任务，否则继续监控"""
+        if not single and sell_percentage < 1.0:
+            logging.info(f"交易完成，继续监控等待下一次达到阈值...")
+            return
+        if single:
+            sell_percentage_text = f"{(sell_percentage * 100):.1f}%"
+            self._complete_monitor_task(
+                record_id, name, notifier,
+                reason="单次执行模式完成，停止监控任务",
+                message_title=f"🎯 【{name}】单次执行完成",
+                message_content=f"【{name}】单次执行模式已完成交易（出售{sell_percentage_text}），监控任务自动停止。"
+            )
+        else:
+            self._complete_monitor_task(
+                record_id, name, notifier,
+                reason="已100%出售完毕，停止监控任务",
+                message_title=f"🎯 【{name}】监控任务完成",
+                message_content=f"【{name}】已100%出售完毕，监控任务自动停止。"
+            )
+
+    @staticmethod
+    def _write_trade_log(record_id: int, price_info: dict, action_taken: str, action_type: str,
+                         transaction_usd: float, tx_hash: str):
+        """写入普通监控的交易日志，交易日志由写入器同步落库"""
+        MonitorLogWriter().write(dict(
+            monitor_record_id=record_id,
+            timestamp=datetime.utcnow(),
+            price=price_info['price'],
+            market_cap=price_info['market_cap'],
+            threshold_reached=True,
+            transaction_usd=transaction_usd,
+            action_taken=action_taken,
+            action_type=action_type,
+            tx_hash=str(tx_hash),
+            monitor_type='normal'
+        ))
+
+    @staticmethod
+    def _actual_buy_percentage(execution_mode: str, buy_percentage: float, minimum_hold_value: float,
+                               sol_balance: float, sol_usd_price: float) -> float:
+        """计算实际买入比例：分批模式下剩余SOL价值低于最低持仓时一次全部买入"""
+        if execution_mode != "single":
+            min_hold_sol = minimum_hold_value / sol_usd_price if sol_usd_price > 0 else 0.0
+            if sol_balance - (sol_balance * buy_percentage) < min_hold_sol:
+                return 1.0  # 全部买入
+        return buy_percentage
+
+    @staticmethod
+    def _buyable_sol(sol_balance: float, buy_percentage: float) -> float:
+        """可用于买入的SOL数量，全部买入时账号里需要留一点SOL作为token账户的租费"""
+        return sol_balance * buy_percentage - (SOL_RENT_RESERVE if buy_percentage == 1 else 0)
+
+    @staticmethod
+    def _exceeds_max_buy(max_buy_amount: float, accumulated_buy_usd: float, buy_usd: float) -> bool:
+        """本次买入后累计买入金额是否超过上限，上限为0表示不限制"""
+        return (max_buy_amount or 0.0) > 0 and (accumulated_buy_usd or 0.0) + buy_usd > max_buy_amount
+
+    @staticmethod
+    def _swing_trade_percentage(percentage: float, all_in_threshold: float, balance: float,
+                                price: Optional[float]) -> float:
+        """计算波段交易比例：设置了全仓阈值且持仓价值不超过该阈值时一次全部交易"""
+        if all_in_threshold and all_in_threshold > 0 and price and balance * price <= all_in_threshold:
+            return 1.0
+        return percentage
+
+    @staticmethod
+    def _actual_sell_percentage(execution_mode: str, sell_percentage: float, minimum_hold_value: float,
+                                token_balance: float, price: float) -> float:
+        """计算实际出售比例：分批模式下持仓价值低于最低持仓时一次全部卖出"""
+        if execution_mode != "single" and price is not None:
+            if token_balance * price < minimum_hold_value:
+                return 1.0
+        return sell_percentage
+
+    def _prewarm_quote(self, record_id: int, record, trader, price_info: dict, side: str):
+        """市值接近阈值时在后台预热报价和交易，离开区间时丢弃"""
+        prewarmer = QuotePrewarmer()
+        # 分片出售按子订单单独报价，不预热整笔交易
+        if side == 'sell' and SlicePlan.from_record(record) is not None:
+            prewarmer.discard(record_id)
+            return
+        if not prewarmer.in_band(side, price_info['market_cap'], record.threshold):
+            prewarmer.discard(record_id)
+            return
+        # 预热在其他工作线程执行，只带走普通值，不访问监控记录的数据库会话
+        token_address = record.token_address
+        execution_mode = record.execution_mode
+        percentage = record.sell_percentage
+        price = price_info['price']
+        if side == 'buy':
+            minimum_hold_value = getattr(record, 'minimum_hold_value', 0.0)
+
+            def prepare():
+                sol_info = TokenAPI().get_market_data(normalize_sol_address(SOL_MINT))
+                sol_usd_price = sol_info['price'] if sol_info and sol_info['price'] else 0.0
+                buy_percentage = self._actual_buy_percentage(
+                    execution_mode, percentage, minimum_hold_value, trader.get_sol_balance(), sol_usd_price)
+                return trader.prepare_buy(token_address, buy_percentage)
+        else:
+            minimum_hold_value = getattr(record, 'minimum_hold_value', 50.0)
+
+            def prepare():
+                token_balance = trader.get_token_balance(token_address)
+                if token_balance <= 0:
+                    return None
+                sell_percentage = self._actual_sell_percentage(
+                    execution_mode, percentage, minimum_hold_value, token_balance, price)
+                return trader.prepare_sell(token_address, sell_percentage)
+
+        prewarmer.refresh(record_id, prepare)
+
+    async def _monitor_loop(self, record_id: int, start_delay: float = 0):
+        """监控任务，运行在监控引擎的事件循环中，start_delay为启动恢复时的错峰延迟
+
+        循环只读取与数据库会话分离的配置快照，不占用数据库连接；记录被编辑后从下一次tick起使用新配置。
+        """
+        engine = MonitorEngine()
+        store = MonitorStateStore()
+        subscription = None
+        record = None
+        # 已提交到钱包交易队列、尚未执行完的交易(Future, 交易方向)，排队期间照常处理tick
+        pending_trade = None
+        try:
+            if start_delay:
+                await asyncio.sleep(start_delay)
+            record = await engine.run_blocking(store.load, 'normal', record_id)
             if not record:
                 return
 
-            private_key = record.private_key_obj.private_key
-            trader = SolanaTrader(private_key=private_key)
+            trader = await engine.run_blocking(TraderRegistry().get, record.private_key_id, record.private_key)
             notifier = Notifier(webhook_url=record.webhook_url)
+            # 重启前未结束的冷却继续生效
+            cooldown = (record.cooldown_until, record.cooldown_action)
+            # 先加入阈值索引，价格总线每次tick按索引批量判断触发的监控
+            await engine.run_blocking(ThresholdIndex().add_monitor, record)
+            # 通过价格总线订阅，同一代币的多个监控共享一次上游请求
+            subscription = PriceBus().subscribe(record.token_address, record.check_interval)
 
             while self.monitor_states.get(record_id, False):
                 try:
-                    price_info = TokenAPI().get_market_data(normalize_sol_address(record.token_address))
+                    snapshot = store.get('normal', record_id)
+                    if snapshot is None:
+                        # 记录已被删除
+                        break
+                    if snapshot is not record:
+                        trader, notifier, subscription = await self._apply_snapshot(
+                            record, snapshot, 'token_address', trader, subscription)
+                        QuotePrewarmer().discard(record_id)
+                        record = snapshot
+                        # 后台回调（如分片出售结束）写入的更晚的冷却随快照同步过来
+                        if snapshot.cooldown_until and (cooldown[0] is None or snapshot.cooldown_until > cooldown[0]):
+                            cooldown = (snapshot.cooldown_until, snapshot.cooldown_action)
+
+                    if pending_trade is not None and pending_trade[0].done():
+                        future, action = pending_trade
+                        pending_trade = None
+                        keep_running, cooldown = await self._settle_outcome(
+                            future.result(), MonitorRecord, record_id, action, cooldown)
+                        if not keep_running:
+                            break
+
+                    # 等待下一条价格tick，同时起到检查间隔的作用
+                    price_info = await subscription.next_tick(timeout=record.check_interval)
                     if not price_info:
-                        time.sleep(record.check_interval)
                         continue
 
-                    record.last_check_at = datetime.utcnow()
-                    record.last_price = price_info['price']
-                    record.last_market_cap = price_info['market_cap']
-                    db.commit()
-
-                    self._log_monitor_data(record_id=record_id, price_info=price_info, threshold=record.threshold,
-                                           action_type='monitoring')
-
-                    is_buy = getattr(record, 'type', 'sell') == 'buy'
-
-                    if is_buy:
-                        if price_info['market_cap'] < record.threshold:
-                            logging.info(
-                                f"监控 {record.name} 市值低于阈值，尝试买入。当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
-                            notifier.send_price_alert(
-                                {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
-                                record.name, True, 'buy')
-                            if not hasattr(record, '_accumulated_buy_usd'):
-                                record._accumulated_buy_usd = 0.0
-                            sol_balance = trader.get_sol_balance()
-                            # 计算买入数量, 账号里面需要留一点sol作为token的账户的租费,如果token全部卖了,sol理论上可以全提走
-                            buy_amount = (sol_balance * record.sell_percentage) - (
-                                0.0021 if record.sell_percentage == 1 else 0)
-                            if sol_balance <= 0 or buy_amount <= 0:
-                                self._complete_monitor_task(
-                                    record_id, record, notifier, db,
-                                    reason="SOL余额不足，停止买入监控任务",
-                                    message_title=f"⚠️ 【{record.name}】SOL余额不足",
-                                    message_content=f"【{record.name}】SOL余额为0，监控任务自动停止。"
-                                )
-                                break
-                            try:
-                                should_continue = self._handle_buy_monitor(record, trader, notifier, price_info, db,
-                                                                           record_id, sol_balance)
-                                if not should_continue:
-                                    break
-                            except Exception as e:
-                                logging.error(f"买入执行失败: {e}")
-                                notifier.send_error_notification(f"买入执行失败: {e}", record.name)
-                        else:
-                            logging.debug(
-                                f"监控 {record.name} 市值未低于阈值。当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
-                            notify, percent_change = self._should_send_price_update(record.token_address,
-                                                                                    price_info['market_cap'])
-                            if notify:
-                                notifier.send_price_alert(
-                                    {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
-                                    record.name, False, 'buy', percent_change)
-                        time.sleep(record.check_interval)
+                    self._recovery_ready('normal', record_id)
+                    outcome = await engine.run_blocking(
+                        self._process_tick, record_id, record, trader, notifier, price_info,
+                        self._active_cooldown(*cooldown), pending_trade is not None)
+                    action = 'buy' if record.type == 'buy' else 'sell'
+                    if isinstance(outcome, Future):
+                        pending_trade = (outcome, action)
                         continue
-                    # 卖出监听
-                    if price_info['market_cap'] >= record.threshold:
-                        logging.info(
-                            f"监控 {record.name} 市值达到阈值！当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
-                        notifier.send_price_alert(
-                            {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
-                            record.name, True, 'sell')
-                        try:
-                            token_balance_before = trader.get_token_balance(record.token_address)
-                            if token_balance_before <= 0:
-                                if getattr(record, 'pre_sniper_mode', False):
-                                    logging.info(f"余额不足，预抢购模式开启，跳过本次监控: {record.name}")
-                                    time.sleep(record.check_interval)
-                                    continue
-                                else:
-                                    self._complete_monitor_task(
-                                        record_id, record, notifier, db,
-                                        reason="代币余额为0，停止监控任务",
-                                        message_title=f"⚠️ 【{record.name}】余额不足",
-                                        message_content=f"【{record.name}】代币余额为0，监控任务自动停止。"
-                                    )
-                                    break
-                            should_continue = self._handle_sell_monitor(record, trader, notifier, price_info, db,
-                                                                        record_id, token_balance_before)
-                            if not should_continue:
-                                break
-                        except Exception as e:
-                            logging.error(f"交易执行失败: {e}")
-                            notifier.send_error_notification(f"交易执行失败: {e}", record.name)
-                    else:
-                        logging.debug(
-                            f"监控 {record.name} 市值未达到阈值。当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
-                        notify, percent_change = self._should_send_price_update(record.token_address,
-                                                                                price_info['market_cap'])
-                        if notify:
-                            notifier.send_price_alert(
-                                {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
-                                record.name, False, 'sell', percent_change)
-                    time.sleep(record.check_interval)
+                    # 冷却期间照常处理价格tick和停止请求，只跳过同方向的触发
+                    keep_running, cooldown = await self._settle_outcome(
+                        outcome, MonitorRecord, record_id, action, cooldown)
+                    if not keep_running:
+                        break
 
                 except Exception as e:
                     logging.error(f"监控 {record.name} 过程中出错: {e}")
-                    record.status = "error"
-                    db.commit()
-                    time.sleep(record.check_interval)
+                    await engine.run_blocking(self._set_record_status, MonitorRecord, record_id, "error")
+                    await asyncio.sleep(record.check_interval)
 
         except Exception as e:
-            logging.error(f"监控线程异常: {e}")
+            logging.error(f"监控任务异常: {e}")
         finally:
+            self._abandon_pending_trade(pending_trade, MonitorRecord, record_id)
+            if subscription:
+                PriceBus().unsubscribe(subscription)
+            ThresholdIndex().remove_monitor(record_id)
+            QuotePrewarmer().discard(record_id)
+            SlicedSeller().cancel(record_id)
+            store.discard('normal', record_id, keep_pending=True)
+            self._recovery_ready('normal', record_id)
             # 清理状态
             if record_id in self.monitor_states:
                 self.monitor_states[record_id] = False
@@ -524,16 +711,197 @@ class PriceMonitor:
                 del self.running_monitors[record_id]
             # 注意：不在这里清理last_market_caps，因为其他监控可能还在使用相同的token
 
-            # 更新数据库状态
-            try:
-                record = db.query(MonitorRecord).filter(MonitorRecord.id == record_id).first()
-                if record and record.status == "monitoring":
-                    record.status = "stopped"
-                    db.commit()
-            except:
-                logging.error(f"更新监控记录状态失败: {record_id}")
-            finally:
-                db.close()
+            # 更新数据库状态：交易确认回调可能已把记录标记为completed，只修改仍处于monitoring的记录
+            await engine.run_blocking(self._set_record_status, MonitorRecord, record_id, "stopped", "monitoring")
+
+    @staticmethod
+    async def _apply_snapshot(old, new, token_field: str, trader, subscription) -> tuple:
+        """记录被编辑后切换到新快照：私钥变化时更换交易器，代币或检查间隔变化时重新订阅价格总线"""
+        if new.private_key_id != old.private_key_id or new.private_key != old.private_key:
+            trader = await MonitorEngine().run_blocking(TraderRegistry().get, new.private_key_id, new.private_key)
+        if getattr(new, token_field) != getattr(old, token_field) or new.check_interval != old.check_interval:
+            PriceBus().unsubscribe(subscription)
+            subscription = PriceBus().subscribe(getattr(new, token_field), new.check_interval)
+        logging.info(f"🔄 监控 {new.name} 配置已更新，从下一次价格tick起生效")
+        return trader, Notifier(webhook_url=new.webhook_url), subscription
+
+    def _process_tick(self, record_id: int, record, trader, notifier, price_info: dict, cooldown_action: str = None,
+                      trade_pending: bool = False):
+        """处理一条价格tick，返回(是否继续监控, 需要进入冷却的秒数)，触发交易时返回钱包交易队列中该结果的Future
+
+        cooldown_action为冷却中的交易方向，该方向的触发会被跳过；trade_pending表示上一笔交易仍在钱包队列中，期间不再触发
+        """
+        # 最新状态先保存在内存，由MonitorStateStore批量落库
+        MonitorStateStore().record_seen('normal', record_id, last_check_at=datetime.utcnow(),
+                                        last_price=price_info['price'], last_market_cap=price_info['market_cap'])
+
+        self._log_monitor_data(record_id=record_id, price_info=price_info, threshold=record.threshold,
+                               action_type='monitoring')
+
+        is_buy = getattr(record, 'type', 'sell') == 'buy'
+
+        if is_buy:
+            if self._is_triggered(price_info, 'buy', record_id):
+                if cooldown_action == 'buy':
+                    logging.debug(f"监控 {record.name} 交易冷却中，跳过本次触发")
+                    return True, 0
+                if trade_pending:
+                    logging.debug(f"监控 {record.name} 上一笔交易排队中，跳过本次触发")
+                    return True, 0
+                logging.info(
+                    f"监控 {record.name} 市值低于阈值，尝试买入。当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
+                notifier.send_price_alert(
+                    {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
+                    record.name, True, 'buy')
+                # 同一钱包的交易排队执行，出队时再读取余额
+                return WalletTradeQueue().submit(trader, functools.partial(
+                    self._execute_buy_trigger, record_id, record, trader, notifier, price_info), record.name)
+            else:
+                logging.debug(
+                    f"监控 {record.name} 市值未低于阈值。当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
+                self._prewarm_quote(record_id, record, trader, price_info, 'buy')
+                notify, percent_change = self._should_send_price_update(record.token_address,
+                                                                        price_info['market_cap'])
+                if notify:
+                    notifier.send_price_alert(
+                        {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
+                        record.name, False, 'buy', percent_change)
+            return True, 0
+        # 卖出监听
+        if self._is_triggered(price_info, 'sell', record_id):
+            if cooldown_action == 'sell':
+                logging.debug(f"监控 {record.name} 交易冷却中，跳过本次触发")
+                return True, 0
+            if trade_pending:
+                logging.debug(f"监控 {record.name} 上一笔交易排队中，跳过本次触发")
+                return True, 0
+            if SlicedSeller().is_running(record_id):
+                logging.debug(f"监控 {record.name} 分片出售进行中，跳过本次触发")
+                return True, 0
+            logging.info(
+                f"监控 {record.name} 市值达到阈值！当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
+            notifier.send_price_alert(
+                {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
+                record.name, True, 'sell')
+            # 同一钱包的交易排队执行，出队时再读取余额
+            return WalletTradeQueue().submit(trader, functools.partial(
+                self._execute_sell_trigger, record_id, record, trader, notifier, price_info), record.name)
+        else:
+            logging.debug(
+                f"监控 {record.name} 市值未达到阈值。当前: ${price_info['market_cap']:,.2f}, 阈值: ${record.threshold:,.2f}")
+            self._prewarm_quote(record_id, record, trader, price_info, 'sell')
+            notify, percent_change = self._should_send_price_update(record.token_address,
+                                                                    price_info['market_cap'])
+            if notify:
+                notifier.send_price_alert(
+                    {**price_info, 'threshold': record.threshold, 'token_symbol': record.token_symbol},
+                    record.name, False, 'sell', percent_change)
+        return True, 0
+
+    def _execute_buy_trigger(self, record_id: int, record, trader, notifier, price_info: dict) -> tuple:
+        """钱包队列中执行的买入：按出队时的SOL余额计算买入数量"""
+        sol_balance = trader.get_sol_balance()
+        buy_amount = self._buyable_sol(sol_balance, record.sell_percentage)
+        if sol_balance <= 0 or buy_amount <= 0:
+            self._complete_monitor_task(
+                record_id, record.name, notifier,
+                reason="SOL余额不足，停止买入监控任务",
+                message_title=f"⚠️ 【{record.name}】SOL余额不足",
+                message_content=f"【{record.name}】SOL余额为0，监控任务自动停止。"
+            )
+            return False, 0
+        try:
+            return self._handle_buy_monitor(record, trader, notifier, price_info, record_id, sol_balance)
+        except Exception as e:
+            logging.error(f"买入执行失败: {e}")
+            notifier.send_error_notification(f"买入执行失败: {e}", record.name)
+        return True, 0
+
+    def _execute_sell_trigger(self, record_id: int, record, trader, notifier, price_info: dict) -> tuple:
+        """钱包队列中执行的卖出：按出队时的代币余额计算卖出数量"""
+        try:
+            token_balance_before = trader.get_token_balance(record.token_address)
+            if token_balance_before <= 0:
+                if getattr(record, 'pre_sniper_mode', False):
+                    logging.info(f"余额不足，预抢购模式开启，跳过本次监控: {record.name}")
+                    return True, 0
+                else:
+                    self._complete_monitor_task(
+                        record_id, record.name, notifier,
+                        reason="代币余额为0，停止监控任务",
+                        message_title=f"⚠️ 【{record.name}】余额不足",
+                        message_content=f"【{record.name}】代币余额为0，监控任务自动停止。"
+                    )
+                    return False, 0
+            return self._handle_sell_monitor(record, trader, notifier, price_info, record_id, token_balance_before)
+        except Exception as e:
+            logging.error(f"交易执行失败: {e}")
+            notifier.send_error_notification(f"交易执行失败: {e}", record.name)
+        return True, 0
+
+    async def _settle_outcome(self, outcome: tuple, model, record_id: int, action: str, cooldown: tuple) -> tuple:
+        """处理tick或已执行完的交易返回的(是否继续监控, 冷却秒数)，需要冷却时持久化，返回(是否继续监控, 冷却状态)"""
+        keep_running, wait_seconds = outcome
+        if keep_running and wait_seconds:
+            cooldown = await MonitorEngine().run_blocking(self._start_cooldown, model, record_id, action, wait_seconds)
+        return keep_running, cooldown
+
+    def _abandon_pending_trade(self, pending_trade: Optional[tuple], model, record_id: int):
+        """监控退出时取消仍在排队的交易；已开始执行的交易完成后仍记录冷却，避免重新启动后立即重复触发"""
+        if pending_trade is None:
+            return
+        future, action = pending_trade
+        if future.cancel():
+            return
+
+        def on_done(done: Future):
+            if done.cancelled() or done.exception() is not None:
+                return
+            _, wait_seconds = done.result()
+            if wait_seconds:
+                self._start_cooldown(model, record_id, action, wait_seconds)
+
+        future.add_done_callback(on_done)
+
+    @staticmethod
+    def _is_triggered(price_info: dict, side: str, record_id: int) -> bool:
+        """根据价格总线附带的阈值索引结果判断本监控是否被触发"""
+        triggered = price_info.get('triggered')
+        return triggered is not None and record_id in getattr(triggered, side)
+
+    @staticmethod
+    def _update_record(model, record_id: int, values: dict, current_status: str = None):
+        """用短会话更新记录字段，current_status不为空时只更新仍处于该状态的记录"""
+        db = SessionLocal()
+        try:
+            query = db.query(model).filter(model.id == record_id)
+            if current_status:
+                query = query.filter(model.status == current_status)
+            query.update(values, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logging.error(f"更新监控记录失败: {record_id}: {e}")
+        finally:
+            db.close()
+
+    def _set_record_status(self, model, record_id: int, status: str, current_status: str = None):
+        """更新记录状态，current_status不为空时只更新仍处于该状态的记录"""
+        self._update_record(model, record_id, {"status": status}, current_status)
+
+    def _start_cooldown(self, model, record_id: int, action: str, seconds: float) -> tuple:
+        """进入交易冷却并持久化到监控记录，重启后继续生效，返回(冷却结束时间, 冷却方向)"""
+        cooldown_until = datetime.utcnow() + timedelta(seconds=seconds)
+        self._update_record(model, record_id, {"cooldown_until": cooldown_until, "cooldown_action": action})
+        return cooldown_until, action
+
+    @staticmethod
+    def _active_cooldown(cooldown_until: Optional[datetime], cooldown_action: Optional[str],
+                         now: Optional[datetime] = None) -> Optional[str]:
+        """冷却中返回冷却的交易方向，冷却已结束返回None；回测时now为虚拟时钟的当前时间"""
+        if cooldown_until and (now or datetime.utcnow()) < cooldown_until:
+            return cooldown_action
+        return None
 
     def _log_monitor_data(self, record_id: int, price_info: dict, threshold: float, *,
                           monitor_type: str = 'normal', price_type: str = None, current_value: float = None,
@@ -542,35 +910,29 @@ class PriceMonitor:
                           buy_threshold: float = None, action_type: str = None,
                           action_taken: str = None, tx_hash: str = None, watch_token_address: str = None,
                           trade_token_address: str = None):
-        """记录监控数据，兼容普通和波段监控"""
-        db = SessionLocal()
-        try:
-            log = MonitorLog(
-                monitor_record_id=record_id,
-                timestamp=datetime.utcnow(),
-                price=price_info.get('price'),
-                market_cap=price_info.get('market_cap'),
-                threshold_reached=(
-                        price_info.get('market_cap') >= threshold) if threshold is not None and price_info.get(
-                    'market_cap') is not None else False,
-                action_taken=action_taken or (
-                    "监控中" if threshold is not None and price_info.get('market_cap') is not None and price_info.get(
-                        'market_cap') < threshold else "阈值达到"),
-                tx_hash=tx_hash,
-                monitor_type=monitor_type,
-                price_type=price_type,
-                current_value=current_value,
-                sell_threshold=sell_threshold,
-                buy_threshold=buy_threshold,
-                action_type=action_type,
-                watch_token_address=watch_token_address,
-                trade_token_address=trade_token_address,
-                transaction_usd=transaction_usd,
-            )
-            db.add(log)
-            db.commit()
-        finally:
-            db.close()
+        """记录监控数据，兼容普通和波段监控；tick日志异步批量写入，交易日志立即写入"""
+        MonitorLogWriter().write(dict(
+            monitor_record_id=record_id,
+            timestamp=datetime.utcnow(),
+            price=price_info.get('price'),
+            market_cap=price_info.get('market_cap'),
+            threshold_reached=(
+                    price_info.get('market_cap') >= threshold) if threshold is not None and price_info.get(
+                'market_cap') is not None else False,
+            action_taken=action_taken or (
+                "监控中" if threshold is not None and price_info.get('market_cap') is not None and price_info.get(
+                    'market_cap') < threshold else "阈值达到"),
+            tx_hash=tx_hash,
+            monitor_type=monitor_type,
+            price_type=price_type,
+            current_value=current_value,
+            sell_threshold=sell_threshold,
+            buy_threshold=buy_threshold,
+            action_type=action_type,
+            watch_token_address=watch_token_address,
+            trade_token_address=trade_token_address,
+            transaction_usd=transaction_usd,
+        ))
 
     def stop_all_monitors(self):
         """停止所有监控任务"""
@@ -635,210 +997,79 @@ class PriceMonitor:
         finally:
             db.close()
 
-    def _swing_monitor_loop(self, record_id: int):
-        """波段监控循环"""
-        db = SessionLocal()
+    async def _swing_monitor_loop(self, record_id: int, start_delay: float = 0):
+        """波段监控任务，运行在监控引擎的事件循环中，start_delay为启动恢复时的错峰延迟"""
+        engine = MonitorEngine()
+        store = MonitorStateStore()
+        subscription = None
+        record = None
+        # 已提交到钱包交易队列、尚未执行完的交易(Future, 交易方向)，排队期间照常处理tick
+        pending_trade = None
         try:
-            record = db.query(SwingMonitorRecord).filter(SwingMonitorRecord.id == record_id).first()
+            if start_delay:
+                await asyncio.sleep(start_delay)
+            record = await engine.run_blocking(store.load, 'swing', record_id)
             if not record:
                 return
 
-            private_key = record.private_key_obj.private_key
-            trader = SolanaTrader(private_key=private_key)
+            trader = await engine.run_blocking(TraderRegistry().get, record.private_key_id, record.private_key)
             notifier = Notifier(webhook_url=record.webhook_url)
-
-            last_trade_time = 0
+            # 重启前未结束的冷却继续生效
+            cooldown = (record.cooldown_until, record.cooldown_action)
+            await engine.run_blocking(ThresholdIndex().add_swing, record)
+            subscription = PriceBus().subscribe(record.watch_token_address, record.check_interval)
 
             while self.swing_monitor_states.get(record_id, False):
                 try:
-                    logging.info(
-                        f"波段监控 {record.name} 开始新的循环迭代，时间: {datetime.utcnow().strftime('%H:%M:%S')}")
-
-                    current_time = time.time()
-                    if current_time - last_trade_time < 60:
-                        remaining_cooldown = 60 - (current_time - last_trade_time)
-                        logging.info(f"波段监控 {record.name} 交易冷却中，剩余 {remaining_cooldown:.1f} 秒")
-                        time.sleep(min(remaining_cooldown, record.check_interval))
-                        continue
-
-                    watch_price_info = TokenAPI().get_market_data(normalize_sol_address(record.watch_token_address))
+                    snapshot = store.get('swing', record_id)
+                    if snapshot is None:
+                        # 记录已被删除
+                        break
+                    if snapshot is not record:
+                        trader, notifier, subscription = await self._apply_snapshot(
+                            record, snapshot, 'watch_token_address', trader, subscription)
+                        record = snapshot
+
+                    if pending_trade is not None and pending_trade[0].done():
+                        future, action = pending_trade
+                        pending_trade = None
+                        keep_running, cooldown = await self._settle_outcome(
+                            future.result(), SwingMonitorRecord, record_id, action, cooldown)
+                        if not keep_running:
+                            break
+
+                    watch_price_info = await subscription.next_tick(timeout=record.check_interval)
                     if not watch_price_info:
-                        time.sleep(record.check_interval)
                         continue
 
-                    record.last_check_at = datetime.utcnow()
-                    record.last_watch_price = watch_price_info['price']
-                    record.last_watch_market_cap = watch_price_info['market_cap']
-                    db.commit()
-
-                    if record.price_type == "price":
-                        current_value = watch_price_info['price']
-                        sell_threshold = record.sell_threshold
-                        buy_threshold = record.buy_threshold
-                        value_name = "价格"
-                        value_unit = "USD"
-                    else:
-                        current_value = watch_price_info['market_cap']
-                        sell_threshold = record.sell_threshold
-                        buy_threshold = record.buy_threshold
-                        value_name = "市值"
-                        value_unit = "USD"
-
-                    logging.debug(
-                        f"波段监控 {record.name} 当前{value_name}: ${current_value:,.2f}, 卖出阈值: ${sell_threshold:,.2f}, 买入阈值: ${buy_threshold:,.2f}")
-
-                    # 记录监控日志
-                    self._log_monitor_data(
-                        record_id=record.id,
-                        price_info=watch_price_info,
-                        threshold=None,
-                        monitor_type='swing',
-                        price_type=record.price_type,
-                        current_value=current_value,
-                        sell_threshold=sell_threshold,
-                        buy_threshold=buy_threshold,
-                        action_type='monitoring',
-                        action_taken=None,
-                        watch_token_address=record.watch_token_address,
-                        trade_token_address=record.trade_token_address
-                    )
-
-                    # 判断是否达到卖出条件
-                    if current_value >= sell_threshold:
-                        logging.info(
-                            f"波段监控 {record.name} 达到卖出条件！当前{value_name}: ${current_value:,.2f}, 卖出阈值: ${sell_threshold:,.2f}")
-
-                        try:
-                            # 检查监听代币余额（卖出监听代币）
-                            watch_token_balance = trader.get_token_balance(record.watch_token_address)
-                            if watch_token_balance <= 0:
-                                logging.info(f"波段监控 {record.name} 监听代币余额为0，跳过卖出")
-                                time.sleep(record.check_interval)
-                                continue
-
-                            # 余额足够，发送卖出预警
-                            notifier.send_price_alert(
-                                {**watch_price_info, 'threshold': sell_threshold,
-                                 'token_symbol': record.watch_token_symbol},
-                                record.name, True, 'sell')
-
-                            # 计算卖出比例
-                            actual_sell_percentage = record.sell_percentage
-
-                            # 检查是否需要全仓卖出
-                            if record.all_in_threshold > 0:
-                                if watch_price_info and watch_price_info['price']:
-                                    total_value = watch_token_balance * watch_price_info['price']
-                                    if total_value <= record.all_in_threshold:
-                                        actual_sell_percentage = 1.0
-                                        logging.info(f"波段监控 {record.name} 资产价值低于全仓阈值，全仓卖出")
-
-                            # 执行卖出交易：卖出监听代币换取交易代币
-                            result = self._execute_swing_trade(
-                                trader, record.watch_token_address, record.trade_token_address,
-                                actual_sell_percentage, 'sell', record, notifier, db
-                            )
-
-                            if result:
-                                logging.info(f"波段监控 {record.name} 卖出交易完成，设置60秒冷却期")
-                                # 设置交易冷却时间
-                                last_trade_time = time.time()
-                                # 在等待前更新数据库状态
-                                record.last_check_at = datetime.utcnow()
-                                db.commit()
-                                # 立即等待60秒
-                                logging.info(f"波段监控 {record.name} 开始60秒冷却等待...")
-                                time.sleep(60)
-                                logging.info(f"波段监控 {record.name} 冷却期结束，继续监控")
-                                continue  # 跳过本次循环的常规检查间隔
-
-                        except Exception as e:
-                            logging.error(f"波段监控 {record.name} 卖出执行失败: {e}")
-                            notifier.send_error_notification(f"波段卖出执行失败: {e}", record.name)
-                            # 卖出失败时也要等待一下，避免频繁重试
-                            time.sleep(record.check_interval)
-
-                    # 判断是否达到买入条件
-                    elif current_value <= buy_threshold:
-                        logging.info(
-                            f"波段监控 {record.name} 达到买入条件！当前{value_name}: ${current_value:,.2f}, 买入阈值: ${buy_threshold:,.2f}")
-
-                        try:
-                            # 检查交易代币余额（用交易代币买入监听代币）
-                            trade_token_balance = trader.get_token_balance(record.trade_token_address)
-                            if trade_token_balance <= 0:
-                                logging.info(f"波段监控 {record.name} 交易代币余额为0，跳过买入")
-                                time.sleep(record.check_interval)
-                                continue
-
-                            # 余额足够，发送买入预警
-                            notifier.send_price_alert(
-                                {**watch_price_info, 'threshold': buy_threshold,
-                                 'token_symbol': record.watch_token_symbol},
-                                record.name, True, 'buy')
-
-                            # 计算买入比例
-                            actual_buy_percentage = record.buy_percentage
-
-                            # 检查是否需要全仓买入
-                            if record.all_in_threshold > 0:
-                                trade_token_price_info = TokenAPI().get_market_data(
-                                    normalize_sol_address(record.trade_token_address))
-                                if trade_token_price_info and trade_token_price_info['price']:
-                                    total_value = trade_token_balance * trade_token_price_info['price']
-                                    if total_value <= record.all_in_threshold:
-                                        actual_buy_percentage = 1.0
-                                        logging.info(f"波段监控 {record.name} 资产价值低于全仓阈值，全仓买入")
-
-                            # 执行买入交易：用交易代币买入监听代币
-                            result = self._execute_swing_trade(
-                                trader, record.trade_token_address, record.watch_token_address,
-                                actual_buy_percentage, 'buy', record, notifier, db
-                            )
-
-                            if result:
-                                logging.info(f"波段监控 {record.name} 买入交易完成，设置60秒冷却期")
-                                # 设置交易冷却时间
-                                last_trade_time = time.time()
-                                # 在等待前更新数据库状态
-                                record.last_check_at = datetime.utcnow()
-                                db.commit()
-                                # 立即等待60秒
-                                logging.info(f"波段监控 {record.name} 开始60秒冷却等待...")
-                                time.sleep(60)
-                                logging.info(f"波段监控 {record.name} 冷却期结束，继续监控")
-                                continue  # 跳过本次循环的常规检查间隔
-
-                        except Exception as e:
-                            logging.error(f"波段监控 {record.name} 买入执行失败: {e}")
-                            notifier.send_error_notification(f"波段买入执行失败: {e}", record.name)
-                            # 买入失败时也要等待一下，避免频繁重试
-                            time.sleep(record.check_interval)
-
-                    else:
-                        # 价格在买入和卖出阈值之间，继续监控
-                        logging.debug(f"波段监控 {record.name} {value_name}在正常范围内，继续监控")
-
-                        # 检查是否需要发送价格变化通知
-                        notify, percent_change = self._should_send_price_update(record.watch_token_address,
-                                                                                current_value)
-                        if notify:
-                            notifier.send_price_alert(
-                                {**watch_price_info, 'threshold': sell_threshold,
-                                 'token_symbol': record.watch_token_symbol},
-                                record.name, False, 'swing', percent_change)
-
-                    time.sleep(record.check_interval)
+                    self._recovery_ready('swing', record_id)
+                    outcome = await engine.run_blocking(
+                        self._process_swing_tick, record, trader, notifier, watch_price_info,
+                        self._active_cooldown(*cooldown), pending_trade is not None)
+                    # 只冷却刚交易的方向，卖出后价格骤跌到买入阈值仍会立即买入
+                    action = 'sell' if self._is_triggered(watch_price_info, 'swing_sell', record_id) else 'buy'
+                    if isinstance(outcome, Future):
+                        pending_trade = (outcome, action)
+                        continue
+                    keep_running, cooldown = await self._settle_outcome(
+                        outcome, SwingMonitorRecord, record_id, action, cooldown)
+                    if not keep_running:
+                        break
 
                 except Exception as e:
                     logging.error(f"波段监控 {record.name} 过程中出错: {e}")
-                    record.status = "error"
-                    db.commit()
-                    time.sleep(record.check_interval)
+                    await engine.run_blocking(self._set_record_status, SwingMonitorRecord, record_id, "error")
+                    await asyncio.sleep(record.check_interval)
 
         except Exception as e:
-            logging.error(f"波段监控线程异常: {e}")
+            logging.error(f"波段监控任务异常: {e}")
         finally:
+            self._abandon_pending_trade(pending_trade, SwingMonitorRecord, record_id)
+            if subscription:
+                PriceBus().unsubscribe(subscription)
+            ThresholdIndex().remove_swing(record_id)
+            store.discard('swing', record_id, keep_pending=True)
+            self._recovery_ready('swing', record_id)
             # 清理状态
             if record_id in self.swing_monitor_states:
                 self.swing_monitor_states[record_id] = False
@@ -846,19 +1077,224 @@ class PriceMonitor:
                 del self.running_swing_monitors[record_id]
 
             # 更新数据库状态
-            try:
-                record = db.query(SwingMonitorRecord).filter(SwingMonitorRecord.id == record_id).first()
-                if record and record.status == "monitoring":
-                    record.status = "stopped"
-                    db.commit()
-            except:
-                logging.error(f"更新波段监控记录状态失败: {record_id}")
-            finally:
-                db.close()
+            await engine.run_blocking(self._set_record_status, SwingMonitorRecord, record_id, "stopped", "monitoring")
+
+    def _process_swing_tick(self, record, trader, notifier, watch_price_info: dict, cooldown_action: str = None,
+                            trade_pending: bool = False):
+        """处理波段监控的一条价格tick，返回(是否继续监控, 需要进入冷却的秒数)，触发交易时返回钱包交易队列中该结果的Future
+
+        cooldown_action为冷却中的交易方向，该方向的触发会被跳过；trade_pending表示上一笔交易仍在钱包队列中，期间不再触发
+        """
+        logging.info(
+            f"波段监控 {record.name} 开始新的循环迭代，时间: {datetime.utcnow().strftime('%H:%M:%S')}")
+
+        MonitorStateStore().record_seen('swing', record.id, last_check_at=datetime.utcnow(),
+                                        last_watch_price=watch_price_info['price'],
+                                        last_watch_market_cap=watch_price_info['market_cap'])
+
+        if record.price_type == "price":
+            current_value = watch_price_info['price']
+            sell_threshold = record.sell_threshold
+            buy_threshold = record.buy_threshold
+            value_name = "价格"
+            value_unit = "USD"
+        else:
+            current_value = watch_price_info['market_cap']
+            sell_threshold = record.sell_threshold
+            buy_threshold = record.buy_threshold
+            value_name = "市值"
+            value_unit = "USD"
+
+        logging.debug(
+            f"波段监控 {record.name} 当前{value_name}: ${current_value:,.2f}, 卖出阈值: ${sell_threshold:,.2f}, 买入阈值: ${buy_threshold:,.2f}")
+
+        # 记录监控日志
+        self._log_monitor_data(
+            record_id=record.id,
+            price_info=watch_price_info,
+            threshold=None,
+            monitor_type='swing',
+            price_type=record.price_type,
+            current_value=current_value,
+            sell_threshold=sell_threshold,
+            buy_threshold=buy_threshold,
+            action_type='monitoring',
+            action_taken=None,
+            watch_token_address=record.watch_token_address,
+            trade_token_address=record.trade_token_address
+        )
+
+        # 判断是否达到卖出条件
+        if self._is_triggered(watch_price_info, 'swing_sell', record.id):
+            if cooldown_action == 'sell':
+                logging.debug(f"波段监控 {record.name} 卖出冷却中，跳过本次触发")
+                return True, 0
+            if trade_pending:
+                logging.debug(f"波段监控 {record.name} 上一笔交易排队中，跳过本次触发")
+                return True, 0
+            logging.info(
+                f"波段监控 {record.name} 达到卖出条件！当前{value_name}: ${current_value:,.2f}, 卖出阈值: ${sell_threshold:,.2f}")
+
+            # 同一钱包的交易排队执行，出队时再读取余额
+            return WalletTradeQueue().submit(trader, functools.partial(
+                self._execute_swing_sell_trigger, record, trader, notifier, watch_price_info, sell_threshold),
+                record.name)
+
+        # 判断是否达到买入条件
+        elif self._is_triggered(watch_price_info, 'swing_buy', record.id):
+            if cooldown_action == 'buy':
+                logging.debug(f"波段监控 {record.name} 买入冷却中，跳过本次触发")
+                return True, 0
+            if trade_pending:
+                logging.debug(f"波段监控 {record.name} 上一笔交易排队中，跳过本次触发")
+                return True, 0
+            logging.info(
+                f"波段监控 {record.name} 达到买入条件！当前{value_name}: ${current_value:,.2f}, 买入阈值: ${buy_threshold:,.2f}")
+
+            # 同一钱包的交易排队执行，出队时再读取余额
+            return WalletTradeQueue().submit(trader, functools.partial(
+                self._execute_swing_buy_trigger, record, trader, notifier, watch_price_info, buy_threshold),
+                record.name)
+
+        else:
+            # 价格在买入和卖出阈值之间，继续监控
+            logging.debug(f"波段监控 {record.name} {value_name}在正常范围内，继续监控")
+
+            # 检查是否需要发送价格变化通知
+            notify, percent_change = self._should_send_price_update(record.watch_token_address,
+                                                                    current_value)
+            if notify:
+                notifier.send_price_alert(
+                    {**watch_price_info, 'threshold': sell_threshold,
+                     'token_symbol': record.watch_token_symbol},
+                    record.name, False, 'swing', percent_change)
+
+        return True, 0
+
+    def _execute_swing_sell_trigger(self, record, trader, notifier, watch_price_info: dict,
+                                    sell_threshold: float) -> tuple:
+        """钱包队列中执行的波段卖出：按出队时的监听代币余额计算卖出数量"""
+        try:
+            # 检查监听代币余额（卖出监听代币）
+            watch_token_balance = trader.get_token_balance(record.watch_token_address)
+            if watch_token_balance <= 0:
+                logging.info(f"波段监控 {record.name} 监听代币余额为0，跳过卖出")
+                return True, 0
+
+            # 余额足够，发送卖出预警
+            notifier.send_price_alert(
+                {**watch_price_info, 'threshold': sell_threshold,
+                 'token_symbol': record.watch_token_symbol},
+                record.name, True, 'sell')
+
+            # 计算卖出比例，资产价值低于全仓阈值时全仓卖出
+            actual_sell_percentage = self._swing_trade_percentage(
+                record.sell_percentage, record.all_in_threshold, watch_token_balance, watch_price_info['price'])
+            if actual_sell_percentage > record.sell_percentage:
+                logging.info(f"波段监控 {record.name} 资产价值低于全仓阈值，全仓卖出")
+
+            # 执行卖出交易：卖出监听代币换取交易代币
+            result = self._execute_swing_trade(
+                trader, record.watch_token_address, record.trade_token_address,
+                actual_sell_percentage, 'sell', record, notifier
+            )
+
+            if result:
+                logging.info(f"波段监控 {record.name} 卖出交易已提交，卖出进入{TRADE_COOLDOWN_SECONDS}秒冷却")
+                MonitorStateStore().record_seen('swing', record.id, last_check_at=datetime.utcnow())
+                return True, TRADE_COOLDOWN_SECONDS
+
+        except Exception as e:
+            logging.error(f"波段监控 {record.name} 卖出执行失败: {e}")
+            notifier.send_error_notification(f"波段卖出执行失败: {e}", record.name)
+            # 卖出失败时也要等待一下，避免频繁重试
+            return True, record.check_interval
+        return True, 0
+
+    def _execute_swing_buy_trigger(self, record, trader, notifier, watch_price_info: dict,
+                                   buy_threshold: float) -> tuple:
+        """钱包队列中执行的波段买入：按出队时的交易代币余额计算买入数量"""
+        try:
+            # 检查交易代币余额（用交易代币买入监听代币）
+            trade_token_balance = trader.get_token_balance(record.trade_token_address)
+            if trade_token_balance <= 0:
+                logging.info(f"波段监控 {record.name} 交易代币余额为0，跳过买入")
+                return True, 0
+
+            # 余额足够，发送买入预警
+            notifier.send_price_alert(
+                {**watch_price_info, 'threshold': buy_threshold,
+                 'token_symbol': record.watch_token_symbol},
+                record.name, True, 'buy')
+
+            # 计算买入比例，资产价值低于全仓阈值时全仓买入，只有设置了全仓阈值才查询交易代币价格
+            trade_token_price = None
+            if record.all_in_threshold > 0:
+                trade_token_price_info = TokenAPI().get_market_data(
+                    normalize_sol_address(record.trade_token_address))
+                trade_token_price = trade_token_price_info['price'] if trade_token_price_info else None
+            actual_buy_percentage = self._swing_trade_percentage(
+                record.buy_percentage, record.all_in_threshold, trade_token_balance, trade_token_price)
+            if actual_buy_percentage > record.buy_percentage:
+                logging.info(f"波段监控 {record.name} 资产价值低于全仓阈值，全仓买入")
+
+            # 执行买入交易：用交易代币买入监听代币
+            result = self._execute_swing_trade(
+                trader, record.trade_token_address, record.watch_token_address,
+                actual_buy_percentage, 'buy', record, notifier
+            )
+
+            if result:
+                logging.info(f"波段监控 {record.name} 买入交易已提交，买入进入{TRADE_COOLDOWN_SECONDS}秒冷却")
+                MonitorStateStore().record_seen('swing', record.id, last_check_at=datetime.utcnow())
+                return True, TRADE_COOLDOWN_SECONDS
+
+        except Exception as e:
+            logging.error(f"波段监控 {record.name} 买入执行失败: {e}")
+            notifier.send_error_notification(f"波段买入执行失败: {e}", record.name)
+            # 买入失败时也要等待一下，避免频繁重试
+            return True, record.check_interval
+        return True, 0
+
+    def _on_swing_trade_resolved(self, notifier: Notifier, action_type: str, trade_amount: float,
+                                 estimated_usd_value: float, trade: dict, confirmation):
+        """波段交易确认回调：发送交易通知并记录交易日志"""
+        error = confirmation.exception()
+        if error:
+            logging.error(f"波段监控 {trade['name']} {action_type} 交易未能确认: {error}")
+            notifier.send_error_notification(f"波段{action_type}交易失败: {error}", trade['name'])
+            return
+        tx_hash = confirmation.signature
+        logging.info(f"波段监控 {trade['name']} {action_type} 交易成功: {tx_hash}")
+        action_name = "买入" if action_type == 'buy' else "卖出"
+        notifier.send_trade_notification(
+            tx_hash, trade_amount, estimated_usd_value, trade['name'], trade['pair'], action_type=action_type
+        )
+        # 记录交易日志
+        watch_price_info = TokenAPI().get_market_data(normalize_sol_address(trade['watch_token_address']))
+        if watch_price_info:
+            current_value = watch_price_info['price'] if trade['price_type'] == 'price' else watch_price_info[
+                'market_cap']
+            self._log_monitor_data(
+                record_id=trade['record_id'],
+                price_info=watch_price_info,
+                threshold=None,
+                monitor_type='swing',
+                price_type=trade['price_type'],
+                current_value=current_value,
+                sell_threshold=trade['sell_threshold'],
+                buy_threshold=trade['buy_threshold'],
+                action_type=action_type,
+                action_taken=f"波段{action_name}",
+                tx_hash=tx_hash,
+                transaction_usd=estimated_usd_value,
+                watch_token_address=trade['watch_token_address'],
+                trade_token_address=trade['trade_token_address']
+            )
 
     def _execute_swing_trade(self, trader: SolanaTrader, from_token: str, to_token: str,
-                             percentage: float, action_type: str, record: SwingMonitorRecord,
-                             notifier: Notifier, db) -> bool:
+                             percentage: float, action_type: str, record: SwingMonitorSnapshot,
+                             notifier: Notifier) -> bool:
         """执行波段交易"""
         try:
             from_balance = trader.get_token_balance(from_token)
@@ -879,42 +1315,23 @@ class PriceMonitor:
                 notifier.send_error_notification(f"波段{action_type}报价失败: {error_msg}", record.name)
                 return False
 
-            tx_hash = trader.execute_swap(quote)
-            if isinstance(tx_hash, str) and tx_hash:
-                logging.info(f"波段监控 {record.name} {action_type} 交易成功: {tx_hash}")
-                action_name = "买入" if action_type == 'buy' else "卖出"
+            pending = trader.submit_swap(quote, fee_type='swing')
+            if isinstance(pending, PendingTransaction):
+                logging.info(f"波段监控 {record.name} {action_type} 交易已提交，等待确认: {pending.signature}")
+                WalletTradeQueue().hold(trader, pending)
                 from_symbol = record.watch_token_symbol if from_token == record.watch_token_address else record.trade_token_symbol
                 to_symbol = record.trade_token_symbol if to_token == record.trade_token_address else record.watch_token_symbol
-                notifier.send_trade_notification(
-                    tx_hash, trade_amount, estimated_usd_value,
-                    record.name, f"{from_symbol}→{to_symbol}", action_type=action_type
-                )
-                # 记录交易日志
-                watch_price_info = TokenAPI().get_market_data(normalize_sol_address(record.watch_token_address))
-                if watch_price_info:
-                    current_value = watch_price_info['price'] if record.price_type == 'price' else watch_price_info[
-                        'market_cap']
-                    self._log_monitor_data(
-                        record_id=record.id,
-                        price_info=watch_price_info,
-                        threshold=None,
-                        monitor_type='swing',
-                        price_type=record.price_type,
-                        current_value=current_value,
-                        sell_threshold=record.sell_threshold,
-                        buy_threshold=record.buy_threshold,
-                        action_type=action_type,
-                        action_taken=f"波段{action_name}",
-                        tx_hash=tx_hash,
-                        transaction_usd=estimated_usd_value,
-                        watch_token_address=record.watch_token_address,
-                        trade_token_address=record.trade_token_address
-                    )
-                logging.info(f"波段监控 {record.name} {action_type} _execute_swing_trade 返回 True")
+                # 确认后的通知和交易日志在回调中执行，回调只带走普通值
+                pending.add_done_callback(functools.partial(
+                    self._on_swing_trade_resolved, notifier, action_type, trade_amount, estimated_usd_value,
+                    dict(record_id=record.id, name=record.name, pair=f"{from_symbol}→{to_symbol}",
+                         price_type=record.price_type, sell_threshold=record.sell_threshold,
+                         buy_threshold=record.buy_threshold, watch_token_address=record.watch_token_address,
+                         trade_token_address=record.trade_token_address)))
                 return True
             else:
-                if isinstance(tx_hash, dict) and "error" in tx_hash:
-                    error_msg = tx_hash["error"]
+                if isinstance(pending, dict) and "error" in pending:
+                    error_msg = pending["error"]
                 else:
                     error_msg = "交易执行失败"
                 logging.error(f"波段监控 {record.name} {action_type} 交易失败: {error_msg}")
@@ -0,0 +1,120 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from config.config_manager import ConfigManager
+from core.monitor_engine import MonitorEngine
+from core.trader import PreparedSwap
+
+
+class QuotePrewarmer:
+    """临近阈值时的报价预热 - 单例模式
+
+    监控市值进入阈值附近QUOTE_PREWARM_BAND_PERCENT%的区间后，每隔QUOTE_PREWARM_REFRESH_SECONDS秒
+    在后台工作线程中按计划交易数量重新获取Jupiter报价并构建未签名交易；
+    触发时若预热结果未超过QUOTE_PREWARM_MAX_AGE_SECONDS秒且数量一致，只需签名发送。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._prepared: Dict[int, PreparedSwap] = {}
+            self._refreshing: Set[int] = set()
+            self._state_lock = threading.Lock()
+            self.prepared_count = 0
+            self.taken_count = 0
+            self.expired_count = 0
+            self.refresh_config()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新预热区间与刷新间隔配置"""
+        self.band = max(ConfigManager.get_float('QUOTE_PREWARM_BAND_PERCENT', 3), 0) / 100
+        self.refresh_interval = max(ConfigManager.get_float('QUOTE_PREWARM_REFRESH_SECONDS', 3), 1)
+        self.max_age = max(ConfigManager.get_float('QUOTE_PREWARM_MAX_AGE_SECONDS', 10), 1)
+        logging.info(f"QuotePrewarmer配置已刷新，预热区间: {self.band * 100:.1f}%，"
+                     f"刷新间隔: {self.refresh_interval:.0f}秒")
+
+    def in_band(self, side: str, market_cap: Optional[float], threshold: float) -> bool:
+        """市值尚未触发但已进入阈值附近的区间，卖出从下方接近，买入从上方接近"""
+        if self.band <= 0 or market_cap is None or not threshold:
+            return False
+        if side == 'buy':
+            return threshold < market_cap <= threshold * (1 + self.band)
+        return threshold * (1 - self.band) <= market_cap < threshold
+
+    def refresh(self, record_id: int, prepare: Callable[[], Optional[PreparedSwap]]):
+        """预热结果过期时提交后台刷新，同一监控同时只有一个刷新任务"""
+        with self._state_lock:
+            prepared = self._prepared.get(record_id)
+            if record_id in self._refreshing or (prepared and prepared.age() < self.refresh_interval):
+                return
+            self._refreshing.add(record_id)
+        MonitorEngine().executor.submit(self._run_prepare, record_id, prepare)
+
+    def _run_prepare(self, record_id: int, prepare: Callable[[], Optional[PreparedSwap]]):
+        try:
+            prepared = prepare()
+            with self._state_lock:
+                if prepared is not None:
+                    self._prepared[record_id] = prepared
+                    self.prepared_count += 1
+                else:
+                    self._prepared.pop(record_id, None)
+        except Exception as e:
+            logging.debug(f"预热报价失败 [{record_id}]: {e}")
+        finally:
+            with self._state_lock:
+                self._refreshing.discard(record_id)
+
+    def take(self, record_id: int) -> Optional[PreparedSwap]:
+        """取出预热结果，交易只能使用一次；超过最长有效期的结果直接丢弃"""
+        with self._state_lock:
+            prepared = self._prepared.pop(record_id, None)
+        if prepared is None:
+            return None
+        if prepared.age() > self.max_age:
+            self.expired_count += 1
+            return None
+        self.taken_count += 1
+        return prepared
+
+    def discard(self, record_id: int):
+        """市值离开预热区间或监控停止时丢弃预热结果"""
+        with self._state_lock:
+            self._prepared.pop(record_id, None)
+
+    def get_stats(self) -> Dict:
+        """获取预热中的监控数量与使用统计"""
+        with self._state_lock:
+            return {
+                "prepared": {
+                    str(record_id): {
+                        "input_mint": prepared.input_mint,
+                        "output_mint": prepared.output_mint,
+                        "amount": prepared.amount,
+                        "age_ms": int(prepared.age() * 1000)
+                    }
+                    for record_id, prepared in self._prepared.items()
+                },
+                "refreshing": len(self._refreshing),
+                "prepared_total": self.prepared_count,
+                "taken": self.taken_count,
+                "expired": self.expired_count,
+                "band_percent": self.band * 100
+            }
@@ -0,0 +1,250 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from core.monitor_engine import MonitorEngine
+from core.trader import SOL_MINT, PendingTransaction
+from core.wallet_queue import WalletTradeQueue
+
+# 分片模式：none(一次卖出)、twap(按时间窗口均分)、impact(按价格影响上限控制每片大小)
+SLICE_MODES = ('none', 'twap', 'impact')
+# 按价格影响分片时，单个子订单缩小数量后重新报价的最多次数
+MAX_IMPACT_REQUOTES = 4
+# 保留最近完成的分片执行记录数量
+MAX_SLICE_HISTORY = 50
+
+
+class SlicePlan:
+    """分片出售计划：子订单数量、时间窗口与价格影响上限"""
+
+    def __init__(self, mode: str, count: int, window_seconds: float, max_price_impact: float):
+        self.mode = mode
+        self.count = count
+        self.window_seconds = window_seconds
+        # 百分比，例如2表示2%
+        self.max_price_impact = max_price_impact
+
+    @classmethod
+    def from_record(cls, record) -> Optional['SlicePlan']:
+        """根据监控记录生成分片计划，未开启分片时返回None"""
+        mode = getattr(record, 'sell_slice_mode', None) or 'none'
+        count = max(int(getattr(record, 'sell_slice_count', None) or 1), 1)
+        if mode == 'twap' and count > 1:
+            return cls(mode, count, max(getattr(record, 'sell_slice_window', None) or 0, 0), 0.0)
+        max_price_impact = getattr(record, 'max_price_impact', None) or 0.0
+        if mode == 'impact' and max_price_impact > 0:
+            return cls(mode, count, max(getattr(record, 'sell_slice_window', None) or 0, 0), max_price_impact)
+        return None
+
+    @property
+    def interval(self) -> float:
+        """相邻子订单的间隔，第一片立即执行，最后一片在时间窗口结束时执行"""
+        return self.window_seconds / (self.count - 1) if self.count > 1 else 0.0
+
+
+class SliceExecution:
+    """一次分片出售的执行状态，记录每个子订单的预期与实际到账SOL"""
+
+    def __init__(self, record_id: int, name: str, token_address: str, total_amount: float, plan: SlicePlan):
+        self.record_id = record_id
+        self.name = name
+        self.token_address = token_address
+        self.total_amount = total_amount
+        self.plan = plan
+        self.children: List[Dict] = []
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def sold_amount(self) -> float:
+        return sum(child['amount'] for child in self.children)
+
+    @property
+    def expected_sol(self) -> float:
+        return sum(child['expected_sol'] for child in self.children)
+
+    @property
+    def realized_sol(self) -> float:
+        """实际到账SOL，查不到交易详情的子订单按报价计"""
+        return sum(child['realized_sol'] if child['realized_sol'] is not None else child['expected_sol']
+                   for child in self.children)
+
+    def to_dict(self) -> Dict:
+        return {
+            "record_id": self.record_id,
+            "name": self.name,
+            "token_address": self.token_address,
+            "mode": self.plan.mode,
+            "status": self.status,
+            "error": self.error,
+            "total_amount": self.total_amount,
+            "sold_amount": self.sold_amount,
+            "expected_sol": self.expected_sol,
+            "realized_sol": self.realized_sol,
+            "children": list(self.children),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class SlicedSeller:
+    """分片出售执行器 - 单例模式
+
+    大额卖出拆成多个子订单依次执行：twap模式在时间窗口内均分，impact模式每片按报价的priceImpactPct
+    缩小到价格影响上限以内。执行过程作为协程运行在监控引擎的事件循环上，报价、提交等阻塞操作交给工作线程，
+    等待确认期间不占用线程，不会阻塞其他监控的价格轮询。子订单经钱包交易队列提交，与同一钱包的其他交易依次执行，
+    每个子订单确认后记录报价预期与链上实际到账的SOL。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._executions: Dict[int, SliceExecution] = {}
+            self._history = deque(maxlen=MAX_SLICE_HISTORY)
+            self._state_lock = threading.Lock()
+            self._initialized = True
+
+    def is_running(self, record_id: int) -> bool:
+        with self._state_lock:
+            return record_id in self._executions
+
+    def start(self, record_id: int, name: str, trader, token_address: str, total_amount: float, plan: SlicePlan,
+              on_child: Callable[[SliceExecution, Dict], None],
+              on_finished: Callable[[SliceExecution], None]) -> bool:
+        """开始分片出售，同一监控同时只能有一个分片执行；回调在工作线程中执行"""
+        execution = SliceExecution(record_id, name, token_address, total_amount, plan)
+        with self._state_lock:
+            if record_id in self._executions:
+                return False
+            self._executions[record_id] = execution
+        logging.info(f"✂️ 【{name}】开始分片出售 {total_amount} 个代币，模式: {plan.mode}，最多 {plan.count} 片")
+        MonitorEngine().submit(self._run(execution, trader, on_child, on_finished))
+        return True
+
+    def cancel(self, record_id: int):
+        """监控停止时取消尚未提交的子订单，已提交的子订单仍会等待确认"""
+        with self._state_lock:
+            execution = self._executions.get(record_id)
+        if execution is not None:
+            execution.cancelled = True
+
+    async def _run(self, execution: SliceExecution, trader, on_child, on_finished):
+        engine = MonitorEngine()
+        plan = execution.plan
+        try:
+            decimals = await engine.run_blocking(trader.get_token_decimals, execution.token_address)
+            remaining = int(execution.total_amount * (10 ** decimals))
+            for index in range(plan.count):
+                if execution.cancelled:
+                    execution.status = "stopped"
+                    break
+                if remaining <= 0:
+                    break
+                if index > 0 and plan.interval > 0:
+                    await asyncio.sleep(plan.interval)
+                    if execution.cancelled:
+                        execution.status = "stopped"
+                        break
+                # 子订单和同一钱包的其他交易一起排队
+                submitted = await asyncio.wrap_future(WalletTradeQueue().submit(trader, functools.partial(
+                    self._submit_child, trader, execution.token_address, remaining, plan.count - index, plan),
+                    execution.name))
+                if submitted is None:
+                    # 价格影响始终超过上限，本片跳过，等待下一片时再尝试
+                    logging.warning(f"✂️ 【{execution.name}】第 {index + 1} 片价格影响超过上限，跳过")
+                    continue
+                if isinstance(submitted, str):
+                    raise Exception(submitted)
+                quote, pending, amount = submitted
+                await asyncio.wrap_future(pending)
+                realized_sol = await engine.run_blocking(trader.get_realized_sol_change, pending.signature)
+                remaining -= amount
+                child = {
+                    "index": index + 1,
+                    "amount": amount / (10 ** decimals),
+                    "expected_sol": int(quote['outAmount']) / 1e9,
+                    "realized_sol": realized_sol,
+                    "price_impact_pct": float(quote.get('priceImpactPct') or 0) * 100,
+                    "tx_hash": pending.signature
+                }
+                execution.children.append(child)
+                logging.info(f"✂️ 【{execution.name}】第 {child['index']}/{plan.count} 片已确认，"
+                             f"预期 {child['expected_sol']:.6f} SOL，实际 "
+                             f"{realized_sol if realized_sol is not None else child['expected_sol']:.6f} SOL")
+                await engine.run_blocking(on_child, execution, child)
+            if execution.status == "running":
+                execution.status = "completed" if remaining <= 0 else "partial"
+        except Exception as e:
+            execution.status = "failed"
+            execution.error = str(e)
+            logging.error(f"✂️ 【{execution.name}】分片出售失败: {e}")
+        finally:
+            execution.finished_at = time.time()
+            with self._state_lock:
+                self._executions.pop(execution.record_id, None)
+                self._history.appendleft(execution)
+            try:
+                await engine.run_blocking(on_finished, execution)
+            except Exception as e:
+                logging.error(f"分片出售完成回调失败: {e}")
+
+    @staticmethod
+    def _submit_child(trader, token_address: str, remaining: int, children_left: int, plan: SlicePlan):
+        """报价并提交一个子订单，返回(报价, PendingTransaction, 数量)；价格影响无法满足时返回None，失败返回错误信息"""
+        if plan.mode == 'twap':
+            amount = remaining // children_left if children_left > 1 else remaining
+            quote = trader.get_quote(token_address, SOL_MINT, amount)
+        else:
+            # 先按剩余全部数量报价，超过价格影响上限时按比例缩小重新报价
+            amount = remaining
+            quote = None
+            for _ in range(MAX_IMPACT_REQUOTES + 1):
+                quote = trader.get_quote(token_address, SOL_MINT, amount)
+                if not quote or "error" in quote:
+                    break
+                # Jupiter返回的priceImpactPct是小数，0.01表示1%
+                impact = float(quote.get('priceImpactPct') or 0) * 100
+                if impact <= plan.max_price_impact:
+                    break
+                amount = int(amount * min(0.9 * plan.max_price_impact / impact, 0.9))
+                quote = None
+                if amount <= 0:
+                    break
+            if quote is None:
+                return None
+        if not quote or "error" in quote:
+            return f"获取交易报价失败: {quote.get('error') if quote else '无报价'}"
+        pending = trader.submit_swap(quote, fee_type='normal')
+        if not isinstance(pending, PendingTransaction):
+            return pending.get('error') if isinstance(pending, dict) else "交易执行失败"
+        WalletTradeQueue().hold(trader, pending)
+        return quote, pending, amount
+
+    def get_stats(self) -> Dict:
+        """获取进行中与最近完成的分片出售"""
+        with self._state_lock:
+            return {
+                "running": [execution.to_dict() for execution in self._executions.values()],
+                "recent": [execution.to_dict() for execution in self._history]
+            }
@@ -1,16 +1,17 @@
 import base64
+import functools
 import logging
+import threading
 import time
 from typing import Dict, Optional
 
 import base58
-import requests
 import solders
 from solana.rpc.api import Client
-from solana.rpc.commitment import Processed
 from solana.rpc.types import TxOpts
 from solders.keypair import Keypair
 from solders.message import Message
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
 from solders.pubkey import Pubkey
 from solders.system_program import TransferParams, transfer as system_transfer
 from solders.transaction import Transaction
@@ -20,6 +21,12 @@ from spl.token.constants import WRAPPED_SOL_MINT
 from spl.token.instructions import create_idempotent_associated_token_account, \
     transfer, TransferParams as TokenTransferParams
 
+from core.balance_cache import BalanceCache
+from core.blockhash_cache import BlockhashCache
+from core.confirmation_tracker import ConfirmationTracker, PendingTransaction
+from core.fee_estimator import PriorityFeeEstimator
+from services.http_client import HttpClient
+from services.mint_cache import MintInfoCache
 from services.token_api import TokenAPI
 from utils import normalize_sol_address
 
@@ -34,13 +41,47 @@ from database.models import MonitorRecord, SessionLocal
 
 
 service_fee= 0.000896  # 默认服务费，单位为SOL
+SOL_MINT = "So11111111111111111111111111111111111111112"
+# 预估计算单元：Jupiter交换按常见路由估算，由Jupiter模拟后设置实际上限；转账直接作为上限
+SWAP_COMPUTE_UNITS = 300_000
+SOL_TRANSFER_COMPUTE_UNITS = 1_000
+TOKEN_TRANSFER_COMPUTE_UNITS = 20_000
+CREATE_ATA_COMPUTE_UNITS = 40_000
+
+
+class PreparedSwap:
+    """预先准备好的交换：Jupiter报价和尚未签名的交易"""
+
+    def __init__(self, input_mint: str, output_mint: str, amount: int, quote: Dict,
+                 transaction: VersionedTransaction, last_valid_block_height: int = 0):
+        self.input_mint = input_mint
+        self.output_mint = output_mint
+        self.amount = amount
+        self.quote = quote
+        self.transaction = transaction
+        self.last_valid_block_height = last_valid_block_height
+        self.prepared_at = time.time()
+
+    def age(self) -> float:
+        return time.time() - self.prepared_at
+
+    def matches(self, input_mint: str, output_mint: str, amount: int) -> bool:
+        """交易方向和数量与实际要执行的交换完全一致时才能直接使用"""
+        return (self.input_mint, self.output_mint, self.amount) == (input_mint, output_mint, amount)
+
+
 class SolanaTrader:
     """Solana交易器"""
 
+    # 按RPC地址共享的RPC客户端，所有交易器复用同一个HTTP连接池
+    _rpc_clients: Dict[str, Client] = {}
+    _rpc_clients_lock = threading.Lock()
+
     def __init__(self, private_key: str = None):
         self._private_key = private_key
         self.wallet = None
         # 配置缓存
+        self._rpc_url = None
         self._client_cache = None
         self._jupiter_url_cache = None
         self._slippage_bps_cache = None
@@ -53,13 +94,23 @@ class SolanaTrader:
 
     def refresh_config(self):
         """刷新配置缓存 - 可通过Web界面的刷新按钮调用"""
-        rpc_url = ConfigManager.get_config('RPC_URL', 'https://api.mainnet-beta.solana.com')
-        self._client_cache = Client(rpc_url)
-        self._jupiter_url_cache = ConfigManager.get_config('JUPITER_API_URL', 'https://quote-api.jup.ag/v6')
-        self._slippage_bps_cache = ConfigManager.get_config('SLIPPAGE_BPS', 100)
+        self._rpc_url = ConfigManager.get_str('RPC_URL', 'https://api.mainnet-beta.solana.com')
+        self._client_cache = self._shared_client(self._rpc_url)
+        self._jupiter_url_cache = ConfigManager.get_str('JUPITER_API_URL', 'https://quote-api.jup.ag/v6')
+        self._slippage_bps_cache = ConfigManager.get_int('SLIPPAGE_BPS', 100)
         self._last_config_update = time.time()
         logging.info("SolanaTrader配置已刷新")
 
+    @classmethod
+    def _shared_client(cls, rpc_url: str) -> Client:
+        """获取RPC地址对应的共享客户端，不存在时创建"""
+        with cls._rpc_clients_lock:
+            client = cls._rpc_clients.get(rpc_url)
+            if client is None:
+                client = Client(rpc_url)
+                cls._rpc_clients[rpc_url] = client
+            return client
+
     @property
     def client(self):
         """获取Solana客户端，使用缓存机制提高性能"""
@@ -67,6 +118,11 @@ class SolanaTrader:
             self.refresh_config()
         return self._client_cache
 
+    def _recent_blockhash(self) -> tuple:
+        """从后台预取的缓存读取最新区块哈希，返回(区块哈希, 最后有效区块高度)，两者来自同一次获取"""
+        latest = BlockhashCache().get(self._rpc_url, self.client)
+        return latest.blockhash, latest.last_valid_block_height
+
     @property
     def jupiter_url(self):
         """获取Jupiter API URL，使用缓存机制提高性能"""
@@ -115,16 +171,27 @@ class SolanaTrader:
                 logging.debug(f"检测到SOL地址，直接调用get_sol_balance()")
                 return self.get_sol_balance() - service_fee * 3
 
+            try:
+                return BalanceCache().get(self._rpc_url, self.wallet.pubkey()).get_token_balance(token_address)
+            except Exception as e:
+                logging.warning(f"读取钱包余额快照失败，改为单独查询: {e}")
+                return self._get_token_balance_rpc(token_address)
+        except Exception as e:
+            logging.error(f"获取代币余额失败: {e}")
+            return 0.0
+
+    def _get_token_balance_rpc(self, token_address: str) -> float:
+        """不经过余额快照，直接查询代币账户余额"""
+        try:
             token_mint = Pubkey.from_string(token_address)
             wallet_pubkey = self.wallet.pubkey()
 
             # 使用关联token账户地址获取余额
             try:
-                from spl.token.instructions import get_associated_token_address
-                from spl.token.constants import TOKEN_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID
-                mint_program_id = self.client.get_account_info(token_mint).value.owner
-                # 计算关联token账户地址
-                ata = get_associated_token_address(wallet_pubkey, token_mint, mint_program_id)
+                # 关联token账户地址按(钱包, 代币)缓存
+                ata = MintInfoCache().get_ata(wallet_pubkey, token_address)
+                if ata is None:
+                    raise Exception(f"链上未找到代币mint: {token_address}")
                 # 直接获取关联token账户余额
                 balance_response = self.client.get_token_account_balance(ata)
                 if balance_response.value:
@@ -162,6 +229,11 @@ class SolanaTrader:
         if not self.wallet:
             return 0.0
 
+        try:
+            return BalanceCache().get(self._rpc_url, self.wallet.pubkey()).sol_balance
+        except Exception as e:
+            logging.warning(f"读取钱包余额快照失败，改为单独查询: {e}")
+
         try:
             response = self.client.get_balance(self.wallet.pubkey())
             return float(response.value) / 1e9  # 转换为SOL
@@ -180,7 +252,7 @@ class SolanaTrader:
                 'slippageBps': self.slippage_bps
             }
 
-            response = requests.get(url, params=params)
+            response = HttpClient().get(url, params=params)
             response.raise_for_status()
 
             return response.json()
@@ -198,87 +270,163 @@ class SolanaTrader:
                 pass
             return {"error": str(e)}
 
-    def execute_swap(self, quote_data: Dict) -> Optional[str]:
-        """执行交换交易"""
+    def execute_swap(self, quote_data: Dict, fee_type: str = 'manual') -> Optional[str]:
+        """执行交换交易，提交后立即返回交易哈希，确认由ConfirmationTracker在后台跟踪"""
+        pending = self.submit_swap(quote_data, fee_type)
+        return pending.signature if isinstance(pending, PendingTransaction) else pending
+
+    def submit_swap(self, quote_data: Dict, fee_type: str = 'manual'):
+        """构建、签名并提交交换交易，成功返回PendingTransaction，失败返回包含error的字典
+
+        fee_type为normal/swing/manual，决定优先费使用的百分位数和上限。
+        """
         if not self.wallet:
             logging.error("钱包未初始化，无法执行交易")
             return None
 
         try:
-            # 获取交易数据
-            swap_url = f"{self.jupiter_url}/swap"
-            # 只传quote['quote']部分，确保字段正确
-            quote_response = quote_data.get('quote') if 'quote' in quote_data else quote_data
-            swap_data = {
-                'quoteResponse': quote_response,
-                'userPublicKey': str(self.wallet.pubkey()),
-                'wrapAndUnwrapSol': True
-            }
-
-            headers = {
-                'Content-Type': 'application/json'
-            }
-
-            response = requests.request("POST", swap_url, headers=headers, json=swap_data)
-            logging.debug(f"Jupiter API响应: {response.json()}")
-            response = response.json()
-
-            if 'swapTransaction' not in response:
-                logging.error("响应中未找到swapTransaction字段")
+            swap_response = self._build_swap_transaction(quote_data, fee_type)
+            if swap_response is None:
                 return None
+            return self._send_swap_transaction(*swap_response)
+        except Exception as e:
+            return self._swap_error(e)
+
+    def _build_swap_transaction(self, quote_data: Dict, fee_type: str = 'manual') -> Optional[tuple]:
+        """向Jupiter请求未签名的交换交易，返回(交易, 最后有效区块高度)"""
+        # 获取交易数据
+        swap_url = f"{self.jupiter_url}/swap"
+        # 只传quote['quote']部分，确保字段正确
+        quote_response = quote_data.get('quote') if 'quote' in quote_data else quote_data
+        swap_data = {
+            'quoteResponse': quote_response,
+            'userPublicKey': str(self.wallet.pubkey()),
+            'wrapAndUnwrapSol': True,
+            # 由Jupiter模拟交易后设置计算单元上限
+            'dynamicComputeUnitLimit': True
+        }
+        priority_fee = PriorityFeeEstimator().estimate_total_lamports(
+            self._swap_fee_accounts(quote_response), SWAP_COMPUTE_UNITS, fee_type)
+        if priority_fee > 0:
+            swap_data['prioritizationFeeLamports'] = priority_fee
 
-            # 使用VersionedTransaction处理交易
-            swap_transaction = VersionedTransaction.from_bytes(base64.b64decode(response['swapTransaction']))
+        headers = {
+            'Content-Type': 'application/json'
+        }
 
-            # 获取最新的blockhash
-            blockhash_response = self.client.get_latest_blockhash()
-            recent_blockhash = blockhash_response.value.blockhash
-            logging.debug(f"Recent blockhash: {recent_blockhash}")
+        response = HttpClient().post(swap_url, headers=headers, json=swap_data)
+        logging.debug(f"Jupiter API响应: {response.json()}")
+        response = response.json()
+
+        if 'swapTransaction' not in response:
+            logging.error("响应中未找到swapTransaction字段")
+            return None
 
+        # 使用VersionedTransaction处理交易
+        swap_transaction = VersionedTransaction.from_bytes(base64.b64decode(response['swapTransaction']))
+        return swap_transaction, response.get('lastValidBlockHeight', 0)
+
+    @staticmethod
+    def _swap_fee_accounts(quote_response: Dict) -> list:
+        """优先费采样账户：交易的代币mint在前（作为采样窗口的分组），其后是路由经过的可写池子"""
+        input_mint, output_mint = quote_response.get('inputMint'), quote_response.get('outputMint')
+        accounts = [output_mint if input_mint == SOL_MINT else input_mint]
+        for route in quote_response.get('routePlan') or []:
+            accounts.append((route.get('swapInfo') or {}).get('ammKey'))
+        return [account for account in accounts if account]
+
+    def _compute_budget_instructions(self, accounts: list, compute_units: int, fee_type: str = 'manual') -> list:
+        """转账的计算单元上限和价格指令，价格由优先费估算器给出"""
+        instructions = [set_compute_unit_limit(compute_units)]
+        price = PriorityFeeEstimator().estimate(accounts, compute_units, fee_type)
+        if price > 0:
+            instructions.append(set_compute_unit_price(price))
+        return instructions
+
+    def _send_swap_transaction(self, swap_transaction: VersionedTransaction, last_valid_block_height: int = 0):
+        """签名交换交易并广播到全部RPC节点，提交后返回PendingTransaction，失败返回包含error的字典"""
+        try:
+            # Jupiter返回的交易已包含区块哈希，直接签名即可
             # 签名交易
             signature = self.wallet.sign_message(solders.message.to_bytes_versioned(swap_transaction.message))
             signed_tx = VersionedTransaction.populate(swap_transaction.message, [signature])
 
-            # 使用重试机制发送交易
-            for attempts in range(5):
-                try:
-                    txid = self.client.send_transaction(
-                        signed_tx,
-                        opts=TxOpts(skip_confirmation=False, preflight_commitment=Processed)
-                    ).value
-                    logging.info(f"交易成功发送，ID: {txid}")
-                    return str(txid)  # 转换为字符串
-                except Exception as e:
-                    err_str = str(e)
-                    # 如果包含insufficient lamports错误，直接返回失败
-                    if "insufficient lamports" in err_str:
-                        program_logs = self.extract_program_logs(err_str)
-                        logging.error(f"交易失败: {err_str}")
-                        return {"error": f"交易失败: {err_str}", "program_logs": program_logs}
-                    logging.warning(f"第{attempts + 1}次尝试失败，5秒后重试... [原因: {e}]")
-                    if attempts < 4:  # 如果不是最后一次尝试
-                        time.sleep(5)
-                    else:
-                        program_logs = self.extract_program_logs(err_str)
-                        if program_logs:
-                            error_detail = "\n".join(program_logs)
-                            logging.error(f"所有重试尝试都失败了，链上日志：{error_detail}")
-                            return {"error": f"交易失败，链上日志：\n{error_detail}", "program_logs": program_logs}
-                        logging.error("所有重试尝试都失败了")
-                        return {"error": f"交易失败: {err_str}", "program_logs": program_logs}
+            pending = ConfirmationTracker().submit(signed_tx, last_valid_block_height)
+            logging.info(f"交易已提交，ID: {pending.signature}")
+            # 交易确认或失败后余额快照失效
+            wallet_pubkey = self.wallet.pubkey()
+            pending.add_done_callback(lambda _: BalanceCache().invalidate(wallet_pubkey))
+            return pending
+        except Exception as e:
+            return self._swap_error(e)
 
+    def get_realized_sol_change(self, signature: str) -> Optional[float]:
+        """按交易前后余额计算钱包实际收到的SOL（已加回手续费），查询失败时返回None"""
+        try:
+            payload = {"jsonrpc": "2.0", "id": 1, "method": "getTransaction", "params": [
+                signature, {"encoding": "json", "commitment": "confirmed", "maxSupportedTransactionVersion": 0}]}
+            response = HttpClient().post(self._rpc_url, json=payload)
+            response.raise_for_status()
+            meta = (response.json().get("result") or {}).get("meta")
+            if not meta:
+                return None
+            # 钱包是手续费支付方，位于账户列表第一位
+            return (meta["postBalances"][0] - meta["preBalances"][0] + meta.get("fee", 0)) / 1e9
         except Exception as e:
-            err_str = str(e)
-            program_logs = self.extract_program_logs(err_str)
-            if program_logs:
-                error_detail = "\n".join(program_logs)
-                logging.error(f"执行交易失败，链上日志：{error_detail}")
-                return {"error": f"交易失败，链上日志：\n{error_detail}", "program_logs": program_logs}
-            logging.error(f"执行交易失败: {e}")
-            return {"error": f"交易失败: {err_str}", "program_logs": program_logs}
+            logging.warning(f"查询交易实际到账金额失败: {e}")
+            return None
+
+    def _swap_error(self, e: Exception) -> Dict:
+        """把交换过程中的异常转换为包含链上日志的错误结果"""
+        err_str = str(e)
+        program_logs = self.extract_program_logs(err_str)
+        if program_logs:
+            error_detail = "\n".join(program_logs)
+            logging.error(f"执行交易失败，链上日志：{error_detail}")
+            return {"error": f"交易失败，链上日志：\n{error_detail}", "program_logs": program_logs}
+        logging.error(f"执行交易失败: {e}")
+        return {"error": f"交易失败: {err_str}", "program_logs": program_logs}
+
+    def prepare_swap(self, input_mint: str, output_mint: str, amount: int,
+                     fee_type: str = 'normal') -> Optional[PreparedSwap]:
+        """提前获取报价并构建未签名的交换交易，触发时只需签名发送"""
+        if not self.wallet or amount <= 0:
+            return None
+        quote = self.get_quote(input_mint, output_mint, amount)
+        if not quote or "error" in quote:
+            return None
+        swap_response = self._build_swap_transaction(quote, fee_type)
+        if swap_response is None:
+            return None
+        swap_transaction, last_valid_block_height = swap_response
+        return PreparedSwap(input_mint, output_mint, amount, quote, swap_transaction, last_valid_block_height)
+
+    def prepare_sell(self, token_address: str, sell_percentage: float) -> Optional[PreparedSwap]:
+        """按当前余额为出售准备报价和交易，数量计算与sell_token_for_sol一致"""
+        token_balance = self.get_token_balance(token_address)
+        if token_balance <= 0:
+            return None
+        sell_amount = token_balance * sell_percentage
+        sell_amount_lamports = int(sell_amount * (10 ** self.get_token_decimals(token_address)))
+        return self.prepare_swap(token_address, SOL_MINT, sell_amount_lamports)
+
+    def prepare_buy(self, token_address: str, buy_percentage: float) -> Optional[PreparedSwap]:
+        """按当前SOL余额为买入准备报价和交易，数量计算与buy_token_for_sol一致"""
+        sol_balance = self.get_sol_balance()
+        buy_amount = (sol_balance * buy_percentage) - (0.0021 if buy_percentage == 1 else 0)
+        if sol_balance <= 0 or buy_amount <= 0:
+            return None
+        return self.prepare_swap(SOL_MINT, token_address, int(buy_amount * 1e9))
 
     def get_token_decimals(self, token_address: str) -> int:
-        """从数据库获取token的小数位数"""
+        """获取token的小数位数，优先使用缓存的链上mint信息，失败时回退到数据库"""
+        try:
+            mint_info = MintInfoCache().get(normalize_sol_address(token_address))
+            if mint_info:
+                return mint_info.decimals
+        except Exception as e:
+            logging.warning(f"获取链上mint信息失败，改为查询数据库: {e}")
+
         db = SessionLocal()
         try:
             # 查询监控记录中是否有这个token的信息
@@ -306,14 +454,16 @@ class SolanaTrader:
         finally:
             db.close()
 
-    def sell_token_for_sol(self, token_address: str, sell_percentage: float) -> Dict:
+    def sell_token_for_sol(self, token_address: str, sell_percentage: float,
+                           prepared: Optional[PreparedSwap] = None) -> Dict:
         """将代币换成SOL
 
         Returns:
             Dict: 包含以下字段的字典
-                - success (bool): 是否成功
+                - success (bool): 交易是否已提交
                 - tx_hash (str): 成功时的交易哈希，失败时为None
                 - error (str): 失败时的错误信息，成功时为None
+                - confirmation (PendingTransaction): 成功时用于跟踪交易确认
         """
         try:
             # 获取代币余额
@@ -337,29 +487,36 @@ class SolanaTrader:
             # SOL的mint地址
             sol_mint = "So11111111111111111111111111111111111111112"
 
-            # 获取报价
-            quote = self.get_quote(token_address, sol_mint, sell_amount_lamports)
-            if not quote or "error" in quote:
-                if quote and "error" in quote:
-                    error_msg = f"获取交易报价失败: {quote['error']}"
-                    logging.error(error_msg)
-                    return {"success": False, "tx_hash": None, "error": error_msg}
-                else:
-                    error_msg = "无法获取交易报价"
-                    logging.error(error_msg)
-                    return {"success": False, "tx_hash": None, "error": error_msg}
-
-            # 执行交换
-            tx_hash = self.execute_swap(quote)
-
-            # 只有当返回值是字符串类型的交易哈希时才算成功
-            if isinstance(tx_hash, str) and tx_hash:
-                logging.info(f"成功出售代币，获得 {float(quote['outAmount']) / 1e9:.4f} SOL，交易哈希: {tx_hash}")
-                return {"success": True, "tx_hash": tx_hash, "error": None}
+            if prepared is not None and prepared.matches(token_address, sol_mint, sell_amount_lamports):
+                # 预热的报价和交易仍然有效，直接签名发送
+                logging.info(f"⚡ 使用 {prepared.age():.1f} 秒前预热的报价和交易")
+                quote = prepared.quote
+                pending = self._send_swap_transaction(prepared.transaction, prepared.last_valid_block_height)
+            else:
+                # 获取报价
+                quote = self.get_quote(token_address, sol_mint, sell_amount_lamports)
+                if not quote or "error" in quote:
+                    if quote and "error" in quote:
+                        error_msg = f"获取交易报价失败: {quote['error']}"
+                        logging.error(error_msg)
+                        return {"success": False, "tx_hash": None, "error": error_msg}
+                    else:
+                        error_msg = "无法获取交易报价"
+                        logging.error(error_msg)
+                        return {"success": False, "tx_hash": None, "error": error_msg}
+
+                # 执行交换
+                pending = self.submit_swap(quote, fee_type='normal')
+
+            # 只有交易已提交时才算成功，确认结果通过confirmation跟踪
+            if isinstance(pending, PendingTransaction):
+                logging.info(f"出售交易已提交，预计获得 {float(quote['outAmount']) / 1e9:.4f} SOL，"
+                             f"交易哈希: {pending.signature}")
+                return {"success": True, "tx_hash": pending.signature, "error": None, "confirmation": pending}
             else:
                 # 失败情况：记录错误并返回错误信息
-                if isinstance(tx_hash, dict) and "error" in tx_hash:
-                    error_msg = f"交易执行失败: {tx_hash['error']}"
+                if isinstance(pending, dict) and "error" in pending:
+                    error_msg = f"交易执行失败: {pending['error']}"
                     logging.error(error_msg)
                     return {"success": False, "tx_hash": None, "error": error_msg}
                 else:
@@ -372,14 +529,16 @@ class SolanaTrader:
             logging.error(error_msg)
             return {"success": False, "tx_hash": None, "error": error_msg}
 
-    def buy_token_for_sol(self, token_address: str, buy_percentage: float) -> Dict:
+    def buy_token_for_sol(self, token_address: str, buy_percentage: float,
+                          prepared: Optional[PreparedSwap] = None) -> Dict:
         """用SOL买入指定代币
 
         Returns:
             Dict: 包含以下字段的字典
-                - success (bool): 是否成功
+                - success (bool): 交易是否已提交
                 - tx_hash (str): 成功时的交易哈希，失败时为None
                 - error (str): 失败时的错误信息，成功时为None
+                - confirmation (PendingTransaction): 成功时用于跟踪交易确认
         """
         try:
             # 获取SOL余额
@@ -399,29 +558,34 @@ class SolanaTrader:
 
             logging.info(f"准备用 {buy_amount} SOL 买入代币 {token_address}")
 
-            # 获取报价
-            quote = self.get_quote(sol_mint, token_address, buy_amount_lamports)
-            if not quote or "error" in quote:
-                if quote and "error" in quote:
-                    error_msg = f"获取买入交易报价失败: {quote['error']}"
-                    logging.error(error_msg)
-                    return {"success": False, "tx_hash": None, "error": error_msg}
-                else:
-                    error_msg = "无法获取买入交易报价"
-                    logging.error(error_msg)
-                    return {"success": False, "tx_hash": None, "error": error_msg}
+            if prepared is not None and prepared.matches(sol_mint, token_address, buy_amount_lamports):
+                # 预热的报价和交易仍然有效，直接签名发送
+                logging.info(f"⚡ 使用 {prepared.age():.1f} 秒前预热的报价和交易")
+                pending = self._send_swap_transaction(prepared.transaction, prepared.last_valid_block_height)
+            else:
+                # 获取报价
+                quote = self.get_quote(sol_mint, token_address, buy_amount_lamports)
+                if not quote or "error" in quote:
+                    if quote and "error" in quote:
+                        error_msg = f"获取买入交易报价失败: {quote['error']}"
+                        logging.error(error_msg)
+                        return {"success": False, "tx_hash": None, "error": error_msg}
+                    else:
+                        error_msg = "无法获取买入交易报价"
+                        logging.error(error_msg)
+                        return {"success": False, "tx_hash": None, "error": error_msg}
 
-            # 执行交换
-            tx_hash = self.execute_swap(quote)
+                # 执行交换
+                pending = self.submit_swap(quote, fee_type='normal')
 
-            # 只有当返回值是字符串类型的交易哈希时才算成功
-            if isinstance(tx_hash, str) and tx_hash:
-                logging.info(f"成功买入代币，花费 {buy_amount} SOL，交易哈希: {tx_hash}")
-                return {"success": True, "tx_hash": tx_hash, "error": None}
+            # 只有交易已提交时才算成功，确认结果通过confirmation跟踪
+            if isinstance(pending, PendingTransaction):
+                logging.info(f"买入交易已提交，花费 {buy_amount} SOL，交易哈希: {pending.signature}")
+                return {"success": True, "tx_hash": pending.signature, "error": None, "confirmation": pending}
             else:
                 # 失败情况：记录错误并返回错误信息
-                if isinstance(tx_hash, dict) and "error" in tx_hash:
-                    error_msg = f"买入交易执行失败: {tx_hash['error']}"
+                if isinstance(pending, dict) and "error" in pending:
+                    error_msg = f"买入交易执行失败: {pending['error']}"
                     logging.error(error_msg)
                     return {"success": False, "tx_hash": None, "error": error_msg}
                 else:
@@ -464,8 +628,10 @@ class SolanaTrader:
             lamports=int(amount * 10 ** 9)
         )
 
+        instructions = self._compute_budget_instructions([str(self.wallet.pubkey())], SOL_TRANSFER_COMPUTE_UNITS)
+        instructions.append(system_transfer(transfer_params))
         message = Message.new_with_blockhash(
-            [system_transfer(transfer_params)],
+            instructions,
             self.wallet.pubkey(),
             recent_blockhash
         )
@@ -483,15 +649,21 @@ class SolanaTrader:
         mint = Pubkey.from_string(token_address)
         dest_owner = Pubkey.from_string(to_address)
 
-        # 获取关联token账户地址
-        mint_program_id = self.client.get_account_info(mint).value.owner
-        source_ata = get_associated_token_address(owner, mint, mint_program_id)
-        dest_ata = get_associated_token_address(dest_owner, mint, mint_program_id)
+        # 获取关联token账户地址，代币所属程序和ATA均来自mint信息缓存
+        mint_cache = MintInfoCache()
+        mint_info = mint_cache.get(token_address)
+        if mint_info is None:
+            raise Exception(f"链上未找到代币mint: {token_address}")
+        mint_program_id = mint_info.program_pubkey
+        source_ata = mint_cache.get_ata(owner, token_address)
+        dest_ata = mint_cache.get_ata(dest_owner, token_address)
 
         instructions = []
+        compute_units = TOKEN_TRANSFER_COMPUTE_UNITS
         # 检查目标ATA是否存在，如果不存在则创建
         dest_ata_info = self.client.get_account_info(dest_ata)
         if dest_ata_info.value is None:
+            compute_units += CREATE_ATA_COMPUTE_UNITS
             # 创建目标ATA指令
             create_ata_ix = create_idempotent_associated_token_account(
                 payer=owner,
@@ -512,6 +684,7 @@ class SolanaTrader:
                 signers=[]
             )
         ))
+        instructions = self._compute_budget_instructions([token_address, str(owner)], compute_units) + instructions
 
         # 构建消息
         message = Message.new_with_blockhash(
@@ -575,7 +748,9 @@ class SolanaTrader:
 
     def _ensure_ata_ix(self, owner_pubkey, mint_pubkey, payer_pubkey):
         """如果目标ATA不存在，返回创建ATA的指令，否则返回None"""
-        ata = get_associated_token_address(owner_pubkey, mint_pubkey, TOKEN_PROGRAM_ID)
+        mint_info = MintInfoCache().get(str(mint_pubkey))
+        token_program_id = mint_info.program_pubkey if mint_info else TOKEN_PROGRAM_ID
+        ata = get_associated_token_address(owner_pubkey, mint_pubkey, token_program_id)
         # 检查ATA是否存在
         resp = self.client.get_account_info(ata)
         if resp.value is None:
@@ -584,7 +759,7 @@ class SolanaTrader:
                 payer=payer_pubkey,
                 owner=owner_pubkey,
                 mint=mint_pubkey,
-                token_program_id=TOKEN_PROGRAM_ID
+                token_program_id=token_program_id
             )
         return None
 
@@ -595,7 +770,7 @@ class SolanaTrader:
             self._validate_balance(token_address, amount)
 
             # 获取最新区块哈希
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+            recent_blockhash, _ = self._recent_blockhash()
 
             # 构建交易
             if token_address == str(WRAPPED_SOL_MINT):
@@ -631,6 +806,16 @@ class SolanaTrader:
             program_logs = self.extract_program_logs(err_str)
             return {"err": err_str, "program_logs": program_logs}
 
+    @staticmethod
+    def _on_transfer_resolved(token_name: str, wallet_pubkey: Pubkey, pending: PendingTransaction):
+        """转账确认结果回调"""
+        BalanceCache().invalidate(wallet_pubkey)
+        error = pending.exception()
+        if error:
+            logging.error(f"{token_name}转账未能确认: {error}")
+        else:
+            logging.info(f"{token_name}转账已确认，交易哈希: {pending.signature}")
+
     def transfer(self, token_address: str, to_address: str, amount: float) -> dict:
         """执行转账"""
         max_retries = 3
@@ -640,7 +825,7 @@ class SolanaTrader:
                 self._validate_balance(token_address, amount)
 
                 # 获取最新区块哈希
-                recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+                recent_blockhash, last_valid_block_height = self._recent_blockhash()
 
                 # 构建交易
                 if token_address == str(WRAPPED_SOL_MINT):
@@ -657,7 +842,11 @@ class SolanaTrader:
 
                 tx_hash = str(result.value)
                 token_name = "SOL" if token_address == str(WRAPPED_SOL_MINT) else "Token"
-                logging.info(f"{token_name}转账成功，交易哈希: {tx_hash}")
+                logging.info(f"{token_name}转账已提交，交易哈希: {tx_hash}")
+                # 转账跳过了preflight，由确认跟踪器记录最终结果，确认或失败后余额快照失效
+                pending = ConfirmationTracker().track(tx_hash, last_valid_block_height)
+                pending.add_done_callback(functools.partial(self._on_transfer_resolved, token_name,
+                                                            self.wallet.pubkey()))
 
                 # 计算并返回结果
                 return self._calculate_transfer_result(token_address, amount, service_fee, tx_hash)
@@ -679,6 +868,9 @@ class SolanaTrader:
                 ]
 
                 is_retryable = any(error in err_str.lower() for error in retryable_errors)
+                if "blockhash not found" in err_str.lower():
+                    # 缓存的区块哈希已失效，重试前强制重新获取
+                    BlockhashCache().invalidate(self._rpc_url)
 
                 if attempt < max_retries - 1 and is_retryable:
                     logging.warning(f"转账第{attempt + 1}次尝试失败，将重试: {err_str}")
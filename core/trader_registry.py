@@ -0,0 +1,74 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from config.config_manager import ConfigManager
+from core.trader import SolanaTrader
+
+
+class TraderRegistry:
+    """交易器注册表 - 单例模式
+
+    按私钥ID缓存SolanaTrader，API请求和监控任务共享同一个钱包的交易器，
+    避免每次重新解码私钥、创建RPC客户端和注册配置刷新。
+    容量由TRADER_REGISTRY_SIZE限制，超出时淘汰最久未使用的交易器；
+    私钥内容变化时自动重建。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._traders: "OrderedDict[int, SolanaTrader]" = OrderedDict()
+            self._registry_lock = threading.Lock()
+            self.hit_count = 0
+            self.miss_count = 0
+            self._initialized = True
+
+    def get(self, private_key_id: Optional[int], private_key: str) -> SolanaTrader:
+        """获取私钥对应的共享交易器，没有私钥ID时返回不缓存的新交易器"""
+        if private_key_id is None:
+            return SolanaTrader(private_key=private_key)
+        with self._registry_lock:
+            trader = self._traders.get(private_key_id)
+            if trader is not None and trader._private_key == private_key:
+                self._traders.move_to_end(private_key_id)
+                self.hit_count += 1
+                return trader
+            trader = SolanaTrader(private_key=private_key)
+            self._traders[private_key_id] = trader
+            self._traders.move_to_end(private_key_id)
+            self.miss_count += 1
+            max_size = max(ConfigManager.get_int('TRADER_REGISTRY_SIZE', 64), 1)
+            while len(self._traders) > max_size:
+                evicted_id, _ = self._traders.popitem(last=False)
+                logging.debug(f"交易器注册表已满，淘汰私钥ID {evicted_id} 的交易器")
+            return trader
+
+    def remove(self, private_key_id: int):
+        """移除私钥对应的交易器，正在使用它的任务不受影响"""
+        with self._registry_lock:
+            self._traders.pop(private_key_id, None)
+
+    def get_stats(self) -> dict:
+        """获取注册表大小与命中统计"""
+        with self._registry_lock:
+            return {
+                "size": len(self._traders),
+                "hits": self.hit_count,
+                "misses": self.miss_count
+            }
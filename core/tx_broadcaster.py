@@ -0,0 +1,194 @@
+import base64
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.config_manager import ConfigManager
+from services.http_client import HttpClient
+
+# 单次RPC请求超时（秒），慢节点不能拖住整轮广播
+RPC_REQUEST_TIMEOUT = 5
+
+
+class _EndpointStats:
+    """单个RPC节点的广播与上链统计"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.sends = 0
+        self.send_errors = 0
+        self.send_ms_total = 0.0
+        self.wins = 0
+        self.landing_ms_total = 0.0
+
+    def avg_send_ms(self) -> Optional[float]:
+        succeeded = self.sends - self.send_errors
+        return self.send_ms_total / succeeded if succeeded > 0 else None
+
+    def avg_landing_ms(self) -> Optional[float]:
+        return self.landing_ms_total / self.wins if self.wins else None
+
+    def rank_key(self) -> Tuple[float, float]:
+        """最先确认的平均耗时优先，其次是发送耗时，没有数据的节点排在最后"""
+        landing = self.avg_landing_ms()
+        send = self.avg_send_ms()
+        return (landing if landing is not None else float('inf'), send if send is not None else float('inf'))
+
+
+class TransactionBroadcaster:
+    """多RPC交易广播器 - 单例模式
+
+    已签名的交易同时发送到RPC_URL和RPC_URLS中的全部节点，首次发送带preflight模拟；
+    确认前由ConfirmationTracker每隔TX_REBROADCAST_MS跳过模拟重新广播。
+    最先报告确认的节点记为本次上链节点，按平均上链耗时对节点排序。
+    全部走原始JSON-RPC请求，可以直接对接本地的桩RPC服务测试。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._stats: Dict[str, _EndpointStats] = {}
+            self._stats_lock = threading.Lock()
+            self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tx-broadcast")
+            self.refresh_config()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新RPC节点列表"""
+        primary = ConfigManager.get_str('RPC_URL', 'https://api.mainnet-beta.solana.com')
+        extra = [url.strip() for url in ConfigManager.get_str('RPC_URLS', '').split(',') if url.strip()]
+        self.endpoints = list(dict.fromkeys([primary] + extra))
+        logging.info(f"TransactionBroadcaster配置已刷新，RPC节点数: {len(self.endpoints)}")
+
+    def ranked_endpoints(self, endpoints: Optional[List[str]] = None) -> List[str]:
+        """按历史上链耗时从快到慢排序的节点列表"""
+        endpoints = list(endpoints or self.endpoints)
+        return sorted(endpoints, key=lambda url: self._endpoint_stats(url).rank_key())
+
+    def send(self, transaction, endpoints: Optional[List[str]] = None) -> Tuple[str, str, List[str]]:
+        """把已签名交易并发发送到全部节点，首次发送带preflight模拟，第一个节点接受后立即返回
+
+        其余节点的请求在后台继续完成并计入统计。返回(交易签名, base64编码的交易, 本次使用的节点)，
+        所有节点都拒绝时抛出第一个错误。
+        """
+        endpoints = self.ranked_endpoints(endpoints)
+        signature = str(transaction.signatures[0])
+        encoded = base64.b64encode(bytes(transaction)).decode()
+
+        errors = []
+        responses = self.fan_out(endpoints, 'sendTransaction', [encoded, {
+            "encoding": "base64", "skipPreflight": False, "preflightCommitment": "processed", "maxRetries": 0
+        }], record_send=True)
+        try:
+            for url, ok, result in responses:
+                if ok:
+                    logging.info(f"交易已被RPC节点 {url} 接受（共 {len(endpoints)} 个节点），签名: {signature}")
+                    return signature, encoded, endpoints
+                errors.append(result)
+        finally:
+            # 停止等待剩余节点，已提交的请求仍在线程池中完成
+            responses.close()
+        raise Exception(self._format_error(errors[0]))
+
+    def rebroadcast(self, encoded: str, endpoints: List[str]):
+        """确认前跳过模拟重新广播，发送失败不影响后续确认"""
+        for _ in self.fan_out(endpoints, 'sendTransaction', [encoded, {
+            "encoding": "base64", "skipPreflight": True, "maxRetries": 0
+        }]):
+            pass
+
+    def fan_out(self, endpoints: List[str], method: str, params: list,
+                 record_send: bool = False) -> Iterator[Tuple[str, bool, object]]:
+        """把同一个JSON-RPC请求并发发到所有节点，按完成顺序产出(节点, 是否成功, 结果或错误)"""
+        futures = {self._executor.submit(self._call, url, method, params, record_send): url for url in endpoints}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield (url,) + future.result()
+            except Exception as e:
+                yield url, False, {"message": str(e)}
+
+    def _call(self, url: str, method: str, params: list, record_send: bool) -> Tuple[bool, object]:
+        started = time.monotonic()
+        ok = False
+        try:
+            response = HttpClient().post(url, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params},
+                                         timeout=RPC_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            body = response.json()
+            if "error" in body:
+                return False, body["error"]
+            ok = True
+            return True, body.get("result")
+        finally:
+            if record_send:
+                self._record_send(url, (time.monotonic() - started) * 1000, ok)
+
+    @staticmethod
+    def _format_error(error) -> str:
+        """把JSON-RPC错误转换为文本，模拟日志逐行附在后面便于提取Program log"""
+        if not isinstance(error, dict):
+            return str(error)
+        message = error.get("message", str(error))
+        data = error.get("data")
+        logs = data.get("logs") if isinstance(data, dict) else None
+        return message + ("\n" + "\n".join(logs) if logs else "")
+
+    def _endpoint_stats(self, url: str) -> _EndpointStats:
+        with self._stats_lock:
+            stats = self._stats.get(url)
+            if stats is None:
+                stats = _EndpointStats(url)
+                self._stats[url] = stats
+            return stats
+
+    def _record_send(self, url: str, elapsed_ms: float, ok: bool):
+        stats = self._endpoint_stats(url)
+        with self._stats_lock:
+            stats.sends += 1
+            if ok:
+                stats.send_ms_total += elapsed_ms
+            else:
+                stats.send_errors += 1
+
+    def record_landing(self, url: str, landing_ms: float):
+        """记录最先报告交易确认的节点及从发送到确认的耗时"""
+        stats = self._endpoint_stats(url)
+        with self._stats_lock:
+            stats.wins += 1
+            stats.landing_ms_total += landing_ms
+
+    def get_stats(self) -> List[Dict]:
+        """按排序返回各RPC节点的广播统计"""
+        result = []
+        for url in self.ranked_endpoints(list(dict.fromkeys(self.endpoints + list(self._stats)))):
+            stats = self._endpoint_stats(url)
+            avg_send = stats.avg_send_ms()
+            avg_landing = stats.avg_landing_ms()
+            result.append({
+                "url": url,
+                "configured": url in self.endpoints,
+                "sends": stats.sends,
+                "send_errors": stats.send_errors,
+                "avg_send_ms": round(avg_send, 1) if avg_send is not None else None,
+                "wins": stats.wins,
+                "avg_landing_ms": round(avg_landing, 1) if avg_landing is not None else None
+            })
+        return result
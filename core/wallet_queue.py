@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from config.config_manager import ConfigManager
+from core.balance_cache import BalanceCache
+
+
+class _TradeJob:
+    """排队中的一笔交易，结果通过future返回给提交方"""
+
+    def __init__(self, func: Callable, label: str):
+        self.func = func
+        self.label = label
+        self.enqueued_at = time.monotonic()
+        self.future = Future()
+
+
+class _WalletQueue:
+    """单个钱包的有序交易队列"""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.jobs = deque()
+        self.busy = False
+        # 当前任务提交、尚未确认的交易，全部结束后才执行下一笔
+        self.holds: List[Future] = []
+        self.executed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.current_label = None
+
+
+class WalletTradeQueue:
+    """按钱包排队的交易执行层 - 单例模式
+
+    共用同一私钥的普通监控、波段监控和分片出售把交易提交到该钱包的队列，同一钱包严格按顺序执行，
+    上一笔交易确认或失败之前不会执行下一笔；不同钱包的队列由WALLET_QUEUE_WORKERS个工作线程并行处理。
+    每笔交易出队时先让余额快照失效，按最新余额计算数量，避免多个监控基于同一份旧余额重复下单。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._queues: Dict[str, _WalletQueue] = {}
+            self._queues_lock = threading.Lock()
+            worker_threads = max(ConfigManager.get_int('WALLET_QUEUE_WORKERS', 8), 1)
+            self._executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="wallet-trade")
+            logging.info(f"钱包交易队列已启动，工作线程数: {worker_threads}")
+            self._initialized = True
+
+    def submit(self, trader, func: Callable, label: str = '') -> Future:
+        """把交易放入交易器所属钱包的队列，返回的Future在交易函数执行完后得到其返回值，开始执行前可以取消"""
+        if trader.wallet is None:
+            # 私钥无效或缺失时没有钱包可排队，不排队直接交给工作线程执行，由交易函数返回失败结果走原有的完成与通知流程
+            return self._executor.submit(func)
+        owner = trader.wallet.pubkey()
+        key = str(owner)
+        job = _TradeJob(func, label)
+        with self._queues_lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = _WalletQueue(owner)
+                self._queues[key] = queue
+            queue.jobs.append(job)
+            start = not queue.busy
+            if start:
+                queue.busy = True
+        if start:
+            self._executor.submit(self._run_next, key)
+        elif label:
+            logging.info(f"🧾 【{label}】钱包 {key[:8]}... 有交易正在执行，排队等待，前面还有 {len(queue.jobs) - 1} 笔")
+        return job.future
+
+    def hold(self, trader, pending: Future):
+        """在队列任务中调用：钱包在该交易确认或失败之前不执行下一笔交易"""
+        if trader.wallet is None:
+            return
+        with self._queues_lock:
+            queue = self._queues.get(str(trader.wallet.pubkey()))
+            if queue is not None:
+                queue.holds.append(pending)
+
+    def _run_next(self, key: str):
+        with self._queues_lock:
+            queue = self._queues[key]
+            job = queue.jobs.popleft()
+            queue.holds = []
+            queue.current_label = job.label
+        if not job.future.set_running_or_notify_cancel():
+            # 提交方在排队期间已取消（如监控被停止），跳过这笔交易
+            logging.info(f"🧾 【{job.label}】排队中的交易已取消")
+            self._release(key)
+            return
+        wait = time.monotonic() - job.enqueued_at
+        queue.executed += 1
+        queue.wait_total += wait
+        queue.wait_max = max(queue.wait_max, wait)
+        # 出队时重新读取余额，之前排队的交易可能已经改变余额
+        BalanceCache().invalidate(queue.owner)
+        try:
+            job.future.set_result(job.func())
+        except Exception as e:
+            logging.error(f"钱包 {key[:8]}... 交易执行异常: {e}")
+            job.future.set_exception(e)
+
+        with self._queues_lock:
+            holds = [pending for pending in queue.holds if not pending.done()]
+            queue.holds = holds
+        if not holds:
+            self._release(key)
+            return
+        remaining = [len(holds)]
+        remaining_lock = threading.Lock()
+
+        def on_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                self._release(key)
+
+        for pending in holds:
+            pending.add_done_callback(on_done)
+
+    def _release(self, key: str):
+        """当前交易结束，有排队交易时继续执行，否则把钱包标记为空闲"""
+        with self._queues_lock:
+            queue = self._queues[key]
+            queue.holds = []
+            queue.current_label = None
+            if queue.jobs:
+                self._executor.submit(self._run_next, key)
+            else:
+                queue.busy = False
+
+    def get_stats(self) -> Dict:
+        """获取各钱包的队列深度、等待确认的交易数量和排队耗时"""
+        with self._queues_lock:
+            wallets = {
+                key: {
+                    "depth": len(queue.jobs),
+                    "busy": queue.busy,
+                    "current": queue.current_label,
+                    "awaiting_confirmation": sum(1 for pending in queue.holds if not pending.done()),
+                    "executed": queue.executed,
+                    "avg_wait_ms": round(queue.wait_total / queue.executed * 1000, 1) if queue.executed else None,
+                    "max_wait_ms": round(queue.wait_max * 1000, 1)
+                }
+                for key, queue in self._queues.items()
+            }
+        return {
+            "wallets": wallets,
+            "total_depth": sum(wallet["depth"] for wallet in wallets.values()),
+            "busy_wallets": sum(1 for wallet in wallets.values() if wallet["busy"])
+        }
@@ -1,7 +1,7 @@
 # 数据库模块包
 from .models import (
-    Base, Config, MonitorRecord, MonitorLog, PrivateKey, SwingMonitorRecord,
-    SessionLocal, engine
+    Base, Config, MonitorRecord, MonitorLog, MonitorLogCount, PriceCandle, PrivateKey, SwingMonitorRecord,
+    SessionLocal, engine, log_sqlite_settings
 )
 
 __all__ = [
@@ -9,8 +9,11 @@ __all__ = [
     "Config", 
     "MonitorRecord",
     "MonitorLog",
+    "MonitorLogCount",
+    "PriceCandle",
     "PrivateKey",
     "SwingMonitorRecord",
     "SessionLocal",
-    "engine"
+    "engine",
+    "log_sqlite_settings"
 ] 
\ No newline at end of file
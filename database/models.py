@@ -1,12 +1,62 @@
 import json
+import logging
+import os
 from datetime import datetime
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import (create_engine, event, Column, Index, Integer, String, Float, Boolean, DateTime, Text, ForeignKey,
+                        UniqueConstraint)
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 
+from database.sync_table import sync_table
+
 # 数据库设置
 DATABASE_URL = "sqlite:///./config.db"
-engine = create_engine(DATABASE_URL)
+
+# SQLite连接参数，数据库配置本身存在库里，所以通过环境变量调整
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),  # WAL模式下读写互不阻塞
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),  # WAL下NORMAL不会损坏数据库，只在检查点fsync
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),  # 遇到锁时等待而不是直接报database is locked
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # 负数单位为KB，默认64MB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", "268435456")),  # 256MB内存映射读
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "20"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "40"))
+SQLITE_POOL_TIMEOUT = int(os.getenv("SQLITE_POOL_TIMEOUT", "30"))
+
+engine = create_engine(
+    DATABASE_URL,
+    # 监控工作线程、日志写入线程和API共用连接池，连接会在不同线程间复用
+    connect_args={"check_same_thread": False, "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000},
+    pool_size=SQLITE_POOL_SIZE,
+    max_overflow=SQLITE_MAX_OVERFLOW,
+    pool_timeout=SQLITE_POOL_TIMEOUT,
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """每个新建的连接都应用一遍PRAGMA设置"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def log_sqlite_settings():
+    """启动时打印实际生效的SQLite设置"""
+    with engine.connect() as connection:
+        effective = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in SQLITE_PRAGMAS
+        }
+    logging.info(f"🗄️ SQLite设置: {effective}，连接池: pool_size={SQLITE_POOL_SIZE}, "
+                 f"max_overflow={SQLITE_MAX_OVERFLOW}, pool_timeout={SQLITE_POOL_TIMEOUT}s")
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -64,6 +114,14 @@ class MonitorRecord(Base):
     type = Column(String, default="sell")  # 监控类型：sell(出售监听), buy(购买监听)
     max_buy_amount = Column(Float, default=0.0)  # 累计购买上限(USD)，仅买入监听用，0表示不限制
     accumulated_buy_usd = Column(Float, default=0.0)  # 累计已购买金额(USD)，持久化
+    # 分片出售，仅出售监听用
+    sell_slice_mode = Column(String, default="none")  # none(一次卖出), twap(按时间分片), impact(按价格影响分片)
+    sell_slice_count = Column(Integer, default=5)  # 子订单数量，impact模式下为最多子订单数量
+    sell_slice_window = Column(Integer, default=300)  # 分片执行的时间窗口（秒）
+    max_price_impact = Column(Float, default=2.0)  # impact模式下单个子订单的价格影响上限(%)
+    # 交易冷却，持久化后重启仍然生效
+    cooldown_until = Column(DateTime)  # 冷却结束时间(UTC)，之前同方向的触发会被跳过
+    cooldown_action = Column(String)  # 冷却中的交易方向：buy(买入), sell(卖出)
 
     # 关系
     private_key_obj = relationship("PrivateKey", lazy="joined", foreign_keys=[private_key_id])
@@ -110,6 +168,9 @@ class SwingMonitorRecord(Base):
     last_check_at = Column(DateTime)
     last_watch_price = Column(Float)  # 最后监听价格
     last_watch_market_cap = Column(Float)  # 最后监听市值
+    # 交易冷却，持久化后重启仍然生效
+    cooldown_until = Column(DateTime)  # 冷却结束时间(UTC)，之前同方向的触发会被跳过
+    cooldown_action = Column(String)  # 冷却中的交易方向：buy(买入), sell(卖出)
 
     # 关系
     private_key_obj = relationship("PrivateKey", lazy="joined", foreign_keys=[private_key_id])
@@ -117,6 +178,12 @@ class SwingMonitorRecord(Base):
 
 class MonitorLog(Base):
     __tablename__ = "monitor_logs"
+    # 日志列表按类型/记录/动作过滤后按时间倒序分页，索引需与 sync_table.MONITOR_LOG_INDEXES 一致
+    __table_args__ = (
+        Index("ix_monitor_logs_type_record_ts", "monitor_type", "monitor_record_id", "timestamp"),
+        Index("ix_monitor_logs_action_ts", "action_type", "timestamp"),
+        Index("ix_monitor_logs_timestamp", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     monitor_record_id = Column(Integer, nullable=True)  # 关联的监控记录ID，波段监控可为null
@@ -150,8 +217,41 @@ class TokenMetaData(Base):
         return json.loads(self.data)
 
 
+class MonitorLogCount(Base):
+    """monitor_logs 按监控类型和动作类型分组的行数，由 sync_table 创建的触发器随日志插入和删除维护，
+    日志总数直接从这里读取，不再对日志表 COUNT(*)；为空的类型记为空字符串"""
+    __tablename__ = "monitor_log_counts"
+
+    monitor_type = Column(String, primary_key=True)
+    action_type = Column(String, primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+
+
+class PriceCandle(Base):
+    """由monitoring类tick日志压缩而来的每分钟K线"""
+    __tablename__ = "price_candles"
+    __table_args__ = (
+        UniqueConstraint("token_address", "minute", name="uq_price_candles_token_minute"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_address = Column(String, nullable=False)  # 代币地址
+    minute = Column(DateTime, nullable=False)  # 所在分钟（UTC，秒数为0）
+    open_price = Column(Float)
+    high_price = Column(Float)
+    low_price = Column(Float)
+    close_price = Column(Float)
+    open_market_cap = Column(Float)
+    high_market_cap = Column(Float)
+    low_market_cap = Column(Float)
+    close_market_cap = Column(Float)
+    sample_count = Column(Integer, default=0)  # 合并的tick数量
+
+
 # 创建表
 Base.metadata.create_all(bind=engine)
+# 表已存在时create_all不会补充新增的列和索引，在任何ORM查询（如启动时恢复监控）之前同步旧数据库的表结构
+sync_table()
 
 
 def get_db():
@@ -1,6 +1,13 @@
 #!/usr/bin/env python3
 """
-给 monitor_logs 表添加 transaction_usd 字段的迁移脚本
+数据库迁移脚本：
+1. 给 monitor_logs 表添加 transaction_usd 字段
+2. 回填 monitor_type 为空的旧日志，并创建日志查询用的复合索引
+3. 给 monitor_records 表添加分片出售相关字段
+4. 给 monitor_records 和 swing_monitor_records 表添加交易冷却字段
+5. 创建维护 monitor_log_counts 的触发器，首次创建时按现有日志初始化计数
+
+database.models 在 create_all 之后立即执行，保证启动恢复监控读取记录之前新增的列已经存在
 """
 
 import os
@@ -9,17 +16,153 @@ import sqlite3
 # 数据库文件路径
 DATABASE_PATH = "./config.db"
 
+# 日志查询用的索引，与 MonitorLog.__table_args__ 保持一致
+MONITOR_LOG_INDEXES = {
+    "ix_monitor_logs_type_record_ts": "monitor_logs (monitor_type, monitor_record_id, timestamp)",
+    "ix_monitor_logs_action_ts": "monitor_logs (action_type, timestamp)",
+    "ix_monitor_logs_timestamp": "monitor_logs (timestamp)",
+}
+
+
+def _add_transaction_usd(cursor):
+    """给 monitor_logs 表添加 transaction_usd 字段"""
+    # 检查字段是否已存在
+    cursor.execute("PRAGMA table_info(monitor_logs)")
+    columns = cursor.fetchall()
+    column_names = [col[1] for col in columns]
+
+    if 'transaction_usd' in column_names:
+        print("字段 'transaction_usd' 已经存在于 monitor_logs 表中")
+        return
+
+    # 添加字段
+    print("正在添加 transaction_usd 字段...")
+    alter_sql = "ALTER TABLE monitor_logs ADD COLUMN transaction_usd REAL DEFAULT 0.0"
+    cursor.execute(alter_sql)
+
+    print("✅ 成功为 monitor_logs 表添加了 transaction_usd 字段")
+    print("字段定义：transaction_usd REAL DEFAULT 0.0  -- 交易金额(USD)")
+
+    # 验证字段是否添加成功
+    cursor.execute("PRAGMA table_info(monitor_logs)")
+    columns = cursor.fetchall()
+    transaction_usd_col = next((col for col in columns if col[1] == 'transaction_usd'), None)
+    if transaction_usd_col:
+        print(f"验证成功：{transaction_usd_col}")
+
+
+# 分片出售字段，与 MonitorRecord 的列定义保持一致
+MONITOR_RECORD_SLICE_COLUMNS = {
+    "sell_slice_mode": "TEXT DEFAULT 'none'",
+    "sell_slice_count": "INTEGER DEFAULT 5",
+    "sell_slice_window": "INTEGER DEFAULT 300",
+    "max_price_impact": "REAL DEFAULT 2.0",
+}
+
+
+def _add_slice_columns(cursor):
+    """给 monitor_records 表添加分片出售字段"""
+    cursor.execute("PRAGMA table_info(monitor_records)")
+    column_names = {col[1] for col in cursor.fetchall()}
+    for name, definition in MONITOR_RECORD_SLICE_COLUMNS.items():
+        if name in column_names:
+            continue
+        print(f"正在添加 monitor_records.{name} 字段...")
+        cursor.execute(f"ALTER TABLE monitor_records ADD COLUMN {name} {definition}")
+        print(f"✅ 成功添加字段 {name} {definition}")
+
+
+# 交易冷却字段，普通监控和波段监控都需要，与模型的列定义保持一致
+COOLDOWN_COLUMNS = {
+    "cooldown_until": "DATETIME",
+    "cooldown_action": "TEXT",
+}
+
+
+def _add_cooldown_columns(cursor, table: str):
+    """给监控记录表添加交易冷却字段"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    column_names = {col[1] for col in cursor.fetchall()}
+    for name, definition in COOLDOWN_COLUMNS.items():
+        if name in column_names:
+            continue
+        print(f"正在添加 {table}.{name} 字段...")
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        print(f"✅ 成功添加字段 {name} {definition}")
+
+
+def _create_log_indexes(cursor):
+    """创建日志查询用的复合索引，首次创建时回填旧日志的 monitor_type 并更新统计信息"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='monitor_logs'")
+    existing = {row[0] for row in cursor.fetchall()}
+    missing = [name for name in MONITOR_LOG_INDEXES if name not in existing]
+    if not missing:
+        return
+
+    # 旧日志 monitor_type 为空时按普通监控处理，回填后查询可以直接走索引；回填和 ANALYZE 都要扫全表，只在建索引时做一次
+    cursor.execute("UPDATE monitor_logs SET monitor_type = 'normal' WHERE monitor_type IS NULL")
+    if cursor.rowcount:
+        print(f"已回填 {cursor.rowcount} 条日志的 monitor_type")
+    for name in missing:
+        print(f"正在创建索引 {name}...")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {MONITOR_LOG_INDEXES[name]}")
+        print(f"✅ 成功创建索引 {name}")
+    cursor.execute("ANALYZE monitor_logs")
+
+
+# 维护 monitor_log_counts 的触发器，与 MonitorLogCount 的列定义保持一致
+_COUNT_KEY_NEW = "COALESCE(NEW.monitor_type, ''), COALESCE(NEW.action_type, '')"
+_COUNT_WHERE_OLD = "monitor_type = COALESCE(OLD.monitor_type, '') AND action_type = COALESCE(OLD.action_type, '')"
+_COUNT_INCREMENT = (f"INSERT INTO monitor_log_counts (monitor_type, action_type, row_count) VALUES ({_COUNT_KEY_NEW}, 1) "
+                    "ON CONFLICT (monitor_type, action_type) DO UPDATE SET row_count = row_count + 1;")
+_COUNT_DECREMENT = f"UPDATE monitor_log_counts SET row_count = row_count - 1 WHERE {_COUNT_WHERE_OLD};"
+MONITOR_LOG_COUNT_TRIGGERS = {
+    "trg_monitor_logs_count_insert": f"AFTER INSERT ON monitor_logs BEGIN {_COUNT_INCREMENT} END",
+    "trg_monitor_logs_count_delete": f"AFTER DELETE ON monitor_logs BEGIN {_COUNT_DECREMENT} END",
+    "trg_monitor_logs_count_update":
+        f"AFTER UPDATE OF monitor_type, action_type ON monitor_logs BEGIN {_COUNT_DECREMENT} {_COUNT_INCREMENT} END",
+}
+
+
+def _create_log_counters(cursor):
+    """创建日志计数触发器，触发器缺失时重建全部触发器并按现有日志重新计数（只扫一次全表）"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monitor_log_counts (
+            monitor_type VARCHAR NOT NULL,
+            action_type VARCHAR NOT NULL,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (monitor_type, action_type)
+        )
+    """)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND tbl_name='monitor_logs'")
+    existing = {row[0] for row in cursor.fetchall()}
+    if all(name in existing for name in MONITOR_LOG_COUNT_TRIGGERS):
+        return
+
+    print("正在创建日志计数触发器...")
+    for name, definition in MONITOR_LOG_COUNT_TRIGGERS.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"CREATE TRIGGER {name} {definition}")
+    cursor.execute("DELETE FROM monitor_log_counts")
+    cursor.execute("""
+        INSERT INTO monitor_log_counts (monitor_type, action_type, row_count)
+        SELECT COALESCE(monitor_type, ''), COALESCE(action_type, ''), COUNT(*)
+        FROM monitor_logs GROUP BY 1, 2
+    """)
+    print("✅ 成功创建日志计数触发器并初始化计数")
+
 
 def sync_table():
     """主函数"""
     print("=" * 50)
-    print("给 monitor_logs 表添加 transaction_usd 字段")
+    print("同步数据库表结构")
     print("=" * 50)
 
     if not os.path.exists(DATABASE_PATH):
         print(f"错误：数据库文件 {DATABASE_PATH} 不存在")
         return
 
+    conn = None
     try:
         # 连接数据库
         conn = sqlite3.connect(DATABASE_PATH)
@@ -31,33 +174,22 @@ def sync_table():
             print("错误：monitor_logs 表不存在")
             return
 
-        # 检查字段是否已存在
-        cursor.execute("PRAGMA table_info(monitor_logs)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
+        _add_transaction_usd(cursor)
+        _create_log_indexes(cursor)
+        _create_log_counters(cursor)
 
-        if 'transaction_usd' in column_names:
-            print("字段 'transaction_usd' 已经存在于 monitor_logs 表中")
-            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='monitor_records'")
+        if cursor.fetchone():
+            _add_slice_columns(cursor)
+            _add_cooldown_columns(cursor, 'monitor_records')
 
-        # 添加字段
-        print("正在添加 transaction_usd 字段...")
-        alter_sql = "ALTER TABLE monitor_logs ADD COLUMN transaction_usd REAL DEFAULT 0.0"
-        cursor.execute(alter_sql)
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='swing_monitor_records'")
+        if cursor.fetchone():
+            _add_cooldown_columns(cursor, 'swing_monitor_records')
 
         # 提交更改
         conn.commit()
 
-        print("✅ 成功为 monitor_logs 表添加了 transaction_usd 字段")
-        print("字段定义：transaction_usd REAL DEFAULT 0.0  -- 交易金额(USD)")
-
-        # 验证字段是否添加成功
-        cursor.execute("PRAGMA table_info(monitor_logs)")
-        columns = cursor.fetchall()
-        transaction_usd_col = next((col for col in columns if col[1] == 'transaction_usd'), None)
-        if transaction_usd_col:
-            print(f"验证成功：{transaction_usd_col}")
-
     except sqlite3.Error as e:
         print(f"数据库错误：{e}")
     except Exception as e:
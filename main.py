@@ -12,7 +12,8 @@ from api import (
     records_router,
     logs_router,
     keys_router,
-    trade_router
+    trade_router,
+    system_router
 )
 from api.swing_monitor import router as swing_monitor_router
 # 导入拆分后的模块
@@ -20,12 +21,14 @@ from config.config_manager import ConfigManager
 # 导入日志配置模块
 from config.log_config import setup_logging
 from core.price_monitor import PriceMonitor
-from database import sync_table
+from database import log_sqlite_settings
+from services.log_compactor import LogCompactor
 # 导入全局异常处理
 from utils.exception_handler import GlobalExceptionHandler, setup_exception_handlers
 
 # 初始化日志系统
 setup_logging()
+log_sqlite_settings()
 
 # 创建FastAPI应用
 app = FastAPI(title="币价监控系统", description="实时监控代币价格，智能触发交易策略")
@@ -48,6 +51,9 @@ setup_exception_handlers(app)
 # 全局监控器实例（单例模式，多次调用返回同一实例）
 monitor = PriceMonitor()
 
+# 启动tick日志压缩任务
+LogCompactor()
+
 # 初始化配置
 ConfigManager.init_default_configs()
 
@@ -63,6 +69,7 @@ app.include_router(logs_router)  # 日志API
 app.include_router(keys_router)  # 私钥管理API
 app.include_router(trade_router)  # 交易相关API
 app.include_router(swing_monitor_router)  # 波段监控API
+app.include_router(system_router)  # 系统状态API
 
 # 设置监控器实例到需要的路由模块中
 from api import records as records_api
@@ -73,7 +80,6 @@ if __name__ == "__main__":
     logging.info("🚀 币价监控系统启动中...")
     logging.info("📝 访问 http://localhost:8000 打开管理界面")
     logging.info("📚 访问 http://localhost:8000/docs 查看API文档")
-    sync_table.sync_table()
 
     uvicorn.run(
         "main:app",
@@ -2,11 +2,15 @@
 from .token_api import TokenAPI
 from .monitor_service import MonitorService
 from .notifier import Notifier
+from .price_bus import PriceBus
 from .swing_monitor_service import SwingMonitorService
+from .threshold_index import ThresholdIndex
 
 __all__ = [
     "Notifier",
+    "PriceBus",
     "TokenAPI",
     "MonitorService",
-    "SwingMonitorService"
+    "SwingMonitorService",
+    "ThresholdIndex"
 ]
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.config_manager import ConfigManager
+
+# 连接池配置变化后，换下来的会话至少保留这么多秒再关闭，让进行中的请求完成
+RETIRED_CLIENT_GRACE_SECONDS = 60
+
+
+class HttpClient:
+    """HTTP客户端 - 单例模式
+
+    按host维护带连接池的keep-alive会话，所有对外HTTP请求（DexScreener、Jupiter、
+    飞书Webhook、RPC）复用已建立的TCP/TLS连接，避免每次请求重新握手。
+    监控引擎事件循环内使用异步客户端，同样保持长连接。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._sessions: Dict[str, requests.Session] = {}
+            self._sessions_lock = threading.Lock()
+            self._async_client = None
+            self._async_client_loop = None
+            self.refresh_config()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新连接池配置；只有连接池大小变化时才换用新会话，旧会话留给进行中的请求，宽限期后再关闭"""
+        pool_maxsize = ConfigManager.get_int('HTTP_POOL_MAXSIZE', 20)
+        # 超时按请求传入，修改后不需要重建会话
+        self.timeout = ConfigManager.get_float('HTTP_TIMEOUT', 10)
+        if pool_maxsize != getattr(self, 'pool_maxsize', None):
+            self.pool_maxsize = pool_maxsize
+            with self._sessions_lock:
+                retired, self._sessions = list(self._sessions.values()), {}
+            self._retire(retired, self._async_client, self._async_client_loop)
+            self._async_client = None
+            self._async_client_loop = None
+        logging.info(f"HttpClient配置已刷新，每个host连接池大小: {self.pool_maxsize}，默认超时: {self.timeout}秒")
+
+    def _retire(self, sessions: list, async_client, async_client_loop):
+        """宽限期后关闭换下来的会话和异步客户端，期间仍在使用它们的请求可以正常完成"""
+        grace = max(RETIRED_CLIENT_GRACE_SECONDS, self.timeout * 2)
+        if sessions:
+            timer = threading.Timer(grace, lambda: [session.close() for session in sessions])
+            timer.daemon = True
+            timer.start()
+        if async_client is not None and async_client_loop is not None and async_client_loop.is_running():
+            async_client_loop.call_soon_threadsafe(
+                async_client_loop.call_later, grace, lambda: asyncio.ensure_future(async_client.aclose()))
+
+    def _session_for(self, url: str) -> requests.Session:
+        """获取url所在host的会话，不存在时创建"""
+        host = urlsplit(url).netloc
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # 连接池满时不阻塞，临时连接用完即关闭；失败重试交给业务层处理
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送HTTP请求，未指定timeout时使用配置的默认超时"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self._session_for(url).request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    async def request_async(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """在事件循环中发送异步HTTP请求，未指定timeout时使用配置的默认超时"""
+        kwargs.setdefault('timeout', self.timeout)
+        return await self._get_async_client().request(method, url, **kwargs)
+
+    async def get_async(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request_async('GET', url, **kwargs)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """获取当前事件循环的异步客户端，异步客户端不能跨事件循环使用"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=self.pool_maxsize)
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各host连接池的命中统计：requests为请求数，misses为新建连接数，hits为复用连接的请求数"""
+        stats = {}
+        with self._sessions_lock:
+            sessions = dict(self._sessions)
+        for host, session in sessions.items():
+            adapter = session.get_adapter('https://')
+            pools = adapter.poolmanager.pools
+            request_count = 0
+            connection_count = 0
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                request_count += pool.num_requests
+                connection_count += pool.num_connections
+            stats[host] = {
+                "requests": request_count,
+                "misses": connection_count,
+                "hits": max(request_count - connection_count, 0),
+                "pool_maxsize": self.pool_maxsize
+            }
+        return stats
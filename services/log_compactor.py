@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from config.config_manager import ConfigManager
+from database.models import MonitorLog, MonitorRecord, PriceCandle, SessionLocal
+
+
+class LogCompactor:
+    """tick日志压缩任务 - 单例模式
+
+    后台线程每隔LOG_COMPACT_INTERVAL_SECONDS秒运行一次，把早于LOG_COMPACT_AGE_HOURS小时的
+    monitoring类tick日志按代币和分钟汇总成price_candles里的OHLC K线，再分小批删除原始行。
+    每批在一个事务内完成汇总和删除，中途中断不会重复计数；交易日志不受影响。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self.refresh_config()
+            self.compacted_count = 0
+            self.candle_count = 0
+            self.last_run_at = None
+            self._thread = threading.Thread(target=self._run, name="log-compactor", daemon=True)
+            self._thread.start()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新压缩任务配置"""
+        self.age_hours = ConfigManager.get_float('LOG_COMPACT_AGE_HOURS', 24)
+        self.interval = max(ConfigManager.get_float('LOG_COMPACT_INTERVAL_SECONDS', 300), 10)
+        self.chunk_size = max(ConfigManager.get_int('LOG_COMPACT_CHUNK_SIZE', 2000), 1)
+        logging.info(f"LogCompactor配置已刷新，压缩 {self.age_hours} 小时前的tick日志，"
+                     f"每 {self.interval:.0f} 秒运行一次，每批 {self.chunk_size} 条")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.compact()
+            except Exception as e:
+                logging.error(f"压缩tick日志失败: {e}")
+
+    def compact(self) -> int:
+        """压缩所有到期的tick日志，返回本次删除的原始行数"""
+        cutoff = datetime.utcnow() - timedelta(hours=self.age_hours)
+        total = 0
+        while True:
+            count = self._compact_chunk(cutoff)
+            total += count
+            if count < self.chunk_size:
+                break
+            # 批次之间让出数据库写锁，避免长时间阻塞监控和API
+            time.sleep(0.05)
+        self.last_run_at = datetime.utcnow()
+        if total:
+            logging.info(f"已把 {total} 条tick日志压缩为分钟K线")
+        return total
+
+    def _compact_chunk(self, cutoff: datetime) -> int:
+        """按时间顺序取一批到期的tick日志汇总进K线并删除"""
+        db = SessionLocal()
+        try:
+            # 普通监控日志没有代币地址，按监控记录补齐；波段监控日志自带监听代币地址
+            rows = db.query(
+                MonitorLog.id, MonitorLog.timestamp, MonitorLog.price, MonitorLog.market_cap,
+                MonitorLog.watch_token_address, MonitorRecord.token_address
+            ).outerjoin(
+                MonitorRecord,
+                (MonitorLog.monitor_record_id == MonitorRecord.id) & (MonitorLog.monitor_type == 'normal')
+            ).filter(
+                MonitorLog.action_type == 'monitoring',
+                MonitorLog.timestamp < cutoff
+            ).order_by(MonitorLog.timestamp, MonitorLog.id).limit(self.chunk_size).all()
+            if not rows:
+                return 0
+
+            new_candles = 0
+            buckets: Dict[Tuple[str, datetime], List] = {}
+            for _, timestamp, price, market_cap, watch_token_address, record_token_address in rows:
+                token_address = watch_token_address or record_token_address
+                # 找不到代币的孤儿tick（监控记录已删除）无法归入任何K线，直接清理
+                if not token_address or timestamp is None:
+                    continue
+                minute = timestamp.replace(second=0, microsecond=0)
+                buckets.setdefault((token_address, minute), []).append((price, market_cap))
+
+            for (token_address, minute), samples in buckets.items():
+                candle = db.query(PriceCandle).filter(
+                    PriceCandle.token_address == token_address,
+                    PriceCandle.minute == minute
+                ).first()
+                if candle is None:
+                    candle = PriceCandle(token_address=token_address, minute=minute, sample_count=0)
+                    db.add(candle)
+                    new_candles += 1
+                self._merge_samples(candle, samples)
+
+            db.query(MonitorLog).filter(
+                MonitorLog.id.in_([row[0] for row in rows])
+            ).delete(synchronize_session=False)
+            db.commit()
+            self.compacted_count += len(rows)
+            self.candle_count += new_candles
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _merge_samples(candle: PriceCandle, samples: List[Tuple[float, float]]):
+        """把按时间排序的样本合并进K线，批次按时间顺序处理，已有K线的开盘值保持不变"""
+        prices = [price for price, _ in samples if price is not None]
+        market_caps = [market_cap for _, market_cap in samples if market_cap is not None]
+        if prices:
+            if candle.open_price is None:
+                candle.open_price = prices[0]
+            candle.high_price = max(prices + ([candle.high_price] if candle.high_price is not None else []))
+            candle.low_price = min(prices + ([candle.low_price] if candle.low_price is not None else []))
+            candle.close_price = prices[-1]
+        if market_caps:
+            if candle.open_market_cap is None:
+                candle.open_market_cap = market_caps[0]
+            candle.high_market_cap = max(
+                market_caps + ([candle.high_market_cap] if candle.high_market_cap is not None else []))
+            candle.low_market_cap = min(
+                market_caps + ([candle.low_market_cap] if candle.low_market_cap is not None else []))
+            candle.close_market_cap = market_caps[-1]
+        candle.sample_count = (candle.sample_count or 0) + len(samples)
+
+    def get_stats(self) -> Dict:
+        """获取压缩任务统计"""
+        return {
+            "compacted": self.compacted_count,
+            "candles_created": self.candle_count,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "age_hours": self.age_hours,
+            "interval_seconds": self.interval
+        }
@@ -0,0 +1,142 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+from config.config_manager import ConfigManager
+from database.models import MonitorLog, SessionLocal
+
+# 交易类日志，必须立即落库
+TRADE_ACTION_TYPES = ('buy', 'sell')
+
+
+class MonitorLogWriter:
+    """监控日志批量写入器 - 单例模式
+
+    普通tick日志先进入有界队列，由后台线程每攒够LOG_BATCH_SIZE条或每隔LOG_FLUSH_INTERVAL_MS
+    毫秒批量插入一次，把每条日志一个事务合并成每批一个事务。
+    队列满时最多阻塞LOG_QUEUE_BLOCK_MS毫秒形成背压，仍然写不进去则丢弃该条tick日志。
+    交易日志（action_type为buy/sell）不进队列，在调用线程中同步写入，保证不会丢失。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self.refresh_config()
+            self._queue: queue.Queue = queue.Queue(maxsize=self.queue_maxsize)
+            self._stats_lock = threading.Lock()
+            self.written_count = 0
+            self.dropped_count = 0
+            self.batch_count = 0
+            self._thread = threading.Thread(target=self._run, name="monitor-log-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新批量写入配置，队列容量在启动时确定"""
+        self.batch_size = max(ConfigManager.get_int('LOG_BATCH_SIZE', 200), 1)
+        self.flush_interval = max(ConfigManager.get_float('LOG_FLUSH_INTERVAL_MS', 1000), 10) / 1000
+        self.queue_maxsize = ConfigManager.get_int('LOG_QUEUE_MAXSIZE', 10000)
+        self.block_timeout = max(ConfigManager.get_float('LOG_QUEUE_BLOCK_MS', 100), 0) / 1000
+        logging.info(f"MonitorLogWriter配置已刷新，批量大小: {self.batch_size}，"
+                     f"刷新间隔: {self.flush_interval * 1000:.0f}ms，队列容量: {self.queue_maxsize}")
+
+    def write(self, row: Dict):
+        """写入一条监控日志，row为MonitorLog的列值"""
+        if row.get('action_type') in TRADE_ACTION_TYPES:
+            self._insert([row])
+            return
+        try:
+            if self.block_timeout > 0:
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped_count += 1
+                dropped = self.dropped_count
+            # 避免丢弃时刷屏，每1000条提示一次
+            if dropped % 1000 == 1:
+                logging.warning(f"监控日志队列已满，已丢弃 {dropped} 条tick日志")
+
+    def flush(self):
+        """把队列中剩余的日志全部写入，进程退出时调用"""
+        rows = self._drain(len(self._queue.queue))
+        while rows:
+            self._insert(rows)
+            rows = self._drain(self.batch_size)
+
+    def _drain(self, limit: int) -> List[Dict]:
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        while True:
+            try:
+                rows = [self._queue.get()]
+            except Exception:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._insert(rows)
+
+    def _insert(self, rows: List[Dict]):
+        """批量插入，一批一个事务"""
+        db = SessionLocal()
+        try:
+            db.execute(insert(MonitorLog), rows)
+            db.commit()
+            with self._stats_lock:
+                self.written_count += len(rows)
+                self.batch_count += 1
+        except Exception as e:
+            db.rollback()
+            with self._stats_lock:
+                self.dropped_count += len(rows)
+            logging.error(f"批量写入监控日志失败，丢弃 {len(rows)} 条: {e}")
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict:
+        """获取队列长度与写入、丢弃统计"""
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written_count,
+                "dropped": self.dropped_count,
+                "batches": self.batch_count,
+                "batch_size": self.batch_size,
+                "flush_interval_ms": int(self.flush_interval * 1000)
+            }
@@ -0,0 +1,159 @@
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from solders.pubkey import Pubkey
+from spl.token.instructions import get_associated_token_address
+
+from config.config_manager import ConfigManager
+from database.models import SessionLocal, TokenMetaData
+from services.http_client import HttpClient
+
+# getMultipleAccounts单次最多查询的账户数
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+
+class MintInfo:
+    """代币mint账户的链上信息"""
+
+    def __init__(self, program_id: str, decimals: int, supply: int):
+        self.program_id = program_id
+        self.decimals = decimals
+        self.supply = supply
+
+    @property
+    def program_pubkey(self) -> Pubkey:
+        return Pubkey.from_string(self.program_id)
+
+
+@lru_cache(maxsize=4096)
+def _derive_ata(owner: str, mint: str, program_id: str) -> Pubkey:
+    """推导关联代币账户地址，纯计算结果可以永久缓存"""
+    return get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint),
+                                        Pubkey.from_string(program_id))
+
+
+class MintInfoCache:
+    """代币mint信息缓存 - 单例模式
+
+    通过一次getMultipleAccounts（jsonParsed）批量获取代币所属的token程序、链上精确小数位和总供应量，
+    持久化到token_meta_data表并缓存在内存中；mint信息不会变化，加载后交易路径上不再需要RPC。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._infos: Dict[str, MintInfo] = {}
+            self.fetch_count = 0
+            self._initialized = True
+
+    def get(self, mint: str) -> Optional[MintInfo]:
+        """获取单个代币的mint信息，mint账户不存在时返回None"""
+        return self.get_many([mint]).get(mint)
+
+    def get_many(self, mints: List[str]) -> Dict[str, MintInfo]:
+        """批量获取mint信息：内存 -> 数据库 -> 链上"""
+        missing = [mint for mint in dict.fromkeys(mints) if mint not in self._infos]
+        if missing:
+            missing = self._load_from_db(missing)
+        if missing:
+            self._fetch_from_chain(missing)
+        return {mint: self._infos[mint] for mint in mints if mint in self._infos}
+
+    def get_ata(self, owner: Pubkey, mint: str) -> Optional[Pubkey]:
+        """获取钱包在该代币下的关联代币账户地址，按(钱包, 代币)缓存"""
+        info = self.get(mint)
+        if info is None:
+            return None
+        return _derive_ata(str(owner), mint, info.program_id)
+
+    def _load_from_db(self, mints: List[str]) -> List[str]:
+        """从token_meta_data加载已持久化的mint信息，返回仍然缺失的代币"""
+        db = SessionLocal()
+        try:
+            rows = db.query(TokenMetaData).filter(TokenMetaData.address.in_(mints)).all()
+            for row in rows:
+                data = row.to_dict()
+                if data.get('program_id') and data.get('decimals') is not None:
+                    self._infos[row.address] = MintInfo(data['program_id'], int(data['decimals']),
+                                                        int(data.get('supply') or 0))
+        finally:
+            db.close()
+        return [mint for mint in mints if mint not in self._infos]
+
+    def _fetch_from_chain(self, mints: List[str]):
+        rpc_url = ConfigManager.get_str('RPC_URL', 'https://api.mainnet-beta.solana.com')
+        fetched: Dict[str, MintInfo] = {}
+        for start in range(0, len(mints), MAX_ACCOUNTS_PER_REQUEST):
+            chunk = mints[start:start + MAX_ACCOUNTS_PER_REQUEST]
+            payload = {"jsonrpc": "2.0", "id": 1, "method": "getMultipleAccounts",
+                       "params": [chunk, {"encoding": "jsonParsed"}]}
+            response = HttpClient().post(rpc_url, json=payload)
+            response.raise_for_status()
+            result = response.json()
+            if "error" in result:
+                raise Exception(f"获取mint信息失败: {result['error']}")
+            self.fetch_count += 1
+            for mint, account in zip(chunk, result["result"]["value"]):
+                if not account:
+                    logging.warning(f"链上未找到mint账户: {mint}")
+                    continue
+                data = account.get("data")
+                if not isinstance(data, dict) or data.get("parsed", {}).get("type") != "mint":
+                    logging.warning(f"账户不是代币mint: {mint}")
+                    continue
+                info = data["parsed"]["info"]
+                fetched[mint] = MintInfo(account["owner"], int(info["decimals"]), int(info.get("supply") or 0))
+        self._infos.update(fetched)
+        self._persist(fetched)
+
+    @staticmethod
+    def _persist(infos: Dict[str, MintInfo]):
+        """合并写入token_meta_data，保留已有的名称、符号等元数据"""
+        if not infos:
+            return
+        db = SessionLocal()
+        try:
+            rows = {row.address: row for row in
+                    db.query(TokenMetaData).filter(TokenMetaData.address.in_(list(infos))).all()}
+            for mint, info in infos.items():
+                row = rows.get(mint)
+                data = row.to_dict() if row else {"address": mint}
+                data.update({"decimals": info.decimals, "program_id": info.program_id, "supply": info.supply})
+                data_str = json.dumps(data, ensure_ascii=False)
+                if row:
+                    row.data = data_str
+                    row.updated_at = time.time()
+                else:
+                    db.add(TokenMetaData(address=mint, data=data_str, updated_at=time.time()))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logging.error(f"保存mint信息失败: {e}")
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict:
+        """获取缓存数量与链上请求次数"""
+        return {
+            "mints": len(self._infos),
+            "fetches": self.fetch_count,
+            "ata_cache": _derive_ata.cache_info()._asdict()
+        }
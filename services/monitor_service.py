@@ -2,8 +2,11 @@ from datetime import datetime
 from typing import List, Dict, Optional
 
 from solders.keypair import Keypair
+from sqlalchemy import func
 
-from database.models import MonitorRecord, MonitorLog, PrivateKey, SessionLocal
+from database.models import MonitorRecord, MonitorLog, MonitorLogCount, PriceCandle, PrivateKey, SessionLocal
+from services.monitor_state import MonitorStateStore
+from services.threshold_index import ThresholdIndex
 from services.token_api import TokenAPI
 from utils import normalize_sol_address
 
@@ -39,9 +42,14 @@ class MonitorService:
                     "last_check_at": record.last_check_at.isoformat() if record.last_check_at else None,
                     "last_price": record.last_price,
                     "last_market_cap": record.last_market_cap,
+                    "cooldown_until": record.cooldown_until.isoformat() if record.cooldown_until else None,
                     "type": record.type,
                     "max_buy_amount": record.max_buy_amount,
-                    "accumulated_buy_usd": record.accumulated_buy_usd or 0.0
+                    "accumulated_buy_usd": record.accumulated_buy_usd or 0.0,
+                    "sell_slice_mode": record.sell_slice_mode or "none",
+                    "sell_slice_count": record.sell_slice_count,
+                    "sell_slice_window": record.sell_slice_window,
+                    "max_price_impact": record.max_price_impact
                 }
                 for record in records
             ]
@@ -53,7 +61,9 @@ class MonitorService:
                       threshold: float, sell_percentage: float, webhook_url: str,
                       check_interval: int = 5, execution_mode: str = "single",
                       minimum_hold_value: float = 50.0, pre_sniper_mode: bool = False,
-                      type: str = "sell", max_buy_amount: float = 0.0) -> tuple[bool, str, Optional[int]]:
+                      type: str = "sell", max_buy_amount: float = 0.0, sell_slice_mode: str = "none",
+                      sell_slice_count: int = 5, sell_slice_window: int = 300,
+                      max_price_impact: float = 2.0) -> tuple[bool, str, Optional[int]]:
         """创建监控记录，支持买入/卖出类型"""
         # 校验type
         if type not in ["sell", "buy"]:
@@ -75,6 +85,10 @@ class MonitorService:
             return False, "执行模式必须是 'single' 或 'multiple'", None
         if minimum_hold_value < 0:
             return False, "最低持仓金额必须大于等于0", None
+        slice_error = MonitorService._validate_slice(sell_slice_mode, sell_slice_count, sell_slice_window,
+                                                     max_price_impact)
+        if slice_error:
+            return False, slice_error, None
         db = SessionLocal()
         try:
             private_key_obj = db.query(PrivateKey).filter(PrivateKey.id == private_key_id,
@@ -107,7 +121,11 @@ class MonitorService:
                 pre_sniper_mode=pre_sniper_mode if type == "sell" else False,
                 status="stopped",
                 type=type,
-                max_buy_amount=max_buy_amount if type == "buy" else 0.0
+                max_buy_amount=max_buy_amount if type == "buy" else 0.0,
+                sell_slice_mode=sell_slice_mode if type == "sell" else "none",
+                sell_slice_count=sell_slice_count,
+                sell_slice_window=sell_slice_window,
+                max_price_impact=max_price_impact
             )
             db.add(record)
             db.commit()
@@ -124,7 +142,9 @@ class MonitorService:
                       token_address: str, threshold: float, sell_percentage: float,
                       webhook_url: str, check_interval: int = 5, execution_mode: str = "single",
                       minimum_hold_value: float = 50.0, pre_sniper_mode: bool = False,
-                      type: str = "sell", max_buy_amount: float = 0.0) -> tuple[bool, str]:
+                      type: str = "sell", max_buy_amount: float = 0.0, sell_slice_mode: str = "none",
+                      sell_slice_count: int = 5, sell_slice_window: int = 300,
+                      max_price_impact: float = 2.0) -> tuple[bool, str]:
         """更新监控记录，支持买入/卖出类型"""
         if type not in ["sell", "buy"]:
             return False, "监控类型必须是 'sell' 或 'buy'"
@@ -144,6 +164,10 @@ class MonitorService:
             return False, "执行模式必须是 'single' 或 'multiple'"
         if minimum_hold_value < 0:
             return False, "最低持仓金额必须大于等于0"
+        slice_error = MonitorService._validate_slice(sell_slice_mode, sell_slice_count, sell_slice_window,
+                                                     max_price_impact)
+        if slice_error:
+            return False, slice_error
         db = SessionLocal()
         try:
             record = db.query(MonitorRecord).filter(MonitorRecord.id == record_id).first()
@@ -176,8 +200,15 @@ class MonitorService:
             record.pre_sniper_mode = pre_sniper_mode if type == "sell" else False
             record.type = type
             record.max_buy_amount = max_buy_amount if type == "buy" else 0.0
+            record.sell_slice_mode = sell_slice_mode if type == "sell" else "none"
+            record.sell_slice_count = sell_slice_count
+            record.sell_slice_window = sell_slice_window
+            record.max_price_impact = max_price_impact
             record.updated_at = datetime.utcnow()
             db.commit()
+            # 运行中的监控同步阈值索引和配置快照
+            ThresholdIndex().update_monitor(record)
+            MonitorStateStore().reload('normal', record)
             success_message = "监控记录更新成功"
             if token_address_changed:
                 success_message += f"，已更新Token信息: {record.token_name or 'Unknown'} ({record.token_symbol or 'N/A'})"
@@ -187,6 +218,20 @@ class MonitorService:
         finally:
             db.close()
 
+    @staticmethod
+    def _validate_slice(sell_slice_mode: str, sell_slice_count: int, sell_slice_window: int,
+                        max_price_impact: float) -> Optional[str]:
+        """校验分片出售参数，返回错误信息"""
+        if sell_slice_mode not in ["none", "twap", "impact"]:
+            return "分片模式必须是 'none'、'twap' 或 'impact'"
+        if sell_slice_count < 1:
+            return "分片数量必须大于等于1"
+        if sell_slice_window < 0:
+            return "分片时间窗口必须大于等于0秒"
+        if sell_slice_mode == "impact" and max_price_impact <= 0:
+            return "价格影响上限必须大于0"
+        return None
+
     @staticmethod
     def delete_record(record_id: int) -> tuple[bool, str]:
         """删除监控记录"""
@@ -202,6 +247,8 @@ class MonitorService:
             # 删除记录
             db.delete(record)
             db.commit()
+            ThresholdIndex().remove_monitor(record_id)
+            MonitorStateStore().discard('normal', record_id)
 
             return True, "监控记录删除成功"
         except Exception as e:
@@ -211,10 +258,13 @@ class MonitorService:
 
     @staticmethod
     def get_logs(page: int = 1, per_page: int = 20, monitor_record_id: Optional[int] = None, type: str = None,
-                 action_types: Optional[List[str]] = None) -> Dict:
+                 action_types: Optional[List[str]] = None, before_ts: Optional[datetime] = None,
+                 before_id: Optional[int] = None) -> Dict:
         """
         获取监控日志，支持 type=normal/swing
         action_type: 动作类型列表，如果为空或None则不过滤
+        传入before_ts（可选before_id）时使用游标分页，返回早于该位置的一页，耗时与表大小无关；
+        否则按page偏移分页
         """
         db = SessionLocal()
         try:
@@ -222,19 +272,38 @@ class MonitorService:
             if type == 'swing':
                 query = query.filter(MonitorLog.monitor_type == 'swing')
             elif type == 'normal':
-                query = query.filter((MonitorLog.monitor_type == 'normal') | (MonitorLog.monitor_type == None))
+                # 旧日志的monitor_type已由迁移回填为normal，等值过滤才能走索引
+                query = query.filter(MonitorLog.monitor_type == 'normal')
             # 兼容未传type时，查全部
             if monitor_record_id:
                 query = query.filter(MonitorLog.monitor_record_id == monitor_record_id)
             if action_types and len(action_types) > 0:
                 query = query.filter(MonitorLog.action_type.in_(action_types))
 
-            # 先计算总数
-            total = query.count()
-
-            # 在数据库层面进行分页
-            offset = (page - 1) * per_page
-            logs = query.order_by(MonitorLog.timestamp.desc()).offset(offset).limit(per_page).all()
+            if monitor_record_id:
+                # 单个监控的日志由复合索引限定范围计数
+                total = query.order_by(None).count()
+            else:
+                total = MonitorService._count_logs(db, type, action_types)
+
+            ordered = query.order_by(MonitorLog.timestamp.desc(), MonitorLog.id.desc())
+            if before_ts is not None:
+                # 游标分页：(timestamp, id) 严格小于游标位置
+                if before_id is not None:
+                    ordered = ordered.filter(
+                        (MonitorLog.timestamp < before_ts) |
+                        ((MonitorLog.timestamp == before_ts) & (MonitorLog.id < before_id)))
+                else:
+                    ordered = ordered.filter(MonitorLog.timestamp < before_ts)
+                logs = ordered.limit(per_page + 1).all()
+                has_more = len(logs) > per_page
+                logs = logs[:per_page]
+            else:
+                # 在数据库层面进行分页，多取一条判断是否还有下一页
+                offset = (page - 1) * per_page
+                logs = ordered.offset(offset).limit(per_page + 1).all()
+                has_more = len(logs) > per_page
+                logs = logs[:per_page]
 
             log_list = []
             for log in logs:
@@ -252,15 +321,58 @@ class MonitorService:
                     "tx_hash": log.tx_hash
                 })
 
+            next_cursor = None
+            if has_more and logs and logs[-1].timestamp:
+                next_cursor = {"before_ts": logs[-1].timestamp.isoformat(), "before_id": logs[-1].id}
+
             return {
                 "logs": log_list,
                 "total": total,
                 "page": page,
-                "per_page": per_page
+                "per_page": per_page,
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
         finally:
             db.close()
 
+    @staticmethod
+    def _count_logs(db, type: Optional[str], action_types: Optional[List[str]]) -> int:
+        """从触发器维护的monitor_log_counts读取日志总数，不扫描日志表"""
+        query = db.query(func.coalesce(func.sum(MonitorLogCount.row_count), 0))
+        if type in ('swing', 'normal'):
+            query = query.filter(MonitorLogCount.monitor_type == type)
+        if action_types:
+            query = query.filter(MonitorLogCount.action_type.in_(action_types))
+        return query.scalar()
+
+    @staticmethod
+    def get_candles(token_address: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    limit: int = 1440) -> List[Dict]:
+        """获取代币的分钟K线（由过期tick日志压缩而来），按时间正序返回"""
+        db = SessionLocal()
+        try:
+            query = db.query(PriceCandle).filter(PriceCandle.token_address == token_address)
+            if start:
+                query = query.filter(PriceCandle.minute >= start)
+            if end:
+                query = query.filter(PriceCandle.minute < end)
+            candles = query.order_by(PriceCandle.minute.desc()).limit(limit).all()
+            return [{
+                "minute": candle.minute.isoformat(),
+                "open_price": candle.open_price,
+                "high_price": candle.high_price,
+                "low_price": candle.low_price,
+                "close_price": candle.close_price,
+                "open_market_cap": candle.open_market_cap,
+                "high_market_cap": candle.high_market_cap,
+                "low_market_cap": candle.low_market_cap,
+                "close_market_cap": candle.close_market_cap,
+                "sample_count": candle.sample_count
+            } for candle in reversed(candles)]
+        finally:
+            db.close()
+
     @staticmethod
     def get_record_by_id(record_id: int) -> Optional[Dict]:
         """根据ID获取监控记录"""
@@ -290,9 +402,14 @@ class MonitorService:
                 "last_check_at": record.last_check_at.isoformat() if record.last_check_at else None,
                 "last_price": record.last_price,
                 "last_market_cap": record.last_market_cap,
+                "cooldown_until": record.cooldown_until.isoformat() if record.cooldown_until else None,
                 "type": record.type,
                 "max_buy_amount": record.max_buy_amount,
-                "accumulated_buy_usd": record.accumulated_buy_usd or 0.0
+                "accumulated_buy_usd": record.accumulated_buy_usd or 0.0,
+                "sell_slice_mode": record.sell_slice_mode or "none",
+                "sell_slice_count": record.sell_slice_count,
+                "sell_slice_window": record.sell_slice_window,
+                "max_price_impact": record.max_price_impact
             }
         finally:
             db.close()
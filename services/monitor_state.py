@@ -0,0 +1,189 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update
+
+from config.config_manager import ConfigManager
+from database.models import MonitorRecord, SwingMonitorRecord, SessionLocal
+
+
+class _RecordSnapshot:
+    """监控记录的只读快照，与数据库会话分离，__slots__中列出的字段从记录复制"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_record(cls, record) -> '_RecordSnapshot':
+        snapshot = cls.__new__(cls)
+        for field in cls.__slots__:
+            if field != 'private_key':
+                setattr(snapshot, field, getattr(record, field))
+        # 新版本记录通过private_key_id关联私钥，旧版本记录直接保存私钥
+        private_key_obj = record.private_key_obj
+        snapshot.private_key = private_key_obj.private_key if private_key_obj else getattr(record, 'private_key', None)
+        return snapshot
+
+
+class MonitorSnapshot(_RecordSnapshot):
+    """普通监控配置快照"""
+
+    __slots__ = ('id', 'name', 'private_key_id', 'private_key', 'token_address', 'token_symbol', 'threshold',
+                 'sell_percentage', 'webhook_url', 'check_interval', 'execution_mode', 'minimum_hold_value',
+                 'pre_sniper_mode', 'type', 'max_buy_amount', 'accumulated_buy_usd', 'sell_slice_mode',
+                 'sell_slice_count', 'sell_slice_window', 'max_price_impact', 'cooldown_until', 'cooldown_action')
+
+
+class SwingMonitorSnapshot(_RecordSnapshot):
+    """波段监控配置快照"""
+
+    __slots__ = ('id', 'name', 'private_key_id', 'private_key', 'watch_token_address', 'watch_token_symbol',
+                 'trade_token_address', 'trade_token_symbol', 'price_type', 'sell_threshold', 'buy_threshold',
+                 'sell_percentage', 'buy_percentage', 'webhook_url', 'check_interval', 'all_in_threshold',
+                 'cooldown_until', 'cooldown_action')
+
+
+# 监控类型 -> (数据表模型, 快照类型)
+_MONITOR_TYPES = {
+    'normal': (MonitorRecord, MonitorSnapshot),
+    'swing': (SwingMonitorRecord, SwingMonitorSnapshot),
+}
+
+
+class MonitorStateStore:
+    """监控状态存储 - 单例模式
+
+    监控循环启动时用短会话读取记录生成快照，之后只读快照，不再长期占用数据库连接；
+    记录通过MonitorService/SwingMonitorService编辑后替换运行中监控的快照，监控循环在下一次tick时切换到新配置。
+    每个tick的最新价格、市值与检查时间先保存在内存，由后台线程每隔MONITOR_STATE_FLUSH_SECONDS秒
+    合并成一个事务批量更新，同一监控在两次落库之间只保留最新值。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            # (监控类型, 记录ID) -> 运行中监控的快照
+            self._snapshots: Dict[Tuple[str, int], _RecordSnapshot] = {}
+            # (监控类型, 记录ID) -> 尚未落库的最新状态
+            self._pending: Dict[Tuple[str, int], Dict] = {}
+            self._state_lock = threading.Lock()
+            self.reload_count = 0
+            self.flushed_rows = 0
+            self.flush_count = 0
+            self.refresh_config()
+            self._thread = threading.Thread(target=self._run, name="monitor-state-flusher", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新状态落库间隔"""
+        self.flush_interval = max(ConfigManager.get_float('MONITOR_STATE_FLUSH_SECONDS', 5), 0.1)
+        logging.info(f"MonitorStateStore配置已刷新，状态落库间隔: {self.flush_interval}秒")
+
+    def load(self, monitor_type: str, record_id: int) -> Optional[_RecordSnapshot]:
+        """读取记录生成快照并登记为运行中，记录不存在时返回None"""
+        model, snapshot_class = _MONITOR_TYPES[monitor_type]
+        db = SessionLocal()
+        try:
+            record = db.query(model).filter(model.id == record_id).first()
+            if not record:
+                return None
+            snapshot = snapshot_class.from_record(record)
+        finally:
+            db.close()
+        with self._state_lock:
+            self._snapshots[(monitor_type, record_id)] = snapshot
+        return snapshot
+
+    def get(self, monitor_type: str, record_id: int) -> Optional[_RecordSnapshot]:
+        """获取运行中监控的当前快照，记录被删除后返回None"""
+        with self._state_lock:
+            return self._snapshots.get((monitor_type, record_id))
+
+    def reload(self, monitor_type: str, record):
+        """记录被编辑后替换快照，只更新运行中的监控，需在记录所属会话关闭前调用"""
+        key = (monitor_type, record.id)
+        with self._state_lock:
+            if key not in self._snapshots:
+                return
+        snapshot = _MONITOR_TYPES[monitor_type][1].from_record(record)
+        with self._state_lock:
+            if key in self._snapshots:
+                self._snapshots[key] = snapshot
+                self.reload_count += 1
+
+    def discard(self, monitor_type: str, record_id: int, keep_pending: bool = False):
+        """监控停止或记录被删除时移除快照，同时丢弃未落库的状态；监控正常停止时传keep_pending保留最后一次状态等待落库"""
+        with self._state_lock:
+            self._snapshots.pop((monitor_type, record_id), None)
+            if not keep_pending:
+                self._pending.pop((monitor_type, record_id), None)
+
+    def record_seen(self, monitor_type: str, record_id: int, **values):
+        """记录最新检查状态（列名=值），等待批量落库"""
+        with self._state_lock:
+            self._pending.setdefault((monitor_type, record_id), {}).update(values)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """把内存中的最新状态批量写入数据库，一次落库一个事务"""
+        with self._state_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        db = SessionLocal()
+        try:
+            # 逐行按主键更新且不校验命中行数，期间被删除的记录只是匹配0行，不会让整批失败
+            for (monitor_type, record_id), values in pending.items():
+                model = _MONITOR_TYPES[monitor_type][0]
+                db.execute(update(model).where(model.id == record_id).values(**values))
+            db.commit()
+            with self._state_lock:
+                self.flushed_rows += len(pending)
+                self.flush_count += 1
+        except Exception as e:
+            db.rollback()
+            # 写入失败时只放回仍在运行的监控，期间产生的新值优先；已停止或删除的不再重试
+            with self._state_lock:
+                requeued = 0
+                for key, values in pending.items():
+                    if key in self._snapshots:
+                        self._pending[key] = {**values, **self._pending.get(key, {})}
+                        requeued += 1
+            logging.error(f"批量更新监控状态失败，{requeued}/{len(pending)} 条将在下次重试: {e}")
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict:
+        """获取运行中的快照数量、待落库状态数量与落库统计"""
+        with self._state_lock:
+            return {
+                "snapshots": len(self._snapshots),
+                "pending": len(self._pending),
+                "reloads": self.reload_count,
+                "flushed_rows": self.flushed_rows,
+                "flushes": self.flush_count,
+                "flush_interval_seconds": self.flush_interval
+            }
@@ -0,0 +1,280 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from config.config_manager import ConfigManager
+from services.http_client import HttpClient
+
+# 飞书返回的限流错误码
+FEISHU_RATE_LIMIT_CODES = (9499, 11232)
+# 重试退避的最长等待（秒）
+MAX_RETRY_BACKOFF_SECONDS = 60
+
+
+class Notification:
+    """一条待发送的飞书消息，coalesce_key相同且尚未发送的消息会合并为一条"""
+
+    def __init__(self, title: str, content: str, msg_type: str = "text", coalesce_key: str = None,
+                 data: Dict = None):
+        self.title = title
+        self.content = content
+        self.msg_type = msg_type
+        self.coalesce_key = coalesce_key
+        # 合并消息时使用的原始数据
+        self.data = data or {}
+        self.merged = 0
+        self.attempts = 0
+        self.created_at = time.monotonic()
+
+    def payload(self) -> Dict:
+        payload = {
+            "msg_type": self.msg_type,
+            "content": {
+                self.msg_type: self.content + "\n<at user_id=\"all\">all</at>"
+            },
+            "at": {
+                "is_at_all": True
+            }
+        }
+        if self.title:
+            payload["content"]["title"] = self.title
+        return payload
+
+
+class _TokenBucket:
+    """令牌桶：capacity为突发上限，rate为每秒补充的令牌数"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """距离下一个令牌可用的秒数"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def drain(self, now: float):
+        """被限流时清空令牌，等补充后再发"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0)
+
+
+class _WebhookChannel:
+    """单个webhook地址的有序发送队列"""
+
+    def __init__(self, url: str, rate: float, capacity: float):
+        self.url = url
+        self.queue = deque()
+        self.bucket = _TokenBucket(rate, capacity)
+        self.in_flight = False
+        self.retry_at = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+
+
+class NotificationQueue:
+    """通知发送队列 - 单例模式
+
+    监控循环只负责把消息放入对应webhook的队列，由后台线程按飞书自定义机器人的频率限制
+    （默认每分钟100次、每秒5次）用令牌桶控制发送速度；请求失败或被限流时按指数退避重试，
+    超过NOTIFY_MAX_RETRIES次后丢弃。同一监控尚未发出的市值变化通知会合并成一条。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._channels: Dict[str, _WebhookChannel] = {}
+            self._condition = threading.Condition()
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="notify-sender")
+            self.refresh_config()
+            self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+            self._thread.start()
+            ConfigManager.register_service(self)
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新限流、重试与队列长度配置"""
+        self.rate = max(ConfigManager.get_float('NOTIFY_RATE_PER_MINUTE', 100), 1) / 60
+        self.burst = max(ConfigManager.get_float('NOTIFY_BURST', 5), 1)
+        self.max_retries = max(ConfigManager.get_int('NOTIFY_MAX_RETRIES', 5), 0)
+        self.retry_base = max(ConfigManager.get_float('NOTIFY_RETRY_BASE_SECONDS', 1), 0.1)
+        self.queue_max = max(ConfigManager.get_int('NOTIFY_QUEUE_MAX', 200), 10)
+        with self._condition:
+            for channel in self._channels.values():
+                channel.bucket.rate = self.rate
+                channel.bucket.capacity = self.burst
+            self._condition.notify_all()
+        logging.info(f"NotificationQueue配置已刷新，每分钟最多: {self.rate * 60:.0f}条，突发: {self.burst:.0f}条")
+
+    def enqueue(self, webhook_url: str, notification: Notification,
+                merge: Optional[Callable[[Notification, Notification], Notification]] = None) -> bool:
+        """放入发送队列后立即返回；有相同coalesce_key且未发送的消息时合并为一条"""
+        with self._condition:
+            channel = self._channels.get(webhook_url)
+            if channel is None:
+                channel = _WebhookChannel(webhook_url, self.rate, self.burst)
+                self._channels[webhook_url] = channel
+            if notification.coalesce_key and self._coalesce(channel, notification, merge):
+                return True
+            if len(channel.queue) >= self.queue_max:
+                # 队列已满时丢弃最早一条未在发送中的消息
+                del channel.queue[1 if channel.in_flight else 0]
+                channel.dropped += 1
+            channel.queue.append(notification)
+            self._condition.notify_all()
+        return True
+
+    @staticmethod
+    def _coalesce(channel: _WebhookChannel, notification: Notification, merge) -> bool:
+        start = 1 if channel.in_flight else 0
+        for index in range(start, len(channel.queue)):
+            queued = channel.queue[index]
+            if queued.coalesce_key == notification.coalesce_key:
+                merged = merge(queued, notification) if merge else notification
+                merged.merged = queued.merged + 1
+                merged.created_at = queued.created_at
+                channel.queue[index] = merged
+                channel.coalesced += 1
+                return True
+        return False
+
+    def _run(self):
+        while True:
+            ready = []
+            with self._condition:
+                now = time.monotonic()
+                next_wake = None
+                for channel in self._channels.values():
+                    if channel.in_flight or not channel.queue:
+                        continue
+                    wait = max(channel.retry_at - now, channel.bucket.wait_time(now))
+                    if wait <= 0:
+                        channel.bucket.take(now)
+                        channel.in_flight = True
+                        ready.append((channel, channel.queue[0]))
+                    else:
+                        next_wake = wait if next_wake is None else min(next_wake, wait)
+                if not ready:
+                    self._condition.wait(timeout=next_wake)
+                    continue
+            for channel, notification in ready:
+                self._executor.submit(self._deliver, channel, notification)
+
+    def _deliver(self, channel: _WebhookChannel, notification: Notification):
+        retry, rate_limited, error = self._send(channel.url, notification)
+        with self._condition:
+            now = time.monotonic()
+            channel.in_flight = False
+            if error is None:
+                channel.queue.popleft()
+                channel.sent += 1
+                channel.latency_total += now - notification.created_at
+                logging.info("通知发送成功")
+            else:
+                notification.attempts += 1
+                if rate_limited:
+                    channel.bucket.drain(now)
+                if retry and notification.attempts <= self.max_retries:
+                    channel.retried += 1
+                    channel.retry_at = now + min(self.retry_base * 2 ** (notification.attempts - 1),
+                                                 MAX_RETRY_BACKOFF_SECONDS)
+                    logging.warning(f"通知发送失败，第{notification.attempts}次重试前等待: {error}")
+                else:
+                    channel.queue.popleft()
+                    channel.failed += 1
+                    logging.error(f"通知发送失败: {error}")
+            self._condition.notify_all()
+
+    @staticmethod
+    def _send(url: str, notification: Notification) -> tuple:
+        """发送一条消息，返回(是否可以重试, 是否被限流, 错误信息)，成功时错误信息为None"""
+        try:
+            response = HttpClient().post(
+                url,
+                headers={'Content-Type': 'application/json'},
+                json=notification.payload()
+            )
+        except Exception as e:
+            return True, False, str(e)
+        if response.status_code == 429:
+            return True, True, "HTTP 429"
+        if response.status_code >= 500:
+            return True, False, f"HTTP {response.status_code}"
+        if response.status_code >= 400:
+            return False, False, f"HTTP {response.status_code}: {response.text[:200]}"
+        try:
+            result = response.json()
+        except ValueError:
+            return False, False, f"无法解析响应: {response.text[:200]}"
+        code = result.get('code', result.get('StatusCode'))
+        if code == 0:
+            return False, False, None
+        if code in FEISHU_RATE_LIMIT_CODES:
+            return True, True, str(result)
+        return False, False, str(result)
+
+    def flush(self, timeout: float = 10) -> bool:
+        """等待队列中的消息全部发送完毕，超时返回False"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while any(channel.queue for channel in self._channels.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(timeout=remaining)
+        return True
+
+    def get_stats(self) -> Dict:
+        """获取各webhook的队列深度与发送统计，地址只显示末尾几位"""
+        with self._condition:
+            channels = [
+                {
+                    "webhook": f"...{url[-6:]}",
+                    "depth": len(channel.queue),
+                    "in_flight": channel.in_flight,
+                    "sent": channel.sent,
+                    "failed": channel.failed,
+                    "retried": channel.retried,
+                    "coalesced": channel.coalesced,
+                    "dropped": channel.dropped,
+                    "avg_latency_ms": round(channel.latency_total / channel.sent * 1000, 1) if channel.sent else None
+                }
+                for url, channel in self._channels.items()
+            ]
+        return {
+            "channels": channels,
+            "total_depth": sum(channel["depth"] for channel in channels),
+            "rate_per_minute": round(self.rate * 60),
+            "burst": self.burst
+        }
@@ -1,11 +1,11 @@
 import logging
 from typing import Dict
 
-import requests
+from services.notification_queue import Notification, NotificationQueue
 
 
 class Notifier:
-    """通知器"""
+    """通知器，消息放入NotificationQueue后由后台线程发送，调用方不等待webhook响应"""
 
     def __init__(self, webhook_url: str = None):
         self._webhook_url = webhook_url
@@ -17,41 +17,13 @@ class Notifier:
         self.webhook_url = webhook_url
 
     def send_message(self, title: str, content: str, msg_type: str = "text") -> bool:
-        """发送消息到飞书"""
+        """发送消息到飞书，放入发送队列即返回"""
         if not self.webhook_url:
             logging.warning("未设置Webhook URL，无法发送通知")
             return False
 
         try:
-            payload = {
-                "msg_type": msg_type,
-                "content": {
-                    msg_type: content + "\n<at user_id=\"all\">all</at>"
-                },
-                "at": {
-                    "is_at_all": True
-                }
-            }
-
-            if title:
-                payload["content"]["title"] = title
-
-            response = requests.post(
-                self.webhook_url,
-                headers={'Content-Type': 'application/json'},
-                json=payload
-            )
-
-            response.raise_for_status()
-
-            result = response.json()
-            if result.get('code') == 0:
-                logging.info("通知发送成功")
-                return True
-            else:
-                logging.error(f"通知发送失败: {result}")
-                return False
-
+            return NotificationQueue().enqueue(self.webhook_url, Notification(title, content, msg_type))
         except Exception as e:
             logging.error(f"发送通知时出错: {e}")
             return False
@@ -68,18 +40,46 @@ class Notifier:
                     title = f"【{meme_name}】市值阈值已达到！"
                     content = f"""【{meme_name}】市值阈值已达到！\n当前价格: ${price_info['price']:.8f}\n当前市值: ${price_info['market_cap']:,.2f}\n\n系统准备执行自动出售操作..."""
             else:
-                if percent_change is not None:
-                    direction = "激增" if percent_change > 0 else "骤降"
-                    title = f"【{meme_name}】市值{direction}{abs(percent_change):.2f}%"
-                    content = f"{title}\n\n当前价格: ${price_info['price']:.8f}\n当前市值: ${price_info['market_cap']:,.2f}\n与上次相比{direction}{abs(percent_change):.2f}%"
-                else:
-                    title = f"【{meme_name}】市值变化通知"
-                    content = f"当前价格: ${price_info['price']:.8f}\n当前市值: ${price_info['market_cap']:,.2f}"
+                # 市值变化通知可以合并，同一监控尚未发出的通知只保留一条
+                if not self.webhook_url:
+                    logging.warning("未设置Webhook URL，无法发送通知")
+                    return False
+                notification = self._price_change_notification(
+                    meme_name, price_info['price'], price_info['market_cap'], percent_change)
+                return NotificationQueue().enqueue(self.webhook_url, notification, self._merge_price_change)
             return self.send_message(title, content)
         except Exception as e:
             logging.error(f"发送价格预警失败: {e}")
             return False
 
+    @staticmethod
+    def _price_change_notification(meme_name: str, price: float, market_cap: float, percent_change: float = None,
+                                   merged: int = 0) -> Notification:
+        """市值变化通知，merged为已合并的通知条数"""
+        if percent_change is not None:
+            direction = "激增" if percent_change > 0 else "骤降"
+            title = f"【{meme_name}】市值{direction}{abs(percent_change):.2f}%"
+            content = f"{title}\n\n当前价格: ${price:.8f}\n当前市值: ${market_cap:,.2f}\n与上次相比{direction}{abs(percent_change):.2f}%"
+        else:
+            title = f"【{meme_name}】市值变化通知"
+            content = f"当前价格: ${price:.8f}\n当前市值: ${market_cap:,.2f}"
+        if merged:
+            content += f"\n（已合并{merged + 1}次市值变化）"
+        return Notification(title, content, coalesce_key=f"price_change:{meme_name}", data={
+            "meme_name": meme_name, "price": price, "market_cap": market_cap, "percent_change": percent_change})
+
+    @staticmethod
+    def _merge_price_change(queued: Notification, latest: Notification) -> Notification:
+        """合并两条市值变化通知：价格和市值取最新值，变化百分比按复利累计"""
+        first, second = queued.data["percent_change"], latest.data["percent_change"]
+        if first is not None and second is not None:
+            percent_change = ((1 + first / 100) * (1 + second / 100) - 1) * 100
+        else:
+            percent_change = second if second is not None else first
+        return Notifier._price_change_notification(
+            latest.data["meme_name"], latest.data["price"], latest.data["market_cap"], percent_change,
+            merged=queued.merged + 1)
+
     def send_trade_notification(self, tx_hash: str, amount: float, estimated_usd_value: float,
                                 meme_name: str, token_symbol: str = None, action_type: str = 'sell') -> bool:
         """发送交易通知，action_type: 'buy' or 'sell'，格式为多行详细说明"""
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from services.threshold_index import ThresholdIndex
+from services.token_api import TokenAPI
+from utils import normalize_sol_address
+
+
+class PriceSubscription:
+    """价格订阅句柄 - 每个监控持有一个，按自己的检查间隔接收价格tick"""
+
+    def __init__(self, token_address: str, interval: float):
+        self.token_address = token_address
+        self.interval = max(float(interval or 1), 1.0)
+        self.next_due = 0.0
+        self.closed = False
+        self._event = asyncio.Event()
+        self._latest: Optional[Dict] = None
+
+    def publish(self, price_info: Dict):
+        """推送最新价格，只保留最新一条，未消费的旧tick直接覆盖"""
+        self._latest = price_info
+        self._event.set()
+
+    async def next_tick(self, timeout: float = None) -> Optional[Dict]:
+        """等待下一条价格tick，超时或订阅关闭时返回None"""
+        if self._latest is None and not self.closed:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._event.clear()
+        price_info, self._latest = self._latest, None
+        return price_info
+
+    def close(self):
+        """关闭订阅并唤醒等待中的监控"""
+        self.closed = True
+        self._event.set()
+
+
+class _TokenFeed:
+    """单个代币的轮询状态，按所有订阅者中最短的检查间隔拉取一次并分发"""
+
+    def __init__(self, token_address: str):
+        self.token_address = token_address
+        self.subscriptions: List[PriceSubscription] = []
+        self.fetch_count = 0
+        self.last_price_info: Optional[Dict] = None
+        self.next_poll = 0.0
+        self.in_flight = False
+
+    @property
+    def interval(self) -> float:
+        return min((sub.interval for sub in self.subscriptions), default=5.0)
+
+    def deliver(self, price_info: Dict, now: float):
+        self.last_price_info = price_info
+        for sub in self.subscriptions:
+            # 容忍少量调度误差，避免间隔相同的订阅者被错过一轮
+            if now >= sub.next_due - 0.5:
+                sub.publish(price_info)
+                sub.next_due = now + sub.interval
+
+
+class PriceBus:
+    """价格总线 - 单例模式
+
+    每个代币只轮询一次上游，多个监控共享同一份价格数据，
+    上游请求量只与代币数量相关，与监控数量无关。
+    运行在监控引擎的事件循环中，所有方法都应在该事件循环内调用。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._feeds: Dict[str, _TokenFeed] = {}
+            self._wakeup: Optional[asyncio.Event] = None
+            self._scheduler_task: Optional[asyncio.Task] = None
+            self._initialized = True
+
+    def subscribe(self, token_address: str, interval: float) -> PriceSubscription:
+        """订阅代币价格，interval为该订阅者期望的检查间隔（秒）"""
+        token_address = normalize_sol_address(token_address)
+        subscription = PriceSubscription(token_address, interval)
+        feed = self._feeds.get(token_address)
+        if feed is None:
+            feed = _TokenFeed(token_address)
+            self._feeds[token_address] = feed
+            logging.info(f"价格总线开始轮询代币 {token_address}")
+        feed.subscriptions.append(subscription)
+        # 已有最新价格时立即推送一条，新订阅者无需等待下一轮；重新匹配阈值以包含新加入的监控
+        if feed.last_price_info:
+            subscription.publish(self._with_triggered(token_address, feed.last_price_info))
+            subscription.next_due = time.time() + subscription.interval
+        self._ensure_scheduler()
+        return subscription
+
+    def unsubscribe(self, subscription: PriceSubscription):
+        """取消订阅，代币无订阅者时停止轮询"""
+        subscription.close()
+        feed = self._feeds.get(subscription.token_address)
+        if feed and subscription in feed.subscriptions:
+            feed.subscriptions.remove(subscription)
+            if not feed.subscriptions:
+                del self._feeds[subscription.token_address]
+                logging.info(f"价格总线停止轮询代币 {subscription.token_address}（无订阅者）")
+
+    def _ensure_scheduler(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._scheduler_task is None or self._scheduler_task.done():
+            self._scheduler_task = asyncio.get_running_loop().create_task(self._run_scheduler())
+        self._wakeup.set()
+
+    async def _run_scheduler(self):
+        """调度循环：把同一时刻到期的所有代币合并成一次批量请求"""
+        while self._feeds:
+            now = time.time()
+            due = [feed for feed in self._feeds.values() if not feed.in_flight and now >= feed.next_poll]
+            if due:
+                for feed in due:
+                    feed.in_flight = True
+                asyncio.get_running_loop().create_task(self._poll(due))
+
+            waiting = [feed.next_poll for feed in self._feeds.values() if not feed.in_flight]
+            timeout = max(min(waiting, default=now + 1) - now, 0.05)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, feeds: List[_TokenFeed]):
+        try:
+            results = await TokenAPI().fetch_market_data_batch_async([feed.token_address for feed in feeds])
+        except Exception as e:
+            logging.error(f"价格总线批量拉取失败: {e}")
+            results = {}
+        now = time.time()
+        for feed in feeds:
+            feed.in_flight = False
+            feed.fetch_count += 1
+            price_info = results.get(feed.token_address)
+            if price_info:
+                feed.deliver(self._with_triggered(feed.token_address, price_info), now)
+            # 对齐到间隔整数倍的时间点，使相同间隔的代币同时到期从而被合并成一批
+            interval = feed.interval
+            feed.next_poll = now + interval - now % interval
+        if self._wakeup:
+            self._wakeup.set()
+
+    @staticmethod
+    def _with_triggered(token_address: str, price_info: Dict) -> Dict:
+        """附带阈值索引的匹配结果，每个代币每次tick只做一次二分查找"""
+        return {**price_info, 'triggered': ThresholdIndex().match(token_address, price_info)}
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各代币的订阅数量、轮询间隔和上游请求次数"""
+        return {
+            address: {
+                "subscribers": len(feed.subscriptions),
+                "interval": feed.interval,
+                "fetch_count": feed.fetch_count
+            }
+            for address, feed in list(self._feeds.items())
+        }
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import List, Dict, Optional
 
 from database.models import SwingMonitorRecord, PrivateKey, SessionLocal
+from services.monitor_state import MonitorStateStore
+from services.threshold_index import ThresholdIndex
 from services.token_api import TokenAPI
 from utils import normalize_sol_address
 
@@ -52,6 +54,7 @@ class SwingMonitorService:
                     "last_check_at": record.last_check_at.isoformat() if record.last_check_at else None,
                     "last_watch_price": record.last_watch_price,
                     "last_watch_market_cap": record.last_watch_market_cap,
+                    "cooldown_until": record.cooldown_until.isoformat() if record.cooldown_until else None,
                 }
                 for record in records
             ]
@@ -221,6 +224,9 @@ class SwingMonitorService:
             record.updated_at = datetime.utcnow()
 
             db.commit()
+            # 运行中的波段监控同步阈值索引和配置快照
+            ThresholdIndex().update_swing(record)
+            MonitorStateStore().reload('swing', record)
 
             success_message = "波段监控记录更新成功"
             if watch_token_changed or trade_token_changed:
@@ -244,6 +250,8 @@ class SwingMonitorService:
             # 删除记录
             db.delete(record)
             db.commit()
+            ThresholdIndex().remove_swing(record_id)
+            MonitorStateStore().discard('swing', record_id)
 
             return True, "波段监控记录删除成功"
         except Exception as e:
@@ -296,6 +304,7 @@ class SwingMonitorService:
                 "last_check_at": record.last_check_at.isoformat() if record.last_check_at else None,
                 "last_watch_price": record.last_watch_price,
                 "last_watch_market_cap": record.last_watch_market_cap,
+                "cooldown_until": record.cooldown_until.isoformat() if record.cooldown_until else None,
             }
         finally:
             db.close()
@@ -0,0 +1,220 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils import normalize_sol_address
+
+
+class _SortedThresholds:
+    """按阈值排序的(阈值, 记录ID)列表，支持增量插入删除和二分查找"""
+
+    def __init__(self):
+        self.keys: List[float] = []
+        self.record_ids: List[int] = []
+
+    def add(self, threshold: float, record_id: int):
+        index = bisect.bisect_right(self.keys, threshold)
+        self.keys.insert(index, threshold)
+        self.record_ids.insert(index, record_id)
+
+    def remove(self, threshold: float, record_id: int):
+        start = bisect.bisect_left(self.keys, threshold)
+        end = bisect.bisect_right(self.keys, threshold)
+        for index in range(start, end):
+            if self.record_ids[index] == record_id:
+                del self.keys[index]
+                del self.record_ids[index]
+                return
+
+    def at_or_below(self, value: float) -> List[int]:
+        """阈值 <= value 的记录"""
+        return self.record_ids[:bisect.bisect_right(self.keys, value)]
+
+    def above(self, value: float) -> List[int]:
+        """阈值 > value 的记录"""
+        return self.record_ids[bisect.bisect_right(self.keys, value):]
+
+    def at_or_above(self, value: float) -> List[int]:
+        """阈值 >= value 的记录"""
+        return self.record_ids[bisect.bisect_left(self.keys, value):]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class TokenThresholds:
+    """单个代币上所有监控的阈值，ThresholdIndex按代币各维护一份，回测时单独使用"""
+
+    def __init__(self):
+        # 卖出监听：市值 >= 阈值时触发
+        self.sell = _SortedThresholds()
+        # 买入监听：市值 < 阈值时触发
+        self.buy = _SortedThresholds()
+        # 波段监控按price_type分别索引：值 >= 卖出阈值触发卖出，值 <= 买入阈值触发买入
+        self.swing_sell: Dict[str, _SortedThresholds] = {"price": _SortedThresholds(),
+                                                         "market_cap": _SortedThresholds()}
+        self.swing_buy: Dict[str, _SortedThresholds] = {"price": _SortedThresholds(),
+                                                        "market_cap": _SortedThresholds()}
+
+    def add_monitor(self, monitor_type: str, threshold: float, record_id: int):
+        side = self.buy if monitor_type == 'buy' else self.sell
+        side.add(threshold, record_id)
+
+    def remove_monitor(self, monitor_type: str, threshold: float, record_id: int):
+        side = self.buy if monitor_type == 'buy' else self.sell
+        side.remove(threshold, record_id)
+
+    def add_swing(self, price_type: str, sell_threshold: float, buy_threshold: float, record_id: int):
+        self.swing_sell[price_type].add(sell_threshold, record_id)
+        self.swing_buy[price_type].add(buy_threshold, record_id)
+
+    def remove_swing(self, price_type: str, sell_threshold: float, buy_threshold: float, record_id: int):
+        self.swing_sell[price_type].remove(sell_threshold, record_id)
+        self.swing_buy[price_type].remove(buy_threshold, record_id)
+
+    def is_empty(self) -> bool:
+        return not (len(self.sell) or len(self.buy)
+                    or any(len(band) for band in self.swing_sell.values())
+                    or any(len(band) for band in self.swing_buy.values()))
+
+    def match(self, price: Optional[float], market_cap: Optional[float]) -> 'ThresholdMatch':
+        """按一条价格tick找出被触发的监控"""
+        result = ThresholdMatch()
+        if market_cap is not None:
+            result.sell.update(self.sell.at_or_below(market_cap))
+            result.buy.update(self.buy.above(market_cap))
+        for price_type, value in (("price", price), ("market_cap", market_cap)):
+            if value is None:
+                continue
+            result.swing_sell.update(self.swing_sell[price_type].at_or_below(value))
+            result.swing_buy.update(self.swing_buy[price_type].at_or_above(value))
+        return result
+
+
+class ThresholdMatch:
+    """一次价格tick的触发结果"""
+
+    def __init__(self, sell: Set[int] = None, buy: Set[int] = None,
+                 swing_sell: Set[int] = None, swing_buy: Set[int] = None):
+        self.sell = sell or set()
+        self.buy = buy or set()
+        self.swing_sell = swing_sell or set()
+        self.swing_buy = swing_buy or set()
+
+
+class ThresholdIndex:
+    """阈值索引 - 单例模式
+
+    按代币维护所有运行中监控的有序阈值，每个价格tick对每类阈值做一次二分查找，
+    即可得到该代币上所有被触发的监控，而不需要逐个监控比较。
+    监控启动/停止以及通过MonitorService/SwingMonitorService编辑记录时增量更新。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._tokens: Dict[str, TokenThresholds] = {}
+            # 记录ID -> 已索引的条目，用于编辑或停止时定位旧阈值
+            self._monitors: Dict[int, Tuple[str, str, float]] = {}
+            self._swings: Dict[int, Tuple[str, str, float, float]] = {}
+            self._index_lock = threading.Lock()
+            self._initialized = True
+
+    def add_monitor(self, record):
+        """索引普通监控记录，已存在时按最新阈值替换"""
+        token_address = normalize_sol_address(record.token_address)
+        monitor_type = getattr(record, 'type', 'sell') or 'sell'
+        with self._index_lock:
+            self._remove_monitor_locked(record.id)
+            thresholds = self._tokens.setdefault(token_address, TokenThresholds())
+            thresholds.add_monitor(monitor_type, record.threshold, record.id)
+            self._monitors[record.id] = (token_address, monitor_type, record.threshold)
+
+    def add_swing(self, record):
+        """索引波段监控记录，已存在时按最新阈值替换"""
+        token_address = normalize_sol_address(record.watch_token_address)
+        price_type = "price" if record.price_type == "price" else "market_cap"
+        with self._index_lock:
+            self._remove_swing_locked(record.id)
+            thresholds = self._tokens.setdefault(token_address, TokenThresholds())
+            thresholds.add_swing(price_type, record.sell_threshold, record.buy_threshold, record.id)
+            self._swings[record.id] = (token_address, price_type, record.sell_threshold, record.buy_threshold)
+
+    def update_monitor(self, record):
+        """记录被编辑后同步索引，只更新已索引（运行中）的记录"""
+        if record.id in self._monitors:
+            self.add_monitor(record)
+
+    def update_swing(self, record):
+        """波段记录被编辑后同步索引，只更新已索引（运行中）的记录"""
+        if record.id in self._swings:
+            self.add_swing(record)
+
+    def remove_monitor(self, record_id: int):
+        with self._index_lock:
+            self._remove_monitor_locked(record_id)
+
+    def remove_swing(self, record_id: int):
+        with self._index_lock:
+            self._remove_swing_locked(record_id)
+
+    def _remove_monitor_locked(self, record_id: int):
+        entry = self._monitors.pop(record_id, None)
+        if entry is None:
+            return
+        token_address, monitor_type, threshold = entry
+        thresholds = self._tokens.get(token_address)
+        if thresholds:
+            thresholds.remove_monitor(monitor_type, threshold, record_id)
+            self._drop_if_empty(token_address, thresholds)
+
+    def _remove_swing_locked(self, record_id: int):
+        entry = self._swings.pop(record_id, None)
+        if entry is None:
+            return
+        token_address, price_type, sell_threshold, buy_threshold = entry
+        thresholds = self._tokens.get(token_address)
+        if thresholds:
+            thresholds.remove_swing(price_type, sell_threshold, buy_threshold, record_id)
+            self._drop_if_empty(token_address, thresholds)
+
+    def _drop_if_empty(self, token_address: str, thresholds: TokenThresholds):
+        if thresholds.is_empty():
+            del self._tokens[token_address]
+
+    def match(self, token_address: str, price_info: Optional[Dict]) -> ThresholdMatch:
+        """根据价格tick找出该代币上所有被触发的监控"""
+        if not price_info:
+            return ThresholdMatch()
+        token_address = normalize_sol_address(token_address)
+        with self._index_lock:
+            thresholds = self._tokens.get(token_address)
+            if thresholds is None:
+                return ThresholdMatch()
+            return thresholds.match(price_info.get('price'), price_info.get('market_cap'))
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各代币已索引的阈值数量"""
+        with self._index_lock:
+            return {
+                address: {
+                    "sell": len(thresholds.sell),
+                    "buy": len(thresholds.buy),
+                    "swing": sum(len(band) for band in thresholds.swing_sell.values())
+                }
+                for address, thresholds in self._tokens.items()
+            }
@@ -1,13 +1,17 @@
+import asyncio
 import json
 import logging
+import threading
 import time
-from typing import Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-import requests
 from cachetools import TTLCache, cached
 
 from database.models import TokenMetaData, SessionLocal
 from config.config_manager import ConfigManager
+from services.http_client import HttpClient
+from services.mint_cache import MintInfoCache
 
 class TokenAPI:
     """代币数据 API 工具类 (免费去中心化方案)
@@ -37,21 +41,25 @@ class TokenAPI:
     def refresh_config(self):
         """刷新配置"""
         # 获取 Solana RPC 节点，默认使用官方节点
-        self.rpc_url = ConfigManager.get_config('RPC_URL', 'https://api.mainnet-beta.solana.com')
+        self.rpc_url = ConfigManager.get_str('RPC_URL', 'https://api.mainnet-beta.solana.com')
         self._last_config_update = time.time()
         logging.info("TokenAPI配置已刷新 (切换为免费 DexScreener + RPC 方案)")
 
     def get_token_meta_data(self, address: str) -> Optional[Dict]:
-        """获取token元数据，带数据库缓存（永久有效）"""
+        """获取token元数据，带数据库缓存（永久有效），小数位数以链上mint信息为准"""
+        mint_fields = self._get_mint_fields(address)
         db = SessionLocal()
         try:
-            # 1. 查缓存
+            # 1. 查缓存（只有mint信息、没有名称的缓存行由MintInfoCache写入，仍需补齐基础信息）
             cache = db.query(TokenMetaData).filter_by(address=address).first()
             if cache:
-                return cache.to_dict()
+                cached_meta = cache.to_dict()
+                if 'name' in cached_meta:
+                    cached_meta.update(mint_fields)
+                    return cached_meta
 
             # 2. 从 DexScreener 获取基础信息
-            response = requests.get(f"{self.dex_url}/{address}", timeout=10)
+            response = HttpClient().get(f"{self.dex_url}/{address}", timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -65,19 +73,24 @@ class TokenAPI:
                 "decimals": 6 # 默认值
             }
             
-            if pairs and len(pairs) > 0:
-                base_token = pairs[0].get('baseToken', {})
+            pair = self._select_pair(address, pairs or [])
+            if pair:
+                base_token = pair.get('baseToken', {})
                 meta_data["symbol"] = base_token.get('symbol', 'UNKNOWN')
                 meta_data["name"] = base_token.get('name', 'Unknown Token')
             else:
                 logging.warning(f"DexScreener未找到元数据 [{address}], 采用默认值")
 
             logging.info(f"成功获取token元数据: {address}")
+            meta_data.update(mint_fields)
 
             # 3. 写入数据库缓存
             data_str = json.dumps(meta_data, ensure_ascii=False)
-            cache_obj = TokenMetaData(address=address, data=data_str, updated_at=time.time())
-            db.add(cache_obj)
+            if cache:
+                cache.data = data_str
+                cache.updated_at = time.time()
+            else:
+                db.add(TokenMetaData(address=address, data=data_str, updated_at=time.time()))
             db.commit()
             return meta_data
 
@@ -92,44 +105,154 @@ class TokenAPI:
         finally:
             db.close()
 
+    @staticmethod
+    def _get_mint_fields(address: str) -> Dict:
+        """从mint信息缓存读取链上精确的小数位数、所属程序和供应量，失败时返回空字典"""
+        try:
+            mint_info = MintInfoCache().get(address)
+        except Exception as e:
+            logging.warning(f"获取链上mint信息失败 [{address}]: {e}")
+            return {}
+        if mint_info is None:
+            return {}
+        return {"decimals": mint_info.decimals, "program_id": mint_info.program_id, "supply": mint_info.supply}
+
     @cached(cache=TTLCache(maxsize=1000, ttl=60))
     def get_market_data(self, address: str) -> Optional[Dict]:
-        """获取token市场数据 (价格、市值)，带内存缓存（TTL 60秒）"""
+        """获取token市场数据 (价格、市值)，带内存缓存（TTL 60秒），未命中时经批量查询器合并请求"""
+        return MarketDataBatcher().fetch(address)
+
+    def fetch_market_data(self, address: str) -> Optional[Dict]:
+        """直接请求DexScreener获取单个代币的最新市场数据，不经过缓存"""
         try:
-            response = requests.get(f"{self.dex_url}/{address}", timeout=10)
+            response = HttpClient().get(f"{self.dex_url}/{address}", timeout=10)
             response.raise_for_status()
             
             data = response.json()
             pairs = data.get('pairs')
             
-            # 如果撤池子/无流动性，赋予0值并返回
-            if not pairs or len(pairs) == 0:
-                logging.warning(f"代币 {address} 无活跃流动性，价格与市值置为0")
-                return {
-                    "price": 0.0,
-                    "market_cap": 0.0,
-                    "liquidity": 0.0
-                }
-            
-            # 取流动性最大的池子(DexScreener默认按流动性/交易量排序)
-            pair = pairs[0]
-            price_usd = float(pair.get('priceUsd', 0.0))
-            fdv = float(pair.get('fdv', 0.0))
-            liquidity = float(pair.get('liquidity', {}).get('usd', 0.0))
-            
-            # 如果有 fdv (全流通市值) 优先用，否则用 marketCap
-            market_cap = fdv if fdv > 0 else float(pair.get('marketCap', 0.0))
+            return self._parse_selected_pair(address, pairs)
 
-            return {
-                "price": price_usd,
-                "market_cap": market_cap,
-                "liquidity": liquidity
-            }
+        except Exception as e:
+            logging.error(f"解析市场数据失败 [{address}]: {e}")
+            return None
+
+    def fetch_market_data_batch(self, addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """批量请求DexScreener市场数据，每次最多30个地址，按baseToken把pairs拆回各个地址"""
+        results: Dict[str, Optional[Dict]] = {}
+        for chunk in self._chunk_addresses(addresses):
+            if len(chunk) == 1:
+                results[chunk[0]] = self.fetch_market_data(chunk[0])
+                continue
+            try:
+                response = HttpClient().get(f"{self.dex_url}/{','.join(chunk)}", timeout=10)
+                response.raise_for_status()
+                chunk_results = self._split_batch_pairs(chunk, response.json().get('pairs') or [])
+                for address in chunk:
+                    if address in chunk_results:
+                        results[address] = chunk_results[address]
+                    else:
+                        # 批量结果中找不到（仅作为quoteToken出现或被截断），退回单地址查询
+                        results[address] = self.fetch_market_data(address)
+            except Exception as e:
+                logging.error(f"批量获取市场数据失败 [{len(chunk)}个地址]: {e}")
+                for address in chunk:
+                    results[address] = None
+        return results
 
+    async def fetch_market_data_async(self, address: str) -> Optional[Dict]:
+        """异步请求单个代币的最新市场数据，供监控引擎事件循环使用"""
+        try:
+            response = await HttpClient().get_async(f"{self.dex_url}/{address}", timeout=10)
+            response.raise_for_status()
+            return self._parse_selected_pair(address, response.json().get('pairs'))
         except Exception as e:
             logging.error(f"解析市场数据失败 [{address}]: {e}")
             return None
 
+    async def fetch_market_data_batch_async(self, addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """异步批量请求市场数据，各个30地址分组并发请求"""
+
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, Optional[Dict]]:
+            if len(chunk) == 1:
+                return {chunk[0]: await self.fetch_market_data_async(chunk[0])}
+            try:
+                response = await HttpClient().get_async(f"{self.dex_url}/{','.join(chunk)}", timeout=10)
+                response.raise_for_status()
+                chunk_results = self._split_batch_pairs(chunk, response.json().get('pairs') or [])
+                for address in chunk:
+                    if address not in chunk_results:
+                        chunk_results[address] = await self.fetch_market_data_async(address)
+                return chunk_results
+            except Exception as e:
+                logging.error(f"批量获取市场数据失败 [{len(chunk)}个地址]: {e}")
+                return {address: None for address in chunk}
+
+        results: Dict[str, Optional[Dict]] = {}
+        for chunk_results in await asyncio.gather(*(fetch_chunk(c) for c in self._chunk_addresses(addresses))):
+            results.update(chunk_results)
+        return results
+
+    @staticmethod
+    def _chunk_addresses(addresses: List[str]) -> List[List[str]]:
+        """去重后按单次请求上限分组"""
+        addresses = list(dict.fromkeys(addresses))
+        size = MarketDataBatcher.MAX_ADDRESSES_PER_REQUEST
+        return [addresses[i:i + size] for i in range(0, len(addresses), size)]
+
+    @staticmethod
+    def _select_pair(address: str, pairs: List[Dict]) -> Optional[Dict]:
+        """单个和批量查询共用的选池规则：按DexScreener返回顺序（流动性/交易量）取第一个以该代币为baseToken的池子"""
+        for pair in pairs:
+            if pair.get('baseToken', {}).get('address') == address:
+                return pair
+        return None
+
+    @classmethod
+    def _parse_selected_pair(cls, address: str, pairs: Optional[List[Dict]]) -> Optional[Dict]:
+        """解析单个代币的查询结果：没有任何池子时价格与市值置为0，只作为quoteToken出现时视为没有数据"""
+        # 如果撤池子/无流动性，赋予0值并返回
+        if not pairs:
+            logging.warning(f"代币 {address} 无活跃流动性，价格与市值置为0")
+            return cls._parse_pair(None)
+        pair = cls._select_pair(address, pairs)
+        if pair is None:
+            logging.warning(f"代币 {address} 没有以其为baseToken的池子，无法确定价格")
+            return None
+        return cls._parse_pair(pair)
+
+    @classmethod
+    def _split_batch_pairs(cls, chunk: List[str], pairs: List[Dict]) -> Dict[str, Dict]:
+        """按与单个查询相同的选池规则把批量结果拆回各个地址，批量结果中没有base池子的地址不在返回值中"""
+        results = {}
+        for address in chunk:
+            pair = cls._select_pair(address, pairs)
+            if pair is not None:
+                results[address] = cls._parse_pair(pair)
+        return results
+
+    @staticmethod
+    def _parse_pair(pair: Optional[Dict]) -> Dict:
+        """解析单个池子的价格/市值/流动性，无池子时全部置为0"""
+        if not pair:
+            return {
+                "price": 0.0,
+                "market_cap": 0.0,
+                "liquidity": 0.0
+            }
+        price_usd = float(pair.get('priceUsd', 0.0))
+        fdv = float(pair.get('fdv', 0.0))
+        liquidity = float(pair.get('liquidity', {}).get('usd', 0.0))
+
+        # 如果有 fdv (全流通市值) 优先用，否则用 marketCap
+        market_cap = fdv if fdv > 0 else float(pair.get('marketCap', 0.0))
+
+        return {
+            "price": price_usd,
+            "market_cap": market_cap,
+            "liquidity": liquidity
+        }
+
     def get_token_info_combined(self, address: str) -> Optional[Dict]:
         """获取token的完整信息"""
         meta_data = self.get_token_meta_data(address)
@@ -159,7 +282,7 @@ class TokenAPI:
                 ]
             }
 
-            response = requests.post(self.rpc_url, json=payload, headers=headers, timeout=15)
+            response = HttpClient().post(self.rpc_url, json=payload, headers=headers, timeout=15)
             response.raise_for_status()
 
             json_resp = response.json()
@@ -211,3 +334,88 @@ class TokenAPI:
         except Exception as e:
             logging.error(f"获取钱包余额RPC请求失败 [{wallet_address}]: {e}")
             return None
+
+
+class MarketDataBatcher:
+    """DexScreener批量查询器 - 单例模式
+
+    在一个很短的窗口内收集所有待查询的代币地址，合并成一次多地址请求，
+    再把结果分发回各个调用方，降低上游请求数和限流压力。
+    """
+
+    MAX_ADDRESSES_PER_REQUEST = 30
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._pending: Dict[str, List[Future]] = {}
+            self._cond = threading.Condition()
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dex-batch")
+            self.request_count = 0
+            self.address_count = 0
+            self.refresh_config()
+            ConfigManager.register_service(self)
+            threading.Thread(target=self._dispatch_loop, daemon=True).start()
+            self._initialized = True
+
+    def refresh_config(self):
+        """刷新合并窗口配置"""
+        self.window = ConfigManager.get_float('DEX_BATCH_WINDOW_MS', 50) / 1000
+
+    def fetch(self, address: str, timeout: float = 30) -> Optional[Dict]:
+        """提交一个地址查询并等待所在批次返回"""
+        future = Future()
+        with self._cond:
+            self._pending.setdefault(address, []).append(future)
+            self._cond.notify()
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            logging.error(f"等待批量市场数据超时 [{address}]: {e}")
+            return None
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # 等待一个窗口，收集同一时刻到达的其他查询
+            time.sleep(self.window)
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            self._executor.submit(self._resolve, pending)
+
+    def _resolve(self, pending: Dict[str, List[Future]]):
+        results = {}
+        try:
+            results = TokenAPI().fetch_market_data_batch(list(pending.keys()))
+            self.request_count += (len(pending) + self.MAX_ADDRESSES_PER_REQUEST - 1) // self.MAX_ADDRESSES_PER_REQUEST
+            self.address_count += len(pending)
+        except Exception as e:
+            logging.error(f"批量查询市场数据失败: {e}")
+        finally:
+            for address, futures in pending.items():
+                for future in futures:
+                    future.set_result(results.get(address))
+
+    def get_stats(self) -> Dict:
+        """获取批量请求次数与覆盖的地址数"""
+        return {
+            "requests": self.request_count,
+            "addresses": self.address_count,
+            "window_ms": self.window * 1000
+        }
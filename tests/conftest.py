@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# 项目模块按根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 导入数据库模块时会在当前目录创建config.db，测试在临时目录中运行，不影响项目目录
+os.chdir(tempfile.mkdtemp(prefix="meme-bot-tests-"))
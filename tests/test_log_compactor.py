@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import MonitorLog, MonitorRecord, PriceCandle, SessionLocal
+from services.log_compactor import LogCompactor
+
+TOKEN = "CompactorStubMint"
+# 远早于压缩截止时间的分钟
+MINUTE = datetime(2020, 1, 1, 12, 0)
+
+
+def _add_logs(*logs):
+    db = SessionLocal()
+    try:
+        db.add_all(logs)
+        db.commit()
+        return [log.id for log in logs]
+    finally:
+        db.close()
+
+
+def _tick(seconds: float, price: float, market_cap: float, **fields):
+    values = dict(monitor_type='swing', watch_token_address=TOKEN, action_type='monitoring',
+                  timestamp=MINUTE + timedelta(seconds=seconds), price=price, market_cap=market_cap)
+    values.update(fields)
+    return MonitorLog(**values)
+
+
+def _candles(token_address: str = TOKEN):
+    db = SessionLocal()
+    try:
+        return {candle.minute: candle for candle in
+                db.query(PriceCandle).filter(PriceCandle.token_address == token_address).all()}
+    finally:
+        db.close()
+
+
+def _remaining(ids):
+    db = SessionLocal()
+    try:
+        return {log_id for (log_id,) in db.query(MonitorLog.id).filter(MonitorLog.id.in_(ids)).all()}
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def compactor():
+    compactor = LogCompactor()
+    chunk_size = compactor.chunk_size
+    yield compactor
+    compactor.chunk_size = chunk_size
+    db = SessionLocal()
+    try:
+        db.query(MonitorLog).filter(MonitorLog.watch_token_address == TOKEN).delete()
+        db.query(PriceCandle).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_ticks_across_minute_boundary(compactor):
+    """跨分钟的tick按分钟分别汇总成OHLC，分批处理时同一分钟的样本跨批次合并"""
+    compactor.chunk_size = 2
+    _add_logs(_tick(5, 1.0, 100), _tick(20, 3.0, 300), _tick(40, 0.5, 50), _tick(59, 2.0, 200),
+              _tick(60, 2.5, 250), _tick(90, 4.0, 400), _tick(110, 2.2, 220))
+
+    assert compactor.compact() == 7
+
+    candles = _candles()
+    first, second = candles[MINUTE], candles[MINUTE + timedelta(minutes=1)]
+    assert len(candles) == 2
+    assert (first.open_price, first.high_price, first.low_price, first.close_price) == (1.0, 3.0, 0.5, 2.0)
+    assert (first.open_market_cap, first.high_market_cap, first.low_market_cap, first.close_market_cap) == \
+        (100, 300, 50, 200)
+    assert first.sample_count == 4
+    assert (second.open_price, second.high_price, second.low_price, second.close_price) == (2.5, 4.0, 2.2, 2.2)
+    assert second.sample_count == 3
+
+
+def test_merge_into_existing_candle(compactor):
+    """同一代币同一分钟已有K线时合并进去：开盘不变，高低点扩展，收盘取最新，样本数累加"""
+    _add_logs(_tick(10, 2.0, 200), _tick(20, 3.0, 300))
+    compactor.compact()
+    _add_logs(_tick(30, 1.0, 100), _tick(50, 5.0, 500), _tick(55, 4.0, 400))
+    compactor.compact()
+
+    candles = _candles()
+    assert len(candles) == 1
+    candle = candles[MINUTE]
+    assert (candle.open_price, candle.high_price, candle.low_price, candle.close_price) == (2.0, 5.0, 1.0, 4.0)
+    assert (candle.open_market_cap, candle.close_market_cap) == (200, 400)
+    assert candle.sample_count == 5
+
+
+def test_normal_monitor_ticks_use_record_token(compactor):
+    """普通监控日志没有代币地址，按监控记录的代币归入K线"""
+    db = SessionLocal()
+    try:
+        record = MonitorRecord(name="compactor", token_address="CompactorRecordMint", threshold=1.0,
+                               sell_percentage=50.0, webhook_url="http://127.0.0.1/hook")
+        db.add(record)
+        db.commit()
+        record_id = record.id
+    finally:
+        db.close()
+    _add_logs(_tick(1, 1.0, 100, monitor_type='normal', watch_token_address=None, monitor_record_id=record_id))
+
+    compactor.compact()
+
+    assert _candles("CompactorRecordMint")[MINUTE].sample_count == 1
+
+
+def test_keeps_trade_and_recent_logs(compactor):
+    """交易日志和未到期的tick日志不会被删除"""
+    kept = _add_logs(_tick(1, 1.0, 100, action_type='sell', tx_hash='stub'),
+                     _tick(2, 1.0, 100, action_type='buy', tx_hash='stub'),
+                     _tick(3, 1.0, 100, action_type='failed'),
+                     _tick(0, 1.0, 100, timestamp=datetime.utcnow()))
+    compacted = _add_logs(_tick(4, 1.0, 100))
+
+    assert compactor.compact() == 1
+
+    assert _remaining(kept + compacted) == set(kept)
+    assert _candles()[MINUTE].sample_count == 1
@@ -0,0 +1,131 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import MonitorLog, SessionLocal
+from database.sync_table import MONITOR_LOG_COUNT_TRIGGERS, _create_log_counters
+from services.monitor_service import MonitorService
+
+
+@pytest.fixture
+def cursor():
+    """只包含计数相关列的内存日志表"""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE monitor_logs (id INTEGER PRIMARY KEY, monitor_type VARCHAR, action_type VARCHAR)")
+    yield cursor
+    conn.close()
+
+
+def _insert(cursor, rows):
+    cursor.executemany("INSERT INTO monitor_logs (monitor_type, action_type) VALUES (?, ?)", rows)
+
+
+def _assert_counts_match(cursor):
+    """monitor_log_counts 与按 (monitor_type, action_type) 分组的 COUNT(*) 一致，计数为0的分组可以保留"""
+    cursor.execute("SELECT COALESCE(monitor_type, ''), COALESCE(action_type, ''), COUNT(*) "
+                   "FROM monitor_logs GROUP BY 1, 2")
+    expected = {(monitor_type, action_type): count for monitor_type, action_type, count in cursor.fetchall()}
+    cursor.execute("SELECT monitor_type, action_type, row_count FROM monitor_log_counts WHERE row_count != 0")
+    assert {(monitor_type, action_type): count for monitor_type, action_type, count in cursor.fetchall()} == expected
+
+
+def test_initial_backfill(cursor):
+    """首次创建触发器时按已有日志初始化计数，空的类型/动作按空字符串计"""
+    _insert(cursor, [('normal', 'monitoring')] * 3 + [('swing', 'sell')] * 2 + [(None, None)])
+    _create_log_counters(cursor)
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger'")
+    assert {row[0] for row in cursor.fetchall()} == set(MONITOR_LOG_COUNT_TRIGGERS)
+    cursor.execute("SELECT monitor_type, action_type, row_count FROM monitor_log_counts")
+    assert set(cursor.fetchall()) == {('normal', 'monitoring', 3), ('swing', 'sell', 2), ('', '', 1)}
+
+
+def test_backfill_runs_once(cursor):
+    """触发器已存在时不重新计数，缺少任意一个触发器时重建并重新计数"""
+    _create_log_counters(cursor)
+    _insert(cursor, [('normal', 'buy')] * 2)
+    cursor.execute("UPDATE monitor_log_counts SET row_count = 100")
+    _create_log_counters(cursor)
+    cursor.execute("SELECT row_count FROM monitor_log_counts")
+    assert cursor.fetchall() == [(100,)]
+
+    cursor.execute("DROP TRIGGER trg_monitor_logs_count_delete")
+    _create_log_counters(cursor)
+    _assert_counts_match(cursor)
+
+
+def test_triggers_track_insert_delete_update(cursor):
+    """插入、删除以及修改monitor_type/action_type后计数与COUNT(*)保持一致"""
+    _create_log_counters(cursor)
+    _insert(cursor, [('normal', 'monitoring')] * 4 + [('normal', 'sell'), ('swing', 'buy'), (None, 'buy')])
+    _assert_counts_match(cursor)
+
+    cursor.execute("DELETE FROM monitor_logs WHERE id IN (1, 2)")
+    _assert_counts_match(cursor)
+
+    cursor.execute("UPDATE monitor_logs SET action_type = 'sell' WHERE id = 3")
+    _assert_counts_match(cursor)
+    cursor.execute("UPDATE monitor_logs SET monitor_type = 'swing' WHERE action_type = 'sell'")
+    _assert_counts_match(cursor)
+    cursor.execute("UPDATE monitor_logs SET monitor_type = 'normal' WHERE monitor_type IS NULL")
+    _assert_counts_match(cursor)
+
+    cursor.execute("DELETE FROM monitor_logs")
+    _assert_counts_match(cursor)
+
+
+# 分页测试使用的监控记录ID，与其他测试写入的日志区分
+RECORD_ID = 9001
+
+
+@pytest.fixture
+def tied_logs():
+    """同一时间戳的多条日志夹在不同时间戳的日志之间"""
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    timestamps = [base + timedelta(seconds=2)] * 2 + [base + timedelta(seconds=1)] * 7 + [base] * 3
+    db = SessionLocal()
+    try:
+        logs = [MonitorLog(monitor_record_id=RECORD_ID, monitor_type='normal', action_type='monitoring',
+                           timestamp=timestamp, price=1.0) for timestamp in timestamps]
+        db.add_all(logs)
+        db.commit()
+        ids = [(log.timestamp, log.id) for log in logs]
+    finally:
+        db.close()
+    yield [log_id for _, log_id in sorted(ids, reverse=True)]
+    db = SessionLocal()
+    try:
+        db.query(MonitorLog).filter(MonitorLog.monitor_record_id == RECORD_ID).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_cursor_pages_do_not_skip_or_repeat_tied_timestamps(tied_logs):
+    """按next_cursor翻页时，同一时间戳的日志跨页也不会遗漏或重复"""
+    seen = []
+    cursor = {}
+    while True:
+        result = MonitorService.get_logs(per_page=3, monitor_record_id=RECORD_ID, type='normal', **cursor)
+        assert result["total"] == len(tied_logs)
+        seen.extend(int(log["id"].split("_")[1]) for log in result["logs"])
+        if not result["next_cursor"]:
+            assert not result["has_more"]
+            break
+        cursor = {"before_ts": datetime.fromisoformat(result["next_cursor"]["before_ts"]),
+                  "before_id": result["next_cursor"]["before_id"]}
+    assert seen == tied_logs
+
+
+def test_counts_follow_orm_writes(tied_logs):
+    """不按记录过滤时的总数来自计数表，与日志表的COUNT(*)一致"""
+    db = SessionLocal()
+    try:
+        expected = db.query(MonitorLog).filter(MonitorLog.monitor_type == 'normal',
+                                               MonitorLog.action_type == 'monitoring').count()
+    finally:
+        db.close()
+    result = MonitorService.get_logs(per_page=1, type='normal', action_types=['monitoring'])
+    assert result["total"] == expected >= len(tied_logs)
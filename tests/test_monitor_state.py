@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from database.models import MonitorRecord, SessionLocal
+from services.monitor_service import MonitorService
+from services.monitor_state import MonitorStateStore
+
+
+def _create_record(name: str) -> int:
+    db = SessionLocal()
+    try:
+        record = MonitorRecord(name=name, token_address="StubMint", threshold=1.0, sell_percentage=50.0,
+                               webhook_url="http://127.0.0.1/hook")
+        db.add(record)
+        db.commit()
+        return record.id
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def store():
+    store = MonitorStateStore()
+    store.flush()
+    yield store
+    store.flush()
+
+
+def test_flush_survives_deleted_record(store):
+    """记录在落库前被删除，其他监控的状态仍然正常写入，且不会反复重试"""
+    kept_id = _create_record("kept")
+    deleted_id = _create_record("deleted")
+    checked_at = datetime.utcnow()
+    store.record_seen('normal', kept_id, last_check_at=checked_at, last_price=1.5, last_market_cap=1500.0)
+    store.record_seen('normal', deleted_id, last_check_at=checked_at, last_price=2.5, last_market_cap=2500.0)
+
+    ok, message = MonitorService.delete_record(deleted_id)
+    assert ok, message
+    # 监控循环在删除后仍可能写入最后一个tick的状态
+    store.record_seen('normal', deleted_id, last_price=3.5)
+
+    store.flush()
+    store.flush()
+
+    db = SessionLocal()
+    try:
+        kept = db.query(MonitorRecord).filter(MonitorRecord.id == kept_id).first()
+        assert kept.last_price == 1.5
+        assert kept.last_market_cap == 1500.0
+        assert kept.last_check_at == checked_at
+        assert db.query(MonitorRecord).filter(MonitorRecord.id == deleted_id).first() is None
+    finally:
+        db.close()
+    assert store.get_stats()["pending"] == 0
+
+
+def test_discard_drops_pending_state(store):
+    """删除时丢弃未落库状态，正常停止时保留最后一次状态"""
+    record_id = _create_record("discarded")
+    store.record_seen('normal', record_id, last_price=4.0)
+    store.discard('normal', record_id)
+    assert ('normal', record_id) not in store._pending
+
+    store.record_seen('normal', record_id, last_price=5.0)
+    store.discard('normal', record_id, keep_pending=True)
+    store.flush()
+
+    db = SessionLocal()
+    try:
+        assert db.query(MonitorRecord).filter(MonitorRecord.id == record_id).first().last_price == 5.0
+    finally:
+        db.close()
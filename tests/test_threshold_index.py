@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.threshold_index import ThresholdIndex
+
+
+def _monitor(record_id: int, token: str, threshold: float, type: str = 'sell'):
+    return SimpleNamespace(id=record_id, token_address=token, threshold=threshold, type=type)
+
+
+def _swing(record_id: int, token: str, sell_threshold: float, buy_threshold: float, price_type: str = 'market_cap'):
+    return SimpleNamespace(id=record_id, watch_token_address=token, price_type=price_type,
+                           sell_threshold=sell_threshold, buy_threshold=buy_threshold)
+
+
+@pytest.fixture
+def index():
+    """单例在测试间共享，每个测试结束后移除自己索引的记录"""
+    index = ThresholdIndex()
+    yield index
+    for record_id in list(index._monitors):
+        index.remove_monitor(record_id)
+    for record_id in list(index._swings):
+        index.remove_swing(record_id)
+
+
+def test_monitor_sell_at_or_above_buy_strictly_below(index):
+    """普通监控：市值 >= 阈值触发卖出，市值 < 阈值触发买入"""
+    index.add_monitor(_monitor(1, "MintA", 1000))
+    index.add_monitor(_monitor(2, "MintA", 2000))
+    index.add_monitor(_monitor(3, "MintA", 1000, type='buy'))
+    index.add_monitor(_monitor(4, "MintA", 500, type='buy'))
+
+    at_threshold = index.match("MintA", {"price": 1.0, "market_cap": 1000})
+    assert at_threshold.sell == {1}
+    assert at_threshold.buy == set()
+
+    below = index.match("MintA", {"price": 1.0, "market_cap": 999.99})
+    assert below.sell == set()
+    assert below.buy == {3}
+
+    assert index.match("MintA", {"price": 1.0, "market_cap": 2000}).sell == {1, 2}
+    assert index.match("MintA", {"price": 1.0, "market_cap": 400}).buy == {3, 4}
+
+
+def test_monitor_needs_market_cap(index):
+    """普通监控只按市值匹配，没有市值或没有价格信息时不触发"""
+    index.add_monitor(_monitor(1, "MintA", 1000))
+    assert index.match("MintA", {"price": 5000, "market_cap": None}).sell == set()
+    assert index.match("MintA", None).sell == set()
+    assert index.match("MintB", {"price": 1.0, "market_cap": 5000}).sell == set()
+
+
+def test_swing_sell_at_or_above_buy_at_or_below(index):
+    """波段监控：值 >= 卖出阈值触发卖出，值 <= 买入阈值触发买入，两端都包含等号"""
+    index.add_swing(_swing(10, "MintA", sell_threshold=2000, buy_threshold=1000))
+
+    assert index.match("MintA", {"price": 1.0, "market_cap": 2000}).swing_sell == {10}
+    assert index.match("MintA", {"price": 1.0, "market_cap": 1999}).swing_sell == set()
+    assert index.match("MintA", {"price": 1.0, "market_cap": 1000}).swing_buy == {10}
+    assert index.match("MintA", {"price": 1.0, "market_cap": 1001}).swing_buy == set()
+
+
+def test_swing_matches_on_its_price_type(index):
+    """按price_type分别匹配价格或市值"""
+    index.add_swing(_swing(10, "MintA", sell_threshold=2.0, buy_threshold=1.0, price_type='price'))
+    index.add_swing(_swing(11, "MintA", sell_threshold=2000, buy_threshold=1000))
+
+    result = index.match("MintA", {"price": 2.0, "market_cap": 1500})
+    assert result.swing_sell == {10}
+    assert result.swing_buy == set()
+
+    result = index.match("MintA", {"price": 1.5, "market_cap": 900})
+    assert result.swing_sell == set()
+    assert result.swing_buy == {11}
+
+
+def test_sol_alias_shares_index(index):
+    """老SOL地址与新地址索引到同一个代币"""
+    index.add_monitor(_monitor(1, "So11111111111111111111111111111111111111111", 100))
+    assert index.match("So11111111111111111111111111111111111111112", {"market_cap": 100}).sell == {1}
+
+
+def test_edit_replaces_threshold(index):
+    """编辑运行中的记录后按新阈值匹配，旧阈值不再触发"""
+    index.add_monitor(_monitor(1, "MintA", 1000))
+    index.update_monitor(_monitor(1, "MintA", 3000))
+    assert index.match("MintA", {"market_cap": 2000}).sell == set()
+    assert index.match("MintA", {"market_cap": 3000}).sell == {1}
+    assert index.get_stats()["MintA"]["sell"] == 1
+
+    # 切换监听方向或代币时从旧位置移除
+    index.update_monitor(_monitor(1, "MintB", 3000, type='buy'))
+    assert "MintA" not in index.get_stats()
+    assert index.match("MintB", {"market_cap": 2000}).buy == {1}
+
+    index.add_swing(_swing(10, "MintA", sell_threshold=2000, buy_threshold=1000))
+    index.update_swing(_swing(10, "MintA", sell_threshold=5000, buy_threshold=500))
+    assert index.match("MintA", {"market_cap": 2000}).swing_sell == set()
+    assert index.match("MintA", {"market_cap": 1000}).swing_buy == set()
+    assert index.match("MintA", {"market_cap": 500}).swing_buy == {10}
+
+
+def test_edit_ignores_records_not_running(index):
+    """未索引（未运行）的记录被编辑时不加入索引"""
+    index.update_monitor(_monitor(1, "MintA", 1000))
+    index.update_swing(_swing(10, "MintA", sell_threshold=2000, buy_threshold=1000))
+    assert index.get_stats() == {}
+
+
+def test_remove_drops_only_that_record(index):
+    """移除记录只删除它自己的阈值，相同阈值的其他记录保留，代币没有阈值后从索引中删除"""
+    index.add_monitor(_monitor(1, "MintA", 1000))
+    index.add_monitor(_monitor(2, "MintA", 1000))
+    index.add_swing(_swing(10, "MintA", sell_threshold=1000, buy_threshold=500))
+
+    index.remove_monitor(1)
+    assert index.match("MintA", {"market_cap": 1000}).sell == {2}
+
+    index.remove_monitor(2)
+    index.remove_monitor(2)
+    assert index.get_stats()["MintA"] == {"sell": 0, "buy": 0, "swing": 1}
+
+    index.remove_swing(10)
+    assert index.get_stats() == {}
+    assert index.match("MintA", {"market_cap": 1000}).swing_sell == set()
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.tx_broadcaster import TransactionBroadcaster
+
+SIGNATURE = "5stubSignature"
+# 慢节点的响应延迟（秒），远大于快节点
+SLOW_SECONDS = 2
+
+
+class _StubRpcHandler(BaseHTTPRequestHandler):
+    """桩RPC节点：/fast立即接受，/slow延迟后接受，/reject返回JSON-RPC错误"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/slow":
+            time.sleep(SLOW_SECONDS)
+        if self.path.startswith("/reject"):
+            body = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32002, "message": "simulation failed",
+                                                         "data": {"logs": ["Program log: stub"]}}}
+        else:
+            body = {"jsonrpc": "2.0", "id": 1, "result": SIGNATURE}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubTransaction:
+    signatures = [SIGNATURE]
+
+    def __bytes__(self):
+        return b"stub-transaction"
+
+
+@pytest.fixture(scope="module")
+def rpc_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubRpcHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_send_returns_on_first_accept(rpc_url):
+    endpoints = [f"{rpc_url}/slow", f"{rpc_url}/reject", f"{rpc_url}/fast"]
+    started = time.monotonic()
+    signature, encoded, used = TransactionBroadcaster().send(_StubTransaction(), endpoints)
+    elapsed = time.monotonic() - started
+
+    assert signature == SIGNATURE
+    assert sorted(used) == sorted(endpoints)
+    assert elapsed < SLOW_SECONDS / 2
+
+
+def test_send_raises_when_every_endpoint_rejects(rpc_url):
+    with pytest.raises(Exception, match="simulation failed\nProgram log: stub"):
+        TransactionBroadcaster().send(_StubTransaction(), [f"{rpc_url}/reject", f"{rpc_url}/reject?again"])
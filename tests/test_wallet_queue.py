@@ -0,0 +1,15 @@
+from types import SimpleNamespace
+
+from core.wallet_queue import WalletTradeQueue
+
+
+def test_trader_without_wallet_runs_job():
+    """私钥无效的交易器没有钱包，交易函数照常执行并返回失败结果，不进入任何钱包队列"""
+    trader = SimpleNamespace(wallet=None)
+    queue = WalletTradeQueue()
+
+    future = queue.submit(trader, lambda: (False, 0), "no-wallet")
+
+    assert future.result(timeout=5) == (False, 0)
+    queue.hold(trader, future)
+    assert queue.get_stats()["wallets"] == {}